@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark các hàm của GitCore trên repo giả lập với nhiều kích thước.
+
+Ví dụ:
+    python benchmarks/bench_core.py --sizes tiny,small --output bench.json
+    python benchmarks/bench_core.py --sizes tiny,small --compare bench.json
+
+Repo được tạo một lần trong --workdir và dùng lại cho các lần chạy sau.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from git_assistant.core import GitCore  # noqa: E402
+from git_assistant.runner import git_version  # noqa: E402
+from synthetic import PRESETS, build_preset  # noqa: E402
+
+METHODS = ('status', 'has_changes', 'get_branches', 'current_branch', 'stash_list', 'checkout', 'merge')
+
+# Kết quả chậm hơn lần so sánh quá tỉ lệ này thì bị đánh dấu
+REGRESSION_RATIO = 1.25
+
+
+def _time(func, repeat, before=None, after=None):
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+        if after:
+            after()
+    return samples
+
+
+def bench_repo(repo, repeat, use_cache=False):
+    """Đo từng hàm GitCore trên một repo, trả về {tên hàm: [thời gian mỗi lần (giây)]}"""
+    git = GitCore(working_dir=repo, use_cache=use_cache)
+    results = {}
+
+    results['status'] = _time(git.status, repeat)
+    results['has_changes'] = _time(git.has_changes, repeat)
+    results['get_branches'] = _time(git.get_branches, repeat)
+    results['current_branch'] = _time(git.current_branch, repeat)
+    results['stash_list'] = _time(git.stash_list, repeat)
+
+    # checkout: đổi qua lại main <-> feature (giữ nguyên file chưa commit)
+    targets = ['feature', 'main']
+    state = {'i': 0}
+
+    def do_checkout():
+        git.checkout(targets[state['i'] % 2])
+        state['i'] += 1
+    results['checkout'] = _time(do_checkout, repeat)
+    if state['i'] % 2:
+        git.checkout('main')
+
+    # merge: merge feature vào một nhánh nháp, sau mỗi lần reset lại (không tính giờ)
+    git.run_command(['checkout', '-q', '-B', 'bench-merge', 'main'])
+    base = git.rev_parse('HEAD')
+    results['merge'] = _time(
+        lambda: git.merge('feature'), repeat,
+        after=lambda: git.run_command(['reset', '-q', '--hard', base]))
+    git.run_command(['checkout', '-q', 'main'])
+    # reset --hard xóa file đã sửa nhưng không đụng tới untracked.txt, status vẫn có dữ liệu
+    return results
+
+
+def summarize(samples):
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'runs': len(samples),
+    }
+
+
+def print_table(report):
+    sizes = list(report['sizes'])
+    header = f"{'Hàm':<16}" + "".join(f"{s:>14}" for s in sizes)
+    print(header)
+    print("-" * len(header))
+    for method in METHODS:
+        row = f"{method:<16}"
+        for size in sizes:
+            m = report['sizes'][size]['methods'].get(method)
+            row += f"{m['median'] * 1000:>12.2f}ms" if m else f"{'-':>14}"
+        print(row)
+    # Đường cong tăng trưởng: tỉ lệ so với kích thước nhỏ nhất
+    if len(sizes) > 1:
+        print()
+        print("Tỉ lệ so với", sizes[0])
+        for method in METHODS:
+            first = report['sizes'][sizes[0]]['methods'][method]['median']
+            row = f"{method:<16}"
+            for size in sizes:
+                cur = report['sizes'][size]['methods'][method]['median']
+                row += f"{cur / first if first else 0:>13.1f}x"
+            print(row)
+
+
+def compare(report, baseline):
+    """In các hàm chậm hơn baseline quá REGRESSION_RATIO, trả về số lượng"""
+    regressions = 0
+    print()
+    print(f"So sánh với {baseline.get('revision', '?')} ({baseline.get('created', '?')}):")
+    for size, data in report['sizes'].items():
+        old = baseline.get('sizes', {}).get(size)
+        if not old:
+            continue
+        for method, m in data['methods'].items():
+            o = old['methods'].get(method)
+            if not o or not o['median']:
+                continue
+            ratio = m['median'] / o['median']
+            mark = "  <-- CHẬM HƠN" if ratio > REGRESSION_RATIO else ""
+            if mark:
+                regressions += 1
+            print(f"  {size:<8}{method:<16}{o['median'] * 1000:>10.2f}ms -> {m['median'] * 1000:>10.2f}ms"
+                  f" ({ratio:.2f}x){mark}")
+    return regressions
+
+
+def _revision():
+    try:
+        out = subprocess.run(['git', '-C', ROOT, 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GitCore trên repo giả lập")
+    parser.add_argument("--sizes", default="tiny,small",
+                        help=f"Các kích thước, cách nhau bởi dấu phẩy ({', '.join(PRESETS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần đo mỗi hàm (mặc định: 5)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "git_assistant_bench"),
+                        help="Thư mục chứa repo giả lập (được dùng lại giữa các lần chạy)")
+    parser.add_argument("--cache", action="store_true", help="Bật cache trạng thái repo của GitCore")
+    parser.add_argument("--output", metavar="FILE", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--compare", metavar="FILE", help="So sánh với kết quả JSON của lần chạy trước")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in PRESETS]
+    if unknown:
+        parser.error(f"Kích thước không hợp lệ: {', '.join(unknown)}")
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'revision': _revision(),
+        'git': '.'.join(str(p) for p in git_version()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'cache': args.cache,
+        'sizes': {},
+    }
+    for size in sizes:
+        print(f"[{size}] chuẩn bị repo...")
+        repo = build_preset(args.workdir, size)
+        print(f"[{size}] đang đo...")
+        raw = bench_repo(repo, args.repeat, use_cache=args.cache)
+        files, commits, branches = PRESETS[size]
+        report['sizes'][size] = {
+            'files': files, 'commits': commits, 'branches': branches,
+            'methods': {name: summarize(samples) for name, samples in raw.items()},
+        }
+
+    print()
+    print_table(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nĐã ghi kết quả vào {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
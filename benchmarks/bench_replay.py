@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ghi transcript các workflow trên repo thật rồi phát lại không cần git (ReplayRunner).
+
+- Mặc định: ghi transcript rồi đo số lần phát lại mỗi giây cho từng workflow.
+- --save DIR: lưu transcript (kèm kịch bản trả lời) vào DIR.
+- --check DIR: phát lại transcript đã lưu với code hiện tại; workflow chạy lệnh git khác đi
+  thì in diff và thoát với mã 1 (dùng làm kiểm tra hồi quy).
+
+Ví dụ:
+    python benchmarks/bench_replay.py --save transcripts/
+    python benchmarks/bench_replay.py --check transcripts/
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from git_assistant.io_handler import ScriptedIO  # noqa: E402
+from git_assistant.scenarios import GitScenarios  # noqa: E402
+from git_assistant.transcript import RecordingRunner, ReplayRunner, TranscriptMismatch  # noqa: E402
+from bench_workflows import WORKFLOWS, Fixture  # noqa: E402
+from synthetic import PRESETS, build_preset  # noqa: E402
+
+
+def record(seed, scratch, key):
+    """Chạy workflow một lần trên repo thật, trả về {'workflow', 'answers', 'transcript'}"""
+    method, prepare = WORKFLOWS[key]
+    fx = Fixture(seed, os.path.join(scratch, f"record-{key}"))
+    try:
+        answers = prepare(fx, 0)
+        scenarios = GitScenarios(io_handler=ScriptedIO(answers), working_dir=fx.work)
+        recorder = RecordingRunner(scenarios.git.runner)
+        scenarios.git.runner = recorder
+        getattr(scenarios, method)()
+        return {'workflow': key, 'answers': answers, 'transcript': recorder.transcript()}
+    finally:
+        fx.cleanup()
+
+
+def _answers(data):
+    # JSON không có tuple: ('confirm', True) được lưu thành ["confirm", true]
+    return [tuple(a) if isinstance(a, list) else a for a in data['answers']]
+
+
+def replay_once(data, replay):
+    """Phát lại một lần, trả về ScriptedIO; ném TranscriptMismatch nếu lệnh git khác transcript"""
+    method, _ = WORKFLOWS[data['workflow']]
+    replay.reset()
+    io = ScriptedIO(_answers(data))
+    scenarios = GitScenarios(io_handler=io, working_dir=ROOT)
+    scenarios.git.runner = replay
+    getattr(scenarios, method)()
+    replay.verify()
+    return io
+
+
+def bench(data, seconds):
+    replay = ReplayRunner(data['transcript']['commands'])
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        replay_once(data, replay)
+        runs += 1
+    return runs / (time.perf_counter() - start)
+
+
+def check(directory):
+    """Phát lại mọi transcript trong thư mục, trả về số workflow bị lệch"""
+    failures = 0
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            data = json.load(f)
+        try:
+            replay_once(data, ReplayRunner(data['transcript']['commands']))
+            print(f"✔ {data['workflow']}: {len(data['transcript']['commands'])} lệnh khớp transcript")
+        except TranscriptMismatch as e:
+            failures += 1
+            print(f"✘ {data['workflow']}: {e}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ghi/phát lại transcript lệnh git của các workflow")
+    parser.add_argument("--size", default="tiny", choices=list(PRESETS), help="Kích thước repo để ghi (mặc định: tiny)")
+    parser.add_argument("--workflows", default=",".join(WORKFLOWS),
+                        help=f"Các workflow ({', '.join(WORKFLOWS)})")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Thời gian đo phát lại mỗi workflow")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "git_assistant_bench"),
+                        help="Thư mục chứa repo giả lập (được dùng lại giữa các lần chạy)")
+    parser.add_argument("--save", metavar="DIR", help="Lưu transcript vào DIR")
+    parser.add_argument("--check", metavar="DIR", help="Phát lại transcript đã lưu trong DIR và báo khác biệt")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(1 if check(args.check) else 0)
+
+    workflows = [w.strip() for w in args.workflows.split(',') if w.strip()]
+    unknown = [w for w in workflows if w not in WORKFLOWS]
+    if unknown:
+        parser.error(f"Workflow không hợp lệ: {', '.join(unknown)}")
+
+    seed = build_preset(args.workdir, args.size)
+    scratch = os.path.join(args.workdir, 'replay')
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+
+    print(f"{'Workflow':<14}{'Lệnh git':>10}{'Phát lại/giây':>16}")
+    for key in workflows:
+        data = record(seed, scratch, key)
+        if args.save:
+            with open(os.path.join(args.save, f"{key}.json"), 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1, ensure_ascii=False)
+        rate = bench(data, args.seconds)
+        print(f"{key:<14}{len(data['transcript']['commands']):>10}{rate:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark end-to-end các workflow của GitScenarios với remote là repo bare trên máy.
+
+Câu hỏi của workflow được trả lời bằng ScriptedIO; mọi lệnh git được đếm qua TracingRunner.
+Mỗi lần chạy dùng một cặp remote/clone mới (phần chuẩn bị không tính giờ).
+
+Ví dụ:
+    python benchmarks/bench_workflows.py --sizes tiny --repeat 3
+    python benchmarks/bench_workflows.py --sizes small --workflows pull,sync --output wf.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from git_assistant.io_handler import ScriptedIO  # noqa: E402
+from git_assistant.runner import git_version  # noqa: E402
+from git_assistant.scenarios import GitScenarios  # noqa: E402
+from git_assistant.tracing import Tracer, TracingRunner  # noqa: E402
+from synthetic import PRESETS, build_preset, _path  # noqa: E402
+
+
+def _git(repo, *args, env=None, input=None):
+    full_env = dict(os.environ, **env) if env else None
+    out = subprocess.run(['git', '-C', repo] + list(args), check=True, env=full_env, input=input,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return out.stdout.decode('utf-8', 'replace').strip()
+
+
+def _advance_remote(bare, branch, name, text):
+    """Thêm một commit (sửa/thêm file name) vào nhánh branch của repo bare, không cần working tree"""
+    index = os.path.join(bare, 'bench-index')
+    env = {'GIT_INDEX_FILE': index}
+    try:
+        _git(bare, 'read-tree', branch, env=env)
+        blob = _git(bare, 'hash-object', '-w', '--stdin', input=text.encode('utf-8'))
+        _git(bare, 'update-index', '--add', '--cacheinfo', f'100644,{blob},{name}', env=env)
+        tree = _git(bare, 'write-tree', env=env)
+        commit = _git(bare, 'commit-tree', tree, '-p', branch, '-m', f'remote change {name}')
+        _git(bare, 'update-ref', f'refs/heads/{branch}', commit)
+    finally:
+        if os.path.exists(index):
+            os.remove(index)
+
+
+def _touch(repo, name, text):
+    with open(os.path.join(repo, name), 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+class Fixture:
+    """Một remote bare + một clone làm việc, tạo mới từ repo giả lập cho mỗi lần chạy"""
+
+    def __init__(self, seed, root):
+        self.root = root
+        self.remote = os.path.join(root, 'remote.git')
+        self.work = os.path.join(root, 'work')
+        if os.path.exists(root):
+            shutil.rmtree(root)
+        os.makedirs(root)
+        subprocess.run(['git', 'clone', '-q', '--bare', '--local', seed, self.remote], check=True)
+        subprocess.run(['git', 'clone', '-q', '--local', self.remote, self.work], check=True)
+        _git(self.work, 'config', 'user.name', 'Bench')
+        _git(self.work, 'config', 'user.email', 'bench@example.com')
+        _git(self.work, 'config', 'pull.rebase', 'false')
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# Mỗi workflow: (tên hàm, chuẩn bị fixture, kịch bản trả lời)
+# Hàm chuẩn bị nhận Fixture và số thứ tự lần chạy, trả về danh sách câu trả lời cho ScriptedIO.
+
+def _prepare_push(fx, n):
+    _touch(fx.work, _path(1), f"local change {n}\n")
+    return [('confirm', True), ('input', f"bench commit {n}"), ('confirm', True)]
+
+
+def _prepare_pull(fx, n):
+    _advance_remote(fx.remote, 'main', 'upstream.txt', f"upstream {n}\n")
+    _touch(fx.work, _path(2), f"work in progress {n}\n")
+    return [('confirm', True), ('confirm', True)]
+
+
+def _prepare_sync(fx, n):
+    _git(fx.work, 'checkout', '-q', '-b', 'topic')
+    _git(fx.work, 'branch', '-q', '--set-upstream-to', 'origin/main')
+    _advance_remote(fx.remote, 'main', 'upstream.txt', f"upstream {n}\n")
+    _touch(fx.work, _path(3), f"work in progress {n}\n")
+    return [('input', '')]
+
+
+def _prepare_new_feature(fx, n):
+    _advance_remote(fx.remote, 'main', 'upstream.txt', f"upstream {n}\n")
+    # Nhánh chính lấy từ origin/HEAD (clone đã tạo sẵn), chỉ còn hỏi tên nhánh mới
+    return [('input', f"feature/bench-{n}")]
+
+
+def _prepare_switch(fx, n):
+    _git(fx.work, 'branch', '-q', 'other', 'origin/feature')
+    return [('select', 'other')]
+
+
+WORKFLOWS = {
+    'push': ('workflow_push_code', _prepare_push),
+    'pull': ('workflow_pull_code', _prepare_pull),
+    'sync': ('workflow_sync_main', _prepare_sync),
+    'new_feature': ('workflow_new_feature', _prepare_new_feature),
+    'switch': ('workflow_switch_branch', _prepare_switch),
+}
+
+
+def run_workflow(seed, scratch, key, n):
+    """Chạy một workflow một lần, trả về dict thời gian, số lệnh git và lỗi (nếu có)"""
+    method, prepare = WORKFLOWS[key]
+    fx = Fixture(seed, os.path.join(scratch, f"{key}-{n}"))
+    try:
+        answers = prepare(fx, n)
+        io = ScriptedIO(answers)
+        scenarios = GitScenarios(io_handler=io, working_dir=fx.work)
+        tracer = Tracer()
+        scenarios.git.runner = TracingRunner(scenarios.git.runner, tracer)
+        start = time.perf_counter()
+        getattr(scenarios, method)()
+        wall = time.perf_counter() - start
+        problems = list(io.errors)
+        if io.remaining:
+            problems.append(f"Còn {io.remaining} câu trả lời chưa dùng")
+        return {
+            'wall': wall,
+            'git_calls': len(tracer.records),
+            'git_time': sum(r.duration for r in tracer.records),
+            'subcommands': {name: s['count'] for name, s in tracer.stats().items()},
+            'problems': problems,
+        }
+    finally:
+        fx.cleanup()
+
+
+def bench_size(seed, scratch, workflows, repeat):
+    results = {}
+    for key in workflows:
+        runs = [run_workflow(seed, scratch, key, n) for n in range(repeat)]
+        walls = [r['wall'] for r in runs]
+        results[key] = {
+            'median': statistics.median(walls),
+            'min': min(walls),
+            'git_calls': statistics.median(r['git_calls'] for r in runs),
+            'git_time': statistics.median(r['git_time'] for r in runs),
+            'subcommands': runs[-1]['subcommands'],
+            'problems': sorted({p for r in runs for p in r['problems']}),
+        }
+    return results
+
+
+def print_report(report):
+    for size, data in report['sizes'].items():
+        print(f"\n[{size}] {data['files']} file, {data['commits']} commit, {data['branches']} nhánh")
+        print(f"{'Workflow':<14}{'Thời gian':>12}{'min':>10}{'Lệnh git':>10}{'Trong git':>12}  Lệnh con")
+        for key, m in data['workflows'].items():
+            subs = ", ".join(f"{k}×{v}" for k, v in sorted(m['subcommands'].items(), key=lambda kv: -kv[1]))
+            print(f"{key:<14}{m['median'] * 1000:>10.1f}ms{m['min'] * 1000:>8.1f}ms"
+                  f"{m['git_calls']:>10g}{m['git_time'] * 1000:>10.1f}ms  {subs}")
+            for problem in m['problems']:
+                print(f"{'':<14}⚠ {problem}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end các workflow của GitScenarios")
+    parser.add_argument("--sizes", default="tiny",
+                        help=f"Các kích thước, cách nhau bởi dấu phẩy ({', '.join(PRESETS)})")
+    parser.add_argument("--workflows", default=",".join(WORKFLOWS),
+                        help=f"Các workflow cần đo ({', '.join(WORKFLOWS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi workflow (mặc định: 3)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "git_assistant_bench"),
+                        help="Thư mục chứa repo giả lập (được dùng lại giữa các lần chạy)")
+    parser.add_argument("--output", metavar="FILE", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    workflows = [w.strip() for w in args.workflows.split(',') if w.strip()]
+    unknown = [s for s in sizes if s not in PRESETS] + [w for w in workflows if w not in WORKFLOWS]
+    if unknown:
+        parser.error(f"Giá trị không hợp lệ: {', '.join(unknown)}")
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'git': '.'.join(str(p) for p in git_version()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'sizes': {},
+    }
+    scratch = os.path.join(args.workdir, 'workflows')
+    for size in sizes:
+        print(f"[{size}] chuẩn bị repo...")
+        seed = build_preset(args.workdir, size)
+        print(f"[{size}] đang chạy workflow...")
+        files, commits, branches = PRESETS[size]
+        report['sizes'][size] = {
+            'files': files, 'commits': commits, 'branches': branches,
+            'workflows': bench_size(seed, scratch, workflows, args.repeat),
+        }
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nĐã ghi kết quả vào {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Tạo repo git giả lập (offline) bằng `git fast-import` để đo hiệu năng.
+
+Repo được tạo gồm:
+- nhánh main với `commits` commit; commit đầu thêm `files` file, mỗi commit sau sửa một file
+- nhánh feature tách ra từ giữa lịch sử, thêm một commit riêng (để đo merge/checkout)
+- `branches` nhánh bench/NNNNN rải đều trên lịch sử
+- một bản stash và một file chưa commit (để status/stash_list có dữ liệu)
+"""
+import os
+import subprocess
+
+# Các kích thước có sẵn: tên -> (số file, số commit, số nhánh)
+PRESETS = {
+    'tiny': (1000, 10, 10),
+    'small': (10000, 100, 100),
+    'medium': (100000, 1000, 1000),
+    'large': (1000000, 100000, 20000),
+}
+
+FILES_PER_DIR = 1000
+_MARKER = '.bench-complete'
+
+
+def _git(repo, *args, **kwargs):
+    return subprocess.run(['git', '-C', repo] + list(args), check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+
+
+def _path(i):
+    return f"d{i // FILES_PER_DIR:04d}/f{i:07d}.txt"
+
+
+def _data(text):
+    raw = text.encode('utf-8')
+    return b"data %d\n%s\n" % (len(raw), raw)
+
+
+def _stream(files, commits, branches):
+    """Sinh dữ liệu fast-import theo từng đoạn (không giữ cả repo trong bộ nhớ)"""
+    when = 1700000000
+    ident = b"Bench <bench@example.com>"
+
+    def commit_header(ref, mark, message, parent=None):
+        nonlocal when
+        when += 60
+        head = b"commit %s\nmark :%d\ncommitter %s %d +0000\n" % (ref, mark, ident, when)
+        head += _data(message)
+        if parent:
+            head += b"from :%d\n" % parent
+        return head
+
+    # Commit đầu: thêm toàn bộ file
+    yield commit_header(b"refs/heads/main", 1, "initial")
+    chunk = []
+    for i in range(files):
+        chunk.append(b"M 100644 inline %s\n" % _path(i).encode() + _data(f"file {i}\n"))
+        if len(chunk) >= 1000:
+            yield b"".join(chunk)
+            chunk = []
+    yield b"".join(chunk) + b"\n"
+
+    # Mỗi commit sau sửa một file
+    for c in range(2, commits + 1):
+        idx = (c * 7919) % files
+        yield (commit_header(b"refs/heads/main", c, f"change {c}", parent=c - 1)
+               + b"M 100644 inline %s\n" % _path(idx).encode()
+               + _data(f"file {idx} version {c}\n") + b"\n")
+
+    # Nhánh feature: tách từ giữa lịch sử, thêm một file mới
+    base = max(1, commits // 2)
+    yield (commit_header(b"refs/heads/feature", commits + 1, "feature work", parent=base)
+           + b"M 100644 inline feature.txt\n" + _data("feature\n") + b"\n")
+
+    # Các nhánh phụ rải đều trên lịch sử main
+    for b in range(branches):
+        mark = 1 + (b * commits) // max(1, branches)
+        yield b"reset refs/heads/bench/%05d\nfrom :%d\n\n" % (b, mark)
+
+
+def build_repo(path, files, commits, branches, log=print):
+    """Tạo repo tại path (bỏ qua nếu đã tạo xong trước đó), trả về path"""
+    if os.path.exists(os.path.join(path, '.git', _MARKER)):
+        return path
+    os.makedirs(path, exist_ok=True)
+    _git(path, 'init', '-q', '-b', 'main')
+    _git(path, 'config', 'user.name', 'Bench')
+    _git(path, 'config', 'user.email', 'bench@example.com')
+    _git(path, 'config', 'gc.auto', '0')
+
+    log(f"  fast-import: {files} file, {commits} commit, {branches} nhánh -> {path}")
+    proc = subprocess.Popen(['git', '-C', path, 'fast-import', '--quiet', '--force'],
+                            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    try:
+        for piece in _stream(files, commits, branches):
+            proc.stdin.write(piece)
+    finally:
+        proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"git fast-import lỗi (exit {proc.returncode})")
+
+    # Dựng working tree + index từ main
+    _git(path, 'reset', '--hard', '-q', 'main')
+    _git(path, 'pack-refs', '--all')
+
+    # Một stash và một file chưa commit
+    with open(os.path.join(path, _path(0)), 'a', encoding='utf-8') as f:
+        f.write("stashed change\n")
+    _git(path, 'stash', 'push', '-q', '-m', 'bench stash')
+    with open(os.path.join(path, 'untracked.txt'), 'w', encoding='utf-8') as f:
+        f.write("untracked\n")
+
+    open(os.path.join(path, '.git', _MARKER), 'w').close()
+    return path
+
+
+def build_preset(root, name, log=print):
+    files, commits, branches = PRESETS[name]
+    return build_repo(os.path.join(root, name), files, commits, branches, log=log)
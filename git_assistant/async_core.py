@@ -0,0 +1,160 @@
+import asyncio
+
+from .core import GitCore
+from .status import parse_porcelain_v2
+from .results import GitResult, TimedOut, Cancelled, CancelToken, CommandTimeout, CommandCancelled
+
+# Số lệnh git tối đa chạy cùng lúc trên một AsyncGitCore
+DEFAULT_CONCURRENCY = 4
+
+
+class AsyncGitCore:
+    """Phiên bản asyncio của GitCore (cùng các hàm status, fetch, pull, push, stash...).
+
+    Không có đường chạy git thứ hai: mỗi thao tác gọi hàm cùng tên của GitCore (cùng lệnh, log,
+    cache; runner lo tracing, ghi transcript, kill cả cây process) trên thread của asyncio.to_thread,
+    nên có thể await nhiều lệnh cùng lúc mà không chặn loop.
+    - timeout: giới hạn thời gian mỗi lệnh (giây), mặc định theo GitCore.timeouts;
+      hết giờ thì kill process và trả về TimedOut
+    - hủy task (task.cancel()) cũng kill process git tương ứng
+    - max_concurrency: số process git chạy song song tối đa
+    """
+
+    def __init__(self, working_dir=None, io_handler=None, max_concurrency=DEFAULT_CONCURRENCY,
+                 timeout=None, core=None):
+        self.core = core if core else GitCore(working_dir=working_dir, io_handler=io_handler)
+        self.io = io_handler if io_handler else self.core.io
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._sem = None
+        self._sem_loop = None
+
+    @property
+    def working_dir(self):
+        return self.core.working_dir
+
+    def _semaphore(self):
+        # Semaphore gắn với event loop, tạo lại nếu chạy trong loop khác (VD nhiều lần asyncio.run)
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._sem_loop = loop
+        return self._sem
+
+    def _timeout(self, args, timeout):
+        if timeout is not None:
+            return timeout
+        return self.timeout if self.timeout is not None else self.core.timeout_for(args)
+
+    async def _in_thread(self, func):
+        """await func(token) chạy trên thread; task bị hủy thì hủy token và chờ lệnh git dừng hẳn"""
+        token = CancelToken()
+        async with self._semaphore():
+            future = asyncio.ensure_future(asyncio.to_thread(func, token))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Runner kill cả cây process khi thấy token bị hủy, đợi nó xong để không bỏ lại process
+                token.cancel()
+                try:
+                    await future
+                except Exception:
+                    pass
+                raise
+
+    async def run_raw(self, args, read_only=False, timeout=None):
+        """Chạy `git <args>`, trả về (returncode, stdout, stderr); hết giờ thì ném CommandTimeout"""
+        timeout = self._timeout(args, timeout)
+        try:
+            return await self._in_thread(lambda token: self.core.runner.run(
+                args, self.working_dir, read_only=read_only, timeout=timeout, cancel=token))
+        finally:
+            if not read_only:
+                cache = self.core.state_cache()
+                if cache:
+                    cache.invalidate()
+
+    async def run_command(self, args, show_output=True, read_only=False, timeout=None):
+        """Chạy lệnh git và trả về GitResult (success, output), TimedOut nếu hết giờ"""
+        # Đi qua GitCore.run_command: dọn index.lock, bỏ cache, đổi lỗi sang GitResult như bản đồng bộ
+        timeout = self._timeout(args, timeout)
+        return await self._in_thread(lambda token: self.core.run_command(
+            args, show_output=show_output, read_only=read_only, timeout=timeout, cancel=token))
+
+    async def gather(self, *coros):
+        """Chờ nhiều thao tác cùng lúc (vẫn giới hạn bởi max_concurrency)"""
+        return await asyncio.gather(*coros)
+
+    async def status(self):
+        return await self._core_call('status')
+
+    async def repo_status(self):
+        """RepoStatus; None nếu lỗi, TimedOut/Cancelled nếu lệnh status bị dừng"""
+        try:
+            code, stdout, _ = await self.run_raw(
+                ['status', '--porcelain=v2', '-z', '--branch', '--show-stash'], read_only=True)
+        except CommandTimeout as e:
+            return TimedOut(str(e), e.timeout)
+        except CommandCancelled as e:
+            return Cancelled(str(e))
+        except Exception:
+            return None
+        if code != 0:
+            return None
+        return parse_porcelain_v2(stdout)
+
+    async def has_changes(self):
+        return await self._core_call('has_changes')
+
+    async def _core_call(self, method, *args, **kwargs):
+        # GitCore riêng mang token của lần gọi này, để hủy task chỉ dừng đúng lệnh của nó
+        def call(token):
+            core = self.core.copy()
+            core.io = self.io
+            core.cancel_token = token
+            if self.timeout is not None:
+                core.timeouts = dict.fromkeys(core.timeouts, self.timeout)
+            return getattr(core, method)(*args, **kwargs)
+        return await self._in_thread(call)
+
+    # Các thao tác dưới đây gọi thẳng hàm cùng tên của GitCore (cùng lệnh git, log, cache)
+
+    async def fetch(self, on_progress=None):
+        """Fetch song song từng remote như GitCore.fetch (FetchEngine)"""
+        return await self._core_call('fetch', on_progress=on_progress)
+
+    async def pull(self, on_progress=None, ff_only=False):
+        return await self._core_call('pull', on_progress=on_progress, ff_only=ff_only)
+
+    async def push(self, branch=None, on_progress=None):
+        return await self._core_call('push', branch, on_progress=on_progress)
+
+    async def add_all(self):
+        return await self._core_call('add_all')
+
+    async def commit(self, message):
+        return await self._core_call('commit', message)
+
+    async def stash(self, message=None):
+        return await self._core_call('stash', message)
+
+    async def stash_pop(self):
+        return await self._core_call('stash_pop')
+
+    async def stash_list(self):
+        return await self._core_call('stash_list')
+
+    async def get_branches(self):
+        return await self._core_call('get_branches')
+
+    async def current_branch(self):
+        return await self._core_call('current_branch')
+
+    async def checkout(self, branch):
+        return await self._core_call('checkout', branch)
+
+    async def checkout_new(self, branch, start_point=None):
+        return await self._core_call('checkout_new', branch, start_point)
+
+    async def merge(self, branch):
+        return await self._core_call('merge', branch)
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+
+# File riêng của công cụ (trong thư mục .git chung) ghi thời điểm fetch song song gần nhất,
+# vì khi đó git không ghi FETCH_HEAD (--no-write-fetch-head)
+FETCH_STAMP = 'git-assistant-last-fetch'
+
+
+def _stat_sig(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def common_dir(git_dir):
+    """Thư mục chứa refs/packed-refs (khác git_dir khi dùng `git worktree`)"""
+    try:
+        with open(os.path.join(git_dir, 'commondir'), encoding='utf-8') as f:
+            rel = f.read().strip()
+    except OSError:
+        return git_dir
+    return os.path.normpath(os.path.join(git_dir, rel))
+
+
+class RepoStateCache:
+    """Cache trạng thái của một repo (HEAD, danh sách branch, status, stash...).
+
+    Mỗi giá trị được gắn với "chữ ký" stat của vài file/thư mục cố định trong .git
+    (xem signature()). Khi chữ ký đổi thì toàn bộ cache bị bỏ.
+    """
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self.common_dir = common_dir(git_dir)
+        self._entries = {}
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+        self._paths = (
+            os.path.join(git_dir, 'HEAD'),
+            os.path.join(git_dir, 'index'),
+            # commit/reset/merge trên nhánh hiện tại ghi thêm một dòng reflog của HEAD
+            os.path.join(git_dir, 'logs', 'HEAD'),
+            os.path.join(self.common_dir, 'packed-refs'),
+            # `stash drop` một bản cũ chỉ sửa reflog, refs/stash giữ nguyên
+            os.path.join(self.common_dir, 'logs', 'refs', 'stash'),
+            # fetch cập nhật refs/remotes/<remote>/... lồng nhiều cấp: dựa vào dấu vết của lần fetch
+            os.path.join(git_dir, 'FETCH_HEAD'),
+            os.path.join(self.common_dir, 'FETCH_HEAD'),
+            os.path.join(self.common_dir, FETCH_STAMP),
+            # Cập nhật ref = ghi file .lock rồi rename -> mtime của thư mục chứa nó đổi
+            os.path.join(self.common_dir, 'refs'),
+            os.path.join(self.common_dir, 'refs', 'tags'),
+            os.path.join(self.common_dir, 'refs', 'remotes'),
+        )
+        self._heads = os.path.join(self.common_dir, 'refs', 'heads')
+
+    def signature(self):
+        sig = [_stat_sig(path) for path in self._paths]
+        # Chỉ duyệt refs/heads (nhánh local, ít thư mục); không duyệt cả refs/ vì refs/remotes
+        # có thể có hàng nghìn thư mục con
+        for dirpath, dirnames, _ in os.walk(self._heads):
+            dirnames.sort()
+            sig.append((dirpath, _stat_sig(dirpath)))
+        return tuple(sig)
+
+    def get(self, key, compute, max_age=None):
+        """Lấy giá trị `key` từ cache, gọi compute() nếu chưa có hoặc đã cũ.
+
+        max_age (giây) dùng cho dữ liệu còn phụ thuộc file trong working tree (status),
+        vì sửa file không làm thay đổi gì trong .git. max_age=0: luôn tính lại (vẫn lưu kết quả).
+        """
+        sig = self.signature()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == sig and (max_age is None or now - entry[1] < max_age):
+                self._hits[key] = self._hits.get(key, 0) + 1
+                return entry[2]
+            self._misses[key] = self._misses.get(key, 0) + 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (sig, now, value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Số lần hit/miss tổng và theo từng loại dữ liệu"""
+        with self._lock:
+            keys = sorted(set(self._hits) | set(self._misses))
+            per_key = {k: {'hits': self._hits.get(k, 0), 'misses': self._misses.get(k, 0)} for k in keys}
+            return {
+                'hits': sum(self._hits.values()),
+                'misses': sum(self._misses.values()),
+                'keys': per_key,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_for(git_dir):
+    """Cache dùng chung cho mọi GitCore cùng trỏ vào một repo"""
+    key = os.path.normcase(os.path.abspath(git_dir))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = RepoStateCache(git_dir)
+        return _caches[key]
@@ -1,64 +1,476 @@
-import subprocess
 import os
+import re
+import time
+from .runner import default_runner, git_version, git_subcommand, NETWORK_COMMANDS
+from .status import parse_porcelain_v2
+from .cache import cache_for, common_dir, FETCH_STAMP
+from .refs import RefReader, UnsupportedRefStorage, find_git_dir
+from .progress import parse_progress
+from .results import GitResult, TimedOut, Cancelled, CommandTimeout, CommandCancelled
+from .fetch_engine import FetchEngine
+from .merge_check import MIN_GIT_VERSION as MERGE_TREE_VERSION, parse_merge_tree
+from .fuzzy import FuzzyIndex
+
+# Status còn phụ thuộc file trong working tree (sửa file không đổi gì trong .git), nên chỉ
+# phần hiển thị (panel trạng thái) dùng lại kết quả trong một khoảng ngắn; các bước kiểm tra
+# trước thao tác checkout/pull/stash luôn đọc lại
+STATUS_MAX_AGE = 1.0
+
+# Chỉ đọc phần cuối reflog của HEAD (byte) để tìm các nhánh vừa checkout
+REFLOG_TAIL = 256 * 1024
+RECENT_BRANCHES = 50
+
+_CHECKOUT_RE = re.compile(r'checkout: moving from (\S+) to (\S+)')
+# Các giá trị boolean "sai" mà git chấp nhận trong config
+_FALSE_VALUES = ('false', 'no', 'off', '0', '')
+
+# Dữ liệu remote cũ hơn mức này (giây) thì hộp chọn nhánh có thêm lựa chọn fetch lại (refresh_remote)
+FETCH_TTL = 300
+
+# Thời gian tối đa (giây) cho mỗi loại lệnh, None = không giới hạn.
+# Với lệnh mạng chạy dạng stream, đây là thời gian tối đa *không có output* (treo, chờ mật khẩu...)
+TIMEOUTS = {'network': 120, 'local': 600}
 
 class GitCore:
-    def __init__(self, working_dir=None, io_handler=None):
+    def __init__(self, working_dir=None, io_handler=None, runner=None, use_cache=True):
         self.working_dir = working_dir if working_dir else os.getcwd()
         self.io = io_handler
+        # Runner mặc định nhớ repo discovery theo thư mục; truyền SubprocessRunner() để dùng cách cũ
+        self.runner = runner if runner else default_runner()
+        self.use_cache = use_cache
+        self.fetch_ttl = FETCH_TTL
+        self.timeouts = dict(TIMEOUTS)
+        # CancelToken của thao tác đang chạy (GUI gán token mới cho mỗi lần bấm nút)
+        self.cancel_token = None
+        # Kết quả từng remote của lần fetch() gần nhất (list RemoteFetchResult)
+        self.last_fetch_results = []
+        self._git_dirs = {}
+        self._ref_readers = {}
         
+    def copy(self, working_dir=None):
+        """GitCore mới dùng chung runner, IO và cấu hình (timeout, TTL, cache), không có cancel token"""
+        other = GitCore(working_dir=working_dir or self.working_dir, io_handler=self.io,
+                        runner=self.runner, use_cache=self.use_cache)
+        other.fetch_ttl = self.fetch_ttl
+        other.timeouts = dict(self.timeouts)
+        return other
+
     def _log(self, msg):
         if self.io:
             self.io.log(f"ℹ {msg}")
 
-    def run_command(self, args, show_output=True):
-        """Chạy lệnh git và trả về (success, output)"""
-        try:
-            full_cmd = ['git'] + args
-            
-            # Run command
-            # Trên Windows, nếu không set encoding='utf-8', output có thể bị lỗi font
-            # Tuy nhiên, một số git client cũ có thể dùng encoding khác, nên ta handle exception
+    @property
+    def direct_reads(self):
+        """Có được đọc thẳng .git (HEAD, refs, mtime) thay vì hỏi git không.
+        Runner ghi/phát lại transcript tắt tính năng này để mọi thông tin đều đi qua runner."""
+        return getattr(self.runner, 'direct_reads', True)
+
+    def git_dir(self):
+        """Đường dẫn tuyệt đối tới thư mục .git của working_dir, None nếu không phải repo"""
+        if self.working_dir in self._git_dirs:
+            return self._git_dirs[self.working_dir]
+        # Thử tìm .git bằng Python trước, không cần chạy process
+        git_dir = find_git_dir(self.working_dir) if self.direct_reads else None
+        if git_dir and not os.path.isfile(os.path.join(git_dir, 'HEAD')):
+            git_dir = None
+        info = None
+        if not git_dir and self.direct_reads and hasattr(self.runner, 'repo_info'):
+            info = self.runner.repo_info(self.working_dir)
+        if info:
+            git_dir = info.git_dir
+        elif not git_dir:
+            ok, out = self.run_command(['rev-parse', '--absolute-git-dir'], show_output=False, read_only=True)
+            if ok and out:
+                git_dir = out
+        if git_dir:
+            self._git_dirs[self.working_dir] = git_dir
+        return git_dir
+
+    def ref_reader(self):
+        """RefReader đọc ref trực tiếp từ .git, None nếu repo dùng định dạng chưa hỗ trợ"""
+        if not self.direct_reads:
+            return None
+        git_dir = self.git_dir()
+        if not git_dir:
+            return None
+        if git_dir not in self._ref_readers:
             try:
-                result = subprocess.run(
-                    full_cmd, 
-                    cwd=self.working_dir, 
-                    text=True, 
-                    capture_output=True,
-                    encoding='utf-8'
-                )
-            except UnicodeDecodeError:
-                # Fallback nếu utf-8 lỗi (ví dụ git trả về cp1252)
-                result = subprocess.run(
-                    full_cmd, 
-                    cwd=self.working_dir, 
-                    text=True, 
-                    capture_output=True
-                )
-
-            if result.returncode == 0:
-                return True, result.stdout.strip()
-            else:
-                return False, result.stderr.strip()
+                self._ref_readers[git_dir] = RefReader(git_dir)
+            except UnsupportedRefStorage:
+                self._ref_readers[git_dir] = None
+        return self._ref_readers[git_dir]
+
+    def state_cache(self):
+        """RepoStateCache của repo hiện tại (None nếu tắt cache hoặc không phải repo)"""
+        if not self.use_cache or not self.direct_reads:
+            return None
+        git_dir = self.git_dir()
+        return cache_for(git_dir) if git_dir else None
+
+    def cache_stats(self):
+        """Số lần hit/miss của cache trạng thái repo"""
+        cache = self.state_cache()
+        return cache.stats() if cache else {'hits': 0, 'misses': 0, 'keys': {}}
+
+    def _cached(self, key, compute, max_age=None):
+        cache = self.state_cache()
+        if cache is None:
+            return compute()
+        return cache.get(key, compute, max_age=max_age)
+
+    def timeout_for(self, args):
+        """Timeout mặc định cho lệnh theo chính sách mạng/local"""
+        kind = 'network' if git_subcommand(args) in NETWORK_COMMANDS else 'local'
+        return self.timeouts.get(kind)
+
+    def _index_lock(self):
+        git_dir = self.git_dir()
+        return os.path.join(git_dir, 'index.lock') if git_dir else None
+
+    def _cleanup_index_lock(self, lock_path, existed_before):
+        # Git bị kill giữa chừng sẽ để lại index.lock và chặn mọi lệnh sau đó.
+        # Chỉ xóa khi file lock xuất hiện trong lúc chạy lệnh của mình.
+        if not lock_path or existed_before or not os.path.exists(lock_path):
+            return
+        try:
+            os.remove(lock_path)
+            self._log("Đã dọn file index.lock còn sót lại sau khi dừng lệnh.")
+        except OSError:
+            pass
+
+    def _execute(self, args, read_only, timeout, cancel, call):
+        """Bọc việc gọi runner: áp timeout/cancel, đổi lỗi sang GitResult, dọn index.lock, bỏ cache"""
+        token = cancel if cancel is not None else self.cancel_token
+        if timeout is None:
+            timeout = self.timeout_for(args)
+        lock_path = None if read_only or not self.direct_reads else self._index_lock()
+        lock_existed = bool(lock_path) and os.path.exists(lock_path)
+        try:
+            result = call(timeout, token)
+            if not result.success and 'terminal prompts disabled' in result.output:
+                self._log("Git cần đăng nhập nhưng chế độ này không hỏi mật khẩu trên terminal. "
+                          "Hãy cấu hình credential helper (HTTPS) hoặc ssh-agent, hoặc chạy với --cli.")
+            return result
+        except CommandTimeout as e:
+            self._cleanup_index_lock(lock_path, lock_existed)
+            return TimedOut(str(e), e.timeout)
+        except CommandCancelled as e:
+            self._cleanup_index_lock(lock_path, lock_existed)
+            return Cancelled(str(e))
         except Exception as e:
-            return False, str(e)
+            return GitResult(False, str(e))
+        finally:
+            if not read_only:
+                # Đề phòng hệ thống file có mtime thô (vài ms), bỏ cache sau mỗi lệnh ghi
+                cache = self.state_cache()
+                if cache:
+                    cache.invalidate()
+
+    def run_command(self, args, show_output=True, read_only=False, timeout=None, cancel=None):
+        """Chạy lệnh git và trả về GitResult (success, output).
+
+        Hết giờ trả về TimedOut, bị hủy trả về Cancelled (đều có success=False).
+        """
+        def call(timeout, token):
+            code, stdout, stderr = self.runner.run(
+                args, self.working_dir, read_only=read_only, timeout=timeout, cancel=token)
+            if code == 0:
+                return GitResult(True, stdout.strip())
+            return GitResult(False, stderr.strip())
+        return self._execute(args, read_only, timeout, cancel, call)
+
+    def stream_command(self, args, on_progress=None, on_line=None, read_only=False, timeout=None, cancel=None):
+        """Chạy lệnh git dài (fetch, pull, push...) và xử lý output ngay khi có.
+
+        on_progress(ProgressEvent): gọi cho mỗi dòng tiến độ (Receiving objects, Resolving deltas...)
+        on_line(stream, line): gọi cho các dòng output còn lại
+        Trả về GitResult như run_command; dòng tiến độ không được giữ lại trong output.
+        """
+        def call(timeout, token):
+            out_lines, err_lines = [], []
+            code = None
+            for name, line in self.runner.stream(args, self.working_dir, read_only=read_only,
+                                                 timeout=timeout, cancel=token):
+                if name == 'exit':
+                    code = line
+                    continue
+                line = line.rstrip()
+                if name == 'stderr':
+                    event = parse_progress(line)
+                    if event:
+                        if on_progress:
+                            on_progress(event)
+                        continue
+                    err_lines.append(line)
+                else:
+                    out_lines.append(line)
+                if on_line:
+                    on_line(name, line)
+
+            if code == 0:
+                # git in phần lớn thông tin của fetch/pull/push ra stderr
+                return GitResult(True, '\n'.join(out_lines + err_lines).strip())
+            return GitResult(False, '\n'.join(err_lines or out_lines).strip())
+        return self._execute(args, read_only, timeout, cancel, call)
+
+    def worktrees(self, root=None):
+        """WorktreeManager của repo (root: thư mục chứa worktree, mặc định <repo>.worktrees)"""
+        from .worktrees import WorktreeManager
+        return WorktreeManager(self, root)
+
+    def aio(self, **kwargs):
+        """AsyncGitCore dùng chung cấu hình/cache với GitCore này"""
+        from .async_core import AsyncGitCore
+        return AsyncGitCore(core=self, **kwargs)
+
+    def rev_parse(self, rev):
+        """Lấy SHA của một revision, None nếu không có"""
+        try:
+            return self.runner.resolve(self.working_dir, rev)
+        except Exception:
+            return None
 
     def status(self):
-        return self.run_command(['status'], show_output=False)
+        """Trạng thái repo dạng chữ để hiển thị (RepoStatus.format()), không chạy `git status` dạng người đọc"""
+        st = self.repo_status()
+        if st is not None:
+            return GitResult(True, st.format())
+        return GitResult(False, self.repo_error() or "Không đọc được trạng thái repo.")
 
-    def fetch(self):
+    def repo_error(self):
+        """Lỗi git báo cho working_dir (VD "not a git repository"), '' nếu không có lỗi"""
+        ok, out = self.run_command(['rev-parse', '--git-dir'], show_output=False, read_only=True)
+        return '' if ok else out
+
+    def repo_status(self, max_age=0):
+        """Trạng thái có cấu trúc (RepoStatus) từ porcelain v2, None nếu lỗi.
+
+        max_age: chấp nhận kết quả đọc trong vòng max_age giây (chỉ để hiển thị, VD STATUS_MAX_AGE);
+        mặc định luôn đọc lại.
+        """
+        return self._cached('status', self._read_status, max_age=max_age)
+
+    def _read_status(self):
+        # Parse từng record ngay khi git in ra, không giữ cả output trong bộ nhớ
+        exit_code = []
+
+        def records():
+            for name, record in self.runner.stream(
+                    ['status', '--porcelain=v2', '-z', '--branch', '--show-stash'],
+                    self.working_dir, read_only=True, sep=b'\0'):
+                if name == 'stdout':
+                    yield record + '\0'
+                elif name == 'exit':
+                    exit_code.append(record)
+        try:
+            status = parse_porcelain_v2(records())
+        except Exception:
+            return None
+        return status if exit_code == [0] else None
+
+    def is_dirty(self, untracked=True, max_age=0):
+        """Kiểm tra nhanh có thay đổi hay không mà không cần liệt kê file (max_age như repo_status).
+        Không đọc được (lỗi, hết giờ, bị hủy) thì coi như có thay đổi."""
+        key = 'dirty' if untracked else 'dirty_tracked'
+        return self._cached(key, lambda: self._check_dirty(untracked), max_age=max_age)
+
+    def _check_dirty(self, untracked):
+        # Chỉ dựa vào exit code: làm mới stat trong index trước (file chỉ bị "touch" không tính là
+        # thay đổi), rồi diff-index --quiet dừng ngay ở khác biệt đầu tiên
+        self._exit_code(['update-index', '-q', '--refresh'])
+        code = self._exit_code(['diff-index', '--quiet', 'HEAD', '--'])
+        if code == 128 and not self._has_output(['ls-files', '--cached']):
+            # Nhánh chưa có commit nào (không có HEAD): index rỗng thì chưa có thay đổi đã add
+            code = 0
+        if code != 0:
+            return True
+        return untracked and self._has_output(['ls-files', '--others', '--exclude-standard',
+                                               '--directory', '--no-empty-directory'])
+
+    def _exit_code(self, args):
+        """Exit code của lệnh git chỉ đọc, None nếu không chạy được (lỗi, hết giờ, bị hủy)"""
+        def call(timeout, token):
+            code, _, _ = self.runner.run(args, self.working_dir, read_only=True, timeout=timeout, cancel=token)
+            return GitResult(True, code)
+        result = self._execute(args, True, None, None, call)
+        return result.output if result.success else None
+
+    def _has_output(self, args):
+        """True nếu lệnh in ra ít nhất một dòng; dừng lệnh ngay ở dòng đầu tiên.
+        Không chạy được thì trả về True (coi như có thay đổi)"""
+        def call(timeout, token):
+            lines = self.runner.stream(args, self.working_dir, read_only=True, timeout=timeout, cancel=token)
+            try:
+                for name, value in lines:
+                    if name == 'stdout':
+                        return GitResult(True, True)
+                    if name == 'exit':
+                        return GitResult(value == 0, False if value == 0 else f"exit {value}")
+            finally:
+                # Đóng generator: runner kill process còn đang in tiếp
+                lines.close()
+            return GitResult(False, '')
+        result = self._execute(args, True, None, None, call)
+        return result.output if result.success else True
+
+    def fetch(self, on_progress=None, parallel=True):
+        """Fetch tất cả remote. parallel=True: mỗi remote một process, chạy song song"""
         self._log("Đang lấy dữ liệu mới từ remote (fetch)...")
-        return self.run_command(['fetch', '--all'])
+        if not parallel:
+            return self._network_command(['fetch', '--all'], on_progress)
+
+        engine = FetchEngine(self)
+        results = engine.fetch_all(on_progress=on_progress)
+        self.last_fetch_results = results
+        if len(results) > 1:
+            for r in results:
+                self._log(r.format())
+        if any(r.cancelled for r in results):
+            return Cancelled()
+        if results and all(r.timed_out for r in results):
+            return TimedOut('\n'.join(r.output for r in results))
+        ok = all(r.ok for r in results)
+        if ok:
+            return GitResult(True, '\n'.join(r.output for r in results if r.output))
+        return GitResult(False, '\n'.join(r.format() for r in results if not r.ok))
 
-    def pull(self):
+    def pull(self, on_progress=None, ff_only=False):
+        """ff_only=True: chỉ fast-forward (`pull --ff-only --no-rebase`), không tạo merge commit/rebase"""
         self._log("Đang kéo code mới về (pull)...")
-        return self.run_command(['pull'])
+        cmd = ['pull', '--ff-only', '--no-rebase'] if ff_only else ['pull']
+        return self._network_command(cmd, on_progress)
 
-    def push(self, branch=None):
+    def push(self, branch=None, on_progress=None):
         cmd = ['push']
         if branch:
             cmd.extend(['origin', branch])
         self._log(f"Đang đẩy code lên (push) {branch if branch else ''}...")
-        return self.run_command(cmd)
+        return self._network_command(cmd, on_progress)
+
+    def branch_upstream(self, branch):
+        """(remote, nhánh trên remote) mà branch theo dõi; chưa cấu hình thì ('origin', branch)"""
+        remote, merge = 'origin', branch
+        ok, out = self.run_command(
+            ['config', '--get-regexp', r'^branch\.' + re.escape(branch) + r'\.(remote|merge)$'],
+            show_output=False, read_only=True)
+        if ok:
+            for line in out.splitlines():
+                key, _, value = line.partition(' ')
+                if key.endswith('.remote') and value and value != '.':
+                    remote = value
+                elif key.endswith('.merge') and value.startswith('refs/heads/'):
+                    merge = value[len('refs/heads/'):]
+        return remote, merge
+
+    def fetch_branch(self, branch, on_progress=None):
+        """Cập nhật nhánh local branch từ remote mà không cần checkout (`fetch origin main:main`).
+
+        Chỉ fast-forward: nhánh local có commit chưa đẩy lên thì git từ chối và trả về lỗi.
+        """
+        remote, remote_branch = self.branch_upstream(branch)
+        self._log(f"Đang cập nhật {branch} từ {remote}/{remote_branch} (không checkout)...")
+        return self._network_command(['fetch', remote, f'{remote_branch}:{branch}'], on_progress)
+
+    def incoming_files(self, upstream='@{u}'):
+        """File thay đổi trên upstream kể từ điểm rẽ nhánh với HEAD: list (thêm, bớt, đường dẫn).
+
+        Dòng thêm/bớt là None với file nhị phân. None nếu lỗi (VD chưa có upstream).
+        """
+        ok, out = self.run_command(['diff', '--numstat', '-z', '--no-renames', f'HEAD...{upstream}'],
+                                   show_output=False, read_only=True)
+        if not ok:
+            return None
+        files = []
+        for record in out.split('\0'):
+            added, _, rest = record.partition('\t')
+            deleted, _, path = rest.partition('\t')
+            if path:
+                files.append((int(added) if added.isdigit() else None,
+                              int(deleted) if deleted.isdigit() else None, path))
+        return files
+
+    def pull_config(self):
+        """Cấu hình pull của nhánh hiện tại: (rebase, ff).
+        rebase: None nếu chưa cấu hình, False nếu merge, ngược lại 'true', 'merges' hoặc 'interactive'
+        (branch.<tên>.rebase được ưu tiên hơn pull.rebase).
+        ff: None nếu chưa cấu hình, ngược lại 'only', 'true' hoặc 'false' (pull.ff)."""
+        branch = self.current_branch()
+        pattern = r'^pull\.(rebase|ff)$'
+        if branch:
+            pattern = r'^(pull\.(rebase|ff)|branch\.' + re.escape(branch) + r'\.rebase)$'
+        ok, out = self.run_command(['config', '--get-regexp', pattern], show_output=False, read_only=True)
+        values = {}
+        for line in out.splitlines() if ok else []:
+            key, _, value = line.partition(' ')
+            values[key.lower()] = value.strip().lower()
+        rebase = values.get(f'branch.{branch}.rebase'.lower(), values.get('pull.rebase'))
+        ff = values.get('pull.ff')
+        if ff is not None:
+            ff = 'only' if ff == 'only' else ('false' if ff in _FALSE_VALUES else 'true')
+        if rebase is None:
+            return None, ff
+        if rebase in _FALSE_VALUES:
+            return False, ff
+        if rebase in ('merges', 'm', 'preserve', 'p'):
+            # preserve đã bị git bỏ (2.34), merges là cách thay thế
+            return 'merges', ff
+        if rebase in ('interactive', 'i'):
+            return 'interactive', ff
+        return 'true', ff
+
+    def merge_upstream(self, config=None):
+        """Đưa commit đã fetch của upstream vào nhánh hiện tại (bước thứ hai của pull, không cần mạng).
+        config: (rebase, ff) như pull_config(), None thì đọc từ cấu hình. Làm giống `git pull`:
+        pull.ff=only chỉ fast-forward, chưa cấu hình gì thì từ chối khi nhánh đã tách khỏi upstream."""
+        rebase, ff = self.pull_config() if config is None else config
+        if rebase == 'interactive' and ff != 'only':
+            # Rebase interactive cần mở trình soạn thảo, không chạy được khi output bị bắt lại
+            return GitResult(False, "pull.rebase=interactive: hãy chạy `git rebase -i @{u}` trong terminal.")
+        if rebase and ff != 'only':
+            # Không truyền @{u}: git rebase tự lấy upstream và dùng --fork-point như `git pull --rebase`
+            if rebase == 'merges':
+                self._log("Đang rebase lên upstream (@{u}), giữ nguyên các merge commit...")
+                return self.run_command(['rebase', '--rebase-merges'])
+            self._log("Đang rebase lên upstream (@{u})...")
+            return self.run_command(['rebase'])
+        if rebase is None and ff is None or ff == 'only':
+            self._log("Đang fast-forward lên upstream (@{u})...")
+            ok, out = self.run_command(['merge', '--ff-only', '@{u}'])
+            if not ok and rebase is None and ff is None:
+                out = ("Nhánh đã tách khỏi upstream, cần chọn merge hoặc rebase "
+                       "(git config pull.rebase false|true).\n" + out)
+            return GitResult(ok, out)
+        self._log("Đang merge upstream (@{u}) vào nhánh hiện tại...")
+        # Không có pull.ff thì để git merge tự đọc merge.ff
+        flags = {'false': ['--no-ff'], 'true': ['--ff']}.get(ff, [])
+        return self.run_command(['merge'] + flags + ['@{u}'])
+
+    def fetch_ref(self, remote, branch, on_progress=None):
+        """Chỉ fetch một nhánh của remote (cập nhật <remote>/<branch>), không đụng nhánh local"""
+        self._log(f"Đang lấy {remote}/{branch} mới nhất...")
+        return self._network_command(['fetch', remote, branch], on_progress)
+
+    def default_branch(self, remote='origin'):
+        """Nhánh mặc định của remote theo refs/remotes/<remote>/HEAD, None nếu chưa có"""
+        ref = f'refs/remotes/{remote}/HEAD'
+        prefix = f'refs/remotes/{remote}/'
+        reader = self.ref_reader()
+        if reader:
+            try:
+                target = reader.symbolic_target(ref)
+                return target[len(prefix):] if target and target.startswith(prefix) else None
+            except (UnsupportedRefStorage, OSError):
+                pass
+        ok, out = self.run_command(['symbolic-ref', '--quiet', ref], show_output=False, read_only=True)
+        if ok and out.startswith(prefix):
+            return out[len(prefix):]
+        return None
+
+    def _network_command(self, args, on_progress):
+        # Có người nhận tiến độ thì chạy dạng stream với --progress, không thì chạy như cũ
+        if on_progress is None:
+            return self.run_command(args)
+        return self.stream_command(args[:1] + ['--progress'] + args[1:], on_progress=on_progress)
 
     def add_all(self):
         self._log("Đang thêm tất cả thay đổi (git add .)...")
@@ -80,44 +492,169 @@ class GitCore:
         return self.run_command(['stash', 'pop'])
     
     def stash_list(self):
-        return self.run_command(['stash', 'list'])
+        return self._cached('stash', lambda: self.run_command(['stash', 'list'], read_only=True))
 
     def get_branches(self):
-        """Lấy danh sách tất cả các branch local và remote"""
-        # Fetch trước để cập nhật danh sách remote
-        self.run_command(['fetch', '--all'], show_output=False)
-        
-        # Lấy danh sách branch
-        success, output = self.run_command(['branch', '-a'], show_output=False)
+        """Lấy danh sách các branch local (không cần mạng, xem refresh_remote() để fetch)"""
+        return list(self._cached('branches', self._list_branches))
+
+    def _list_branches(self):
+        reader = self.ref_reader()
+        if reader:
+            try:
+                return reader.local_branches()
+            except (UnsupportedRefStorage, OSError):
+                pass
+        # Fallback: một lệnh for-each-ref duy nhất, chỉ đọc refs/heads (remote branch nên checkout -b)
+        success, output = self.run_command(
+            ['for-each-ref', '--format=%(refname:lstrip=2)', 'refs/heads/'],
+            show_output=False, read_only=True)
         if not success:
             return []
-            
-        branches = []
-        for line in output.split('\n'):
-            line = line.strip()
-            if not line: continue
-            
-            # Bỏ qua con trỏ HEAD detached
-            if "HEAD detached" in line: continue
-            
-            # Xóa dấu * và khoảng trắng (đánh dấu branch hiện tại)
-            clean_name = line.replace('*', '').strip()
-            
-            # Xử lý remote branch (remotes/origin/main -> main)
-            # Tuy nhiên, để checkout, ta nên giữ nguyên tên nếu nó là local, 
-            # hoặc chỉ lấy phần tên sau remotes/origin nếu muốn checkout tracking.
-            # Đơn giản nhất: Lấy list local branches. Nếu muốn remote, user nên checkout -b.
-            # Nhưng để switch, ta ưu tiên list local trước.
-            
-            if clean_name.startswith('remotes/'):
-                continue # Tạm thời chỉ list local branches để switch cho đơn giản
-            
-            branches.append(clean_name)
-            
-        return sorted(list(set(branches)))
+        return sorted(set(line.strip() for line in output.split('\n') if line.strip()))
+
+    def remote_branches(self):
+        """Nhánh chỉ có trên remote (chưa có nhánh local cùng tên), dạng 'origin/feature-x'.
+        Đọc refs/remotes có sẵn (không fetch), bỏ qua <remote>/HEAD"""
+        return list(self._cached('remote_branches', self._list_remote_branches))
+
+    def _list_remote_branches(self):
+        names = None
+        reader = self.ref_reader()
+        if reader:
+            try:
+                names = [name[len('refs/remotes/'):] for name in reader.list_refs('refs/remotes/')]
+            except (UnsupportedRefStorage, OSError):
+                names = None
+        if names is None:
+            success, output = self.run_command(
+                ['for-each-ref', '--format=%(refname:lstrip=2)', 'refs/remotes/'],
+                show_output=False, read_only=True)
+            names = [line.strip() for line in output.split('\n') if line.strip()] if success else []
+        local = set(self.get_branches())
+        return sorted(name for name in names
+                      if not name.endswith('/HEAD') and name.partition('/')[2] not in local)
+
+    def branch_dates(self, remote=False):
+        """dict nhánh -> thời điểm commit (unix) của commit đầu nhánh, một lệnh for-each-ref.
+        remote=True: thêm các nhánh remote ('origin/x')"""
+        if remote:
+            return self._cached('remote_branch_dates', lambda: self._read_branch_dates('refs/heads/', 'refs/remotes/'))
+        return self._cached('branch_dates', self._read_branch_dates)
+
+    def _read_branch_dates(self, *prefixes):
+        success, output = self.run_command(
+            ['for-each-ref', '--format=%(refname:lstrip=2)%09%(committerdate:unix)'] + list(prefixes or ['refs/heads/']),
+            show_output=False, read_only=True)
+        dates = {}
+        if success:
+            for line in output.split('\n'):
+                name, _, stamp = line.strip().partition('\t')
+                if name:
+                    dates[name] = int(stamp) if stamp.isdigit() else 0
+        return dates
+
+    def recent_branches(self):
+        """Tối đa RECENT_BRANCHES nhánh vừa checkout (mới nhất trước), đọc từ reflog của HEAD"""
+        return self._cached('recent_branches', self._read_recent_branches)
+
+    def _read_recent_branches(self):
+        git_dir = self.git_dir() if self.direct_reads else None
+        lines = None
+        if git_dir:
+            try:
+                with open(os.path.join(git_dir, 'logs', 'HEAD'), 'rb') as f:
+                    f.seek(0, os.SEEK_END)
+                    f.seek(max(0, f.tell() - REFLOG_TAIL))
+                    lines = f.read().decode('utf-8', 'replace').splitlines()
+            except OSError:
+                lines = None
+        if lines is None:
+            success, output = self.run_command(
+                ['reflog', 'show', '--format=%gs', '-n', '1000', 'HEAD'], show_output=False, read_only=True)
+            # reflog show in mới nhất trước, file logs/HEAD thì mới nhất ở cuối
+            lines = list(reversed(output.split('\n'))) if success else []
+        recent = []
+        for line in reversed(lines):
+            match = _CHECKOUT_RE.search(line)
+            if not match:
+                continue
+            for name in (match.group(2), match.group(1)):
+                if name not in recent:
+                    recent.append(name)
+            if len(recent) >= RECENT_BRANCHES:
+                break
+        return recent
+
+    def branch_index(self, exclude=(), pinned=(), remote=False):
+        """FuzzyIndex các nhánh local: vừa dùng gần đây trước, rồi commit mới nhất trước.
+
+        pinned: các lựa chọn thêm luôn đứng đầu danh sách (VD hành động "fetch lại").
+        remote=True: thêm nhánh chỉ có trên remote (remote_branches()).
+        """
+        branches = [b for b in self.get_branches() if b not in exclude]
+        if remote:
+            branches += self.remote_branches()
+        return FuzzyIndex(list(pinned) + branches, dates=self.branch_dates(remote=remote),
+                          recent=list(pinned) + self.recent_branches())
+
+    def remote_data_age(self):
+        """Số giây kể từ lần fetch gần nhất, None nếu chưa fetch bao giờ.
+
+        Lấy mới nhất giữa mtime của FETCH_HEAD (git ghi khi fetch một remote, pull) và FETCH_STAMP
+        (công cụ ghi sau khi fetch song song nhiều remote).
+        """
+        git_dir = self.git_dir() if self.direct_reads else None
+        if not git_dir:
+            return None
+        shared = common_dir(git_dir)
+        paths = (os.path.join(git_dir, 'FETCH_HEAD'), os.path.join(shared, 'FETCH_HEAD'),
+                 os.path.join(shared, FETCH_STAMP))
+        newest = None
+        for path in paths:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            newest = mtime if newest is None else max(newest, mtime)
+        return None if newest is None else max(0.0, time.time() - newest)
+
+    def mark_fetched(self):
+        """Ghi thời điểm fetch vào FETCH_STAMP (không đụng tới FETCH_HEAD của git)"""
+        git_dir = self.git_dir() if self.direct_reads else None
+        if not git_dir:
+            return
+        try:
+            with open(os.path.join(common_dir(git_dir), FETCH_STAMP), 'w', encoding='utf-8') as f:
+                f.write(f"{time.time():.0f}\n")
+        except OSError:
+            pass
+
+    def remote_stale(self, max_age=None):
+        """True nếu chưa fetch bao giờ hoặc dữ liệu remote cũ hơn max_age giây (mặc định self.fetch_ttl)"""
+        ttl = self.fetch_ttl if max_age is None else max_age
+        age = self.remote_data_age()
+        return age is None or age > ttl
+
+    def refresh_remote(self, max_age=None, on_progress=None):
+        """Fetch nếu dữ liệu remote đã cũ hơn max_age giây.
+        Trả về GitResult của fetch, None nếu dữ liệu còn mới (không fetch)"""
+        if not self.remote_stale(max_age):
+            return None
+        return self.fetch(on_progress=on_progress)
 
     def current_branch(self):
-        success, output = self.run_command(['rev-parse', '--abbrev-ref', 'HEAD'], show_output=False)
+        # Đọc thẳng .git/HEAD còn nhanh hơn kiểm tra chữ ký của cache
+        reader = self.ref_reader()
+        if reader:
+            try:
+                return reader.current_branch()
+            except (UnsupportedRefStorage, OSError):
+                pass
+        return self._cached('head', self._read_head)
+
+    def _read_head(self):
+        success, output = self.run_command(['rev-parse', '--abbrev-ref', 'HEAD'], show_output=False, read_only=True)
         if success:
             return output
         return None
@@ -126,15 +663,55 @@ class GitCore:
         self._log(f"Đang chuyển sang nhánh {branch}...")
         return self.run_command(['checkout', branch])
 
-    def checkout_new(self, branch):
+    def checkout_track(self, remote_branch):
+        """Tạo nhánh local theo dõi remote_branch (VD origin/feature-x -> feature-x) và chuyển sang"""
+        self._log(f"Đang tạo nhánh local theo dõi {remote_branch}...")
+        return self.run_command(['checkout', '--track', remote_branch])
+
+    def checkout_new(self, branch, start_point=None):
+        """Tạo nhánh mới (từ start_point nếu có, không đặt upstream) và chuyển sang nhánh đó"""
         self._log(f"Đang tạo và chuyển sang nhánh mới {branch}...")
-        return self.run_command(['checkout', '-b', branch])
+        cmd = ['checkout', '-b', branch]
+        if start_point:
+            cmd.extend(['--no-track', start_point])
+        return self.run_command(cmd)
         
     def merge(self, branch):
         self._log(f"Đang merge nhánh {branch} vào hiện tại...")
         return self.run_command(['merge', branch])
 
+    def predict_merge(self, branch, into='HEAD'):
+        """Merge thử branch vào into trong bộ nhớ (merge-tree), trả về MergePrediction.
+
+        Không đụng tới working tree/index. None nếu git quá cũ (< 2.38) hoặc revision không tồn tại.
+        """
+        if git_version() < MERGE_TREE_VERSION:
+            return None
+        try:
+            code, stdout, _ = self.runner.run(
+                ['merge-tree', '--write-tree', '--name-only', '--no-messages', '-z', into, branch],
+                self.working_dir, read_only=True)
+        except Exception:
+            return None
+        # 0 = merge sạch, 1 = có xung đột (lỗi cũng trả về 1 nhưng không có tree trong output)
+        if code not in (0, 1):
+            return None
+        label = (self.current_branch() or into) if into == 'HEAD' else into
+        return parse_merge_tree(stdout, label, branch)
+
+    def is_ancestor(self, ancestor, rev='HEAD'):
+        """True nếu ancestor đã nằm trong lịch sử của rev (merge sẽ không thay đổi gì)"""
+        try:
+            code, _, _ = self.runner.run(['merge-base', '--is-ancestor', ancestor, rev],
+                                         self.working_dir, read_only=True)
+        except Exception:
+            return False
+        return code == 0
+
+    def rebase(self, branch):
+        self._log(f"Đang rebase nhánh hiện tại lên {branch}...")
+        return self.run_command(['rebase', branch])
+
     def has_changes(self):
-        success, output = self.status()
-        if not success: return False
-        return "nothing to commit, working tree clean" not in output
+        # Chặn trước checkout/pull/sync: luôn đọc lại, không dùng kết quả cũ trong cache
+        return self.is_dirty(max_age=0)
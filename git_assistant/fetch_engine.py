@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .progress import format_bytes
+from .runner import git_version, new_parallel_group, parallel_group
+
+# Số remote fetch cùng lúc
+DEFAULT_PARALLEL = 4
+
+
+class RemoteFetchResult:
+    """Kết quả fetch một remote"""
+
+    def __init__(self, remote):
+        self.remote = remote
+        self.ok = False
+        self.duration = 0.0
+        self.bytes_received = 0
+        self.output = ''
+        self.timed_out = False
+        self.cancelled = False
+
+    def format(self):
+        state = "OK" if self.ok else ("timeout" if self.timed_out else ("đã hủy" if self.cancelled else "LỖI"))
+        text = f"{self.remote}: {state}, {self.duration:.1f}s, {format_bytes(self.bytes_received)}"
+        if not self.ok and self.output:
+            lines = self.output.splitlines()
+            # Dòng "fatal: ..." thường là dòng mô tả lỗi rõ nhất
+            reason = next((l for l in lines if l.startswith(('fatal:', 'error:'))), lines[0])
+            text += f" - {reason}"
+        return text
+
+    def __repr__(self):
+        return f"RemoteFetchResult({self.format()!r})"
+
+
+class FetchEngine:
+    """Fetch song song từng remote thay vì `git fetch --all` (tuần tự từng remote).
+
+    Mỗi remote chạy một `git fetch` riêng với timeout riêng, nên một remote chậm hoặc hỏng
+    không làm các remote khác phải chờ. `--jobs` được truyền để fetch submodule song song.
+    """
+
+    def __init__(self, git, max_parallel=DEFAULT_PARALLEL, submodule_jobs=None):
+        self.git = git
+        self.max_parallel = max(1, max_parallel)
+        self.submodule_jobs = submodule_jobs if submodule_jobs else self.max_parallel
+
+    def remotes(self):
+        """Danh sách remote (bỏ qua remote có skipFetchAll, giống `fetch --all`)"""
+        ok, out = self.git.run_command(['config', '--get-regexp', r'^remote\..*\.(url|skipfetchall)$'],
+                                       show_output=False, read_only=True)
+        if not ok:
+            return []
+        names, skipped = [], set()
+        for line in out.splitlines():
+            key, _, value = line.partition(' ')
+            # Tên remote có thể chứa dấu chấm: remote.<tên>.url
+            name, _, field = key[len('remote.'):].rpartition('.')
+            if field == 'url' and name not in names:
+                names.append(name)
+            elif field == 'skipfetchall' and value.strip().lower() in ('true', 'yes', 'on', '1'):
+                skipped.add(name)
+        return [n for n in names if n not in skipped]
+
+    def fetch_all(self, remotes=None, on_progress=None):
+        """Fetch các remote song song, trả về list RemoteFetchResult theo thứ tự remote.
+
+        on_progress(event): ProgressEvent có thêm event.source là tên remote.
+        """
+        if remotes is None:
+            remotes = self.remotes()
+        if not remotes:
+            return []
+        workers = min(self.max_parallel, len(remotes))
+        if git_version() < (2, 29):
+            # Git cũ chưa có --no-write-fetch-head, chạy song song sẽ làm hỏng FETCH_HEAD
+            workers = 1
+        # Một remote: để git ghi FETCH_HEAD như bình thường. Nhiều remote chạy song song sẽ ghi
+        # đè FETCH_HEAD của nhau -> tắt, và ghi thời điểm fetch vào file riêng của công cụ
+        no_fetch_head = len(remotes) > 1 and git_version() >= (2, 29)
+        # Đánh dấu các lệnh fetch chạy song song (transcript cho phép chúng đổi thứ tự khi phát lại)
+        group = new_parallel_group() if workers > 1 else None
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._fetch_one, remote, on_progress, no_fetch_head, group)
+                       for remote in remotes]
+            results = [f.result() for f in futures]
+        if no_fetch_head and any(r.ok for r in results):
+            self.git.mark_fetched()
+        return results
+
+    def _fetch_one(self, remote, on_progress, no_fetch_head=False, group=None):
+        result = RemoteFetchResult(remote)
+
+        def progress(event):
+            event.source = remote
+            if event.bytes is not None and event.phase == 'Receiving objects':
+                result.bytes_received = event.bytes
+            if on_progress:
+                on_progress(event)
+
+        args = ['fetch', '--progress', f'--jobs={self.submodule_jobs}', remote]
+        if no_fetch_head:
+            args.insert(2, '--no-write-fetch-head')
+        start = time.perf_counter()
+        with parallel_group(group):
+            res = self.git.stream_command(args, on_progress=progress)
+        result.duration = time.perf_counter() - start
+        result.ok, result.output = res
+        result.timed_out = res.timed_out
+        result.cancelled = res.cancelled
+        return result
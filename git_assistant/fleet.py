@@ -0,0 +1,291 @@
+"""Chạy fetch/pull/status/sync trên nhiều repo cùng lúc (fleet mode).
+
+Các câu hỏi của workflow (confirm/input/select) được trả lời tự động theo file policy
+thay vì bật hộp thoại cho từng repo.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import GitCore
+from .io_handler import IOHandler
+from .results import GitResult
+from .scenarios import GitScenarios
+
+# Thư mục không cần tìm repo bên trong
+SKIP_DIRS = {'node_modules', '.venv', 'venv', '__pycache__', '.tox', 'build', 'dist'}
+
+OPERATIONS = ('fetch', 'pull', 'status', 'sync')
+
+# Policy mặc định: không đồng ý gì cả, input để trống (workflow dùng giá trị mặc định)
+DEFAULT_POLICY = {
+    'confirm_default': False,
+    'confirm': {},
+    'input_default': '',
+    'input': {},
+    'select': {},
+}
+
+
+def discover_repos(root, max_depth=4):
+    """Tìm các repo git (thư mục có .git) dưới root, không đi vào bên trong repo đã tìm thấy"""
+    root = os.path.abspath(root)
+    repos = []
+    base_depth = root.rstrip(os.sep).count(os.sep)
+    for dirpath, dirnames, _ in os.walk(root):
+        if os.path.exists(os.path.join(dirpath, '.git')):
+            repos.append(dirpath)
+            dirnames[:] = []
+            continue
+        if dirpath.count(os.sep) - base_depth >= max_depth:
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d not in SKIP_DIRS)
+    return repos
+
+
+def load_manifest(path):
+    """Đọc danh sách repo từ manifest.
+
+    Hỗ trợ JSON (list đường dẫn, hoặc {"repos": [...]}, phần tử là chuỗi hoặc {"path": ...})
+    hoặc file text mỗi dòng một đường dẫn (dòng bắt đầu bằng # là chú thích).
+    Đường dẫn tương đối được tính từ thư mục chứa manifest.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = [line.strip() for line in content.splitlines()
+                if line.strip() and not line.strip().startswith('#')]
+    if isinstance(data, dict):
+        data = data.get('repos', [])
+    repos = []
+    for item in data:
+        repo = item.get('path') if isinstance(item, dict) else item
+        if repo:
+            repos.append(os.path.normpath(os.path.join(base, os.path.expanduser(repo))))
+    return repos
+
+
+def load_policy(path=None):
+    """Đọc file policy (JSON), ghép với DEFAULT_POLICY"""
+    policy = {k: (dict(v) if isinstance(v, dict) else v) for k, v in DEFAULT_POLICY.items()}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for key, value in data.items():
+            if isinstance(value, dict) and isinstance(policy.get(key), dict):
+                policy[key].update(value)
+            else:
+                policy[key] = value
+    return policy
+
+
+def _lookup(rules, prompt):
+    """Tìm luật đầu tiên có khóa (không phân biệt hoa thường) nằm trong câu hỏi"""
+    text = prompt.lower()
+    for key, value in rules.items():
+        if key.lower() in text:
+            return True, value
+    return False, None
+
+
+class PolicyIO(IOHandler):
+    """IOHandler không tương tác: trả lời theo policy và ghi lại toàn bộ log của một repo.
+
+    Policy (JSON):
+        {
+          "confirm_default": false,
+          "confirm": {"stash": true, "Pop Stash": true},
+          "input_default": "",
+          "input": {"nhánh chính": "main"},
+          "select": {"Chọn nhánh": "develop"}
+        }
+    Khóa là một đoạn của câu hỏi; câu hỏi không khớp luật nào dùng giá trị *_default.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy if policy else load_policy()
+        self.lines = []
+        self.errors = []
+        self.warnings = []
+        self.successes = []
+
+    def log(self, message, color=None):
+        self.lines.append(str(message))
+
+    def error(self, message):
+        self.errors.append(message)
+        self.lines.append(f"✘ {message}")
+
+    def success(self, message):
+        self.successes.append(message)
+        self.lines.append(f"✔ {message}")
+
+    def warning(self, message):
+        self.warnings.append(message)
+        self.lines.append(f"⚠ {message}")
+
+    def input(self, prompt):
+        found, value = _lookup(self.policy.get('input', {}), prompt)
+        answer = value if found else self.policy.get('input_default', '')
+        self.lines.append(f"? {prompt}: {answer!r} (policy)")
+        return answer
+
+    def confirm(self, prompt):
+        found, value = _lookup(self.policy.get('confirm', {}), prompt)
+        answer = bool(value) if found else bool(self.policy.get('confirm_default', False))
+        self.lines.append(f"? {prompt} -> {'y' if answer else 'n'} (policy)")
+        return answer
+
+    def select(self, prompt, options):
+        found, value = _lookup(self.policy.get('select', {}), prompt)
+        answer = value if found and value in options else None
+        self.lines.append(f"? {prompt} -> {answer!r} (policy)")
+        return answer
+
+
+class FleetResult:
+    """Kết quả của một thao tác trên một repo"""
+
+    def __init__(self, repo, operation):
+        self.repo = repo
+        self.operation = operation
+        self.ok = False
+        self.branch = None
+        self.summary = ''
+        self.duration = 0.0
+        self.log = []
+
+    def __repr__(self):
+        return f"FleetResult({self.repo!r}, ok={self.ok}, summary={self.summary!r})"
+
+
+class FleetRunner:
+    """Chạy một thao tác trên nhiều repo, tối đa max_workers repo cùng lúc.
+
+    status chỉ cần một lệnh git mỗi repo nên chạy bằng AsyncGitCore trong một event loop;
+    các thao tác còn lại dùng thread pool.
+    """
+
+    def __init__(self, repos, policy=None, max_workers=4, on_result=None):
+        self.repos = list(repos)
+        self.policy = policy if policy else load_policy()
+        self.max_workers = max(1, max_workers)
+        self.on_result = on_result
+        self._lock = threading.Lock()
+
+    def run(self, operation):
+        """Chạy operation ('fetch', 'pull', 'status', 'sync') trên tất cả repo, trả về list FleetResult"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Thao tác không hỗ trợ: {operation} (chọn một trong {', '.join(OPERATIONS)})")
+        if operation == 'status':
+            return asyncio.run(self._status_all())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._run_one, repo, operation) for repo in self.repos]
+            return [f.result() for f in futures]
+
+    def _run_one(self, repo, operation):
+        result = FleetResult(repo, operation)
+        io = PolicyIO(self.policy)
+        start = time.perf_counter()
+        try:
+            if operation == 'fetch':
+                git = GitCore(working_dir=repo, io_handler=io)
+                ok, out = git.fetch()
+                result.ok = ok
+                result.summary = "Đã fetch." if ok else out
+                result.branch = git.current_branch()
+            else:
+                scenarios = GitScenarios(io_handler=io, working_dir=repo)
+                if operation == 'pull':
+                    scenarios.workflow_pull_code()
+                else:
+                    scenarios.workflow_sync_main()
+                result.branch = scenarios.git.current_branch()
+                result.ok = not io.errors
+                if io.errors:
+                    result.summary = io.errors[0]
+                elif io.successes:
+                    result.summary = io.successes[-1]
+                elif io.warnings:
+                    result.summary = io.warnings[-1]
+        except Exception as e:
+            result.ok = False
+            result.summary = f"Lỗi: {e}"
+        return self._finish(result, io, start)
+
+    async def _status_all(self):
+        limit = asyncio.Semaphore(self.max_workers)
+
+        async def one(repo):
+            async with limit:
+                return await self._status_one(repo)
+        return list(await asyncio.gather(*(one(repo) for repo in self.repos)))
+
+    async def _status_one(self, repo):
+        result = FleetResult(repo, 'status')
+        io = PolicyIO(self.policy)
+        start = time.perf_counter()
+        try:
+            st = await GitCore(working_dir=repo, io_handler=io).aio().repo_status()
+            self._summarize_status(st, result)
+        except Exception as e:
+            result.ok = False
+            result.summary = f"Lỗi: {e}"
+        return self._finish(result, io, start)
+
+    def _finish(self, result, io, start):
+        result.duration = time.perf_counter() - start
+        result.log = io.lines
+        if self.on_result:
+            with self._lock:
+                self.on_result(result)
+        return result
+
+    @staticmethod
+    def _summarize_status(st, result):
+        if st is None:
+            result.summary = "Không đọc được trạng thái (không phải repo git?)"
+            return
+        if isinstance(st, GitResult):
+            # Lệnh status bị timeout/hủy
+            result.summary = st.output
+            return
+        result.ok = True
+        result.branch = st.branch or "(detached)"
+        parts = [f"{st.dirty_count} thay đổi" if st.dirty_count else "sạch"]
+        if st.upstream:
+            parts.append(f"ahead {st.ahead}/behind {st.behind}")
+        else:
+            parts.append("chưa có upstream")
+        if st.stash_count:
+            parts.append(f"{st.stash_count} stash")
+        result.summary = ", ".join(parts)
+
+
+def format_table(results, root=None):
+    """Bảng tổng hợp kết quả theo từng repo"""
+    rows = []
+    for r in results:
+        name = os.path.relpath(r.repo, root) if root else r.repo
+        rows.append((name, "OK" if r.ok else "LỖI", r.branch or "-", f"{r.duration:.2f}s",
+                     r.summary.splitlines()[0] if r.summary else ""))
+    headers = ("Repo", "Kết quả", "Nhánh", "Thời gian", "Ghi chú")
+    widths = [max(len(h), *(len(row[i]) for row in rows)) if rows else len(h)
+              for i, h in enumerate(headers)]
+    widths[-1] = len(headers[-1])
+
+    def fmt(row):
+        return " | ".join(cell.ljust(widths[i]) if i < len(row) - 1 else cell for i, cell in enumerate(row))
+
+    lines = [fmt(headers), "-+-".join("-" * w for w in widths)]
+    lines.extend(fmt(row) for row in rows)
+    ok_count = sum(1 for r in results if r.ok)
+    lines.append(f"Tổng: {len(results)} repo, {ok_count} OK, {len(results) - ok_count} lỗi")
+    return "\n".join(lines)
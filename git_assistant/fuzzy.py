@@ -0,0 +1,105 @@
+"""Tìm kiếm mờ (fuzzy) trong danh sách lớn (hàng nghìn nhánh) cho ô chọn của GUI và CLI.
+
+Chuỗi tìm khớp nếu các ký tự của nó xuất hiện theo đúng thứ tự trong tên (`flog` khớp
+`feature/login`); nhiều từ cách nhau bởi dấu cách thì tên phải khớp tất cả các từ.
+Chỉ mục dựng sẵn một lần: chữ thường, vị trí đầu từ và "mặt nạ ký tự" để loại nhanh các tên
+thiếu ký tự. Gõ thêm ký tự thì chỉ lọc lại trong kết quả của lần trước.
+"""
+from collections.abc import Sequence
+
+# Ký tự phân tách từ trong tên nhánh: ký tự ngay sau chúng được cộng điểm
+SEPARATORS = '/-_. '
+
+
+def _char_mask(text):
+    mask = 0
+    for ch in text:
+        mask |= 1 << (ord(ch) & 63)
+    return mask
+
+
+def _score(query, name, starts):
+    """Điểm khớp của query (đã viết thường) trong name (đã viết thường), None nếu không khớp"""
+    pos = name.find(query)
+    if pos >= 0:
+        # Khớp liền một đoạn: luôn hơn khớp rải rác, ưu tiên đầu tên / đầu từ
+        return 1000 + (200 if pos == 0 else 100 if pos in starts else 0) - pos
+    score = 0
+    last = -1
+    for ch in query:
+        pos = name.find(ch, last + 1)
+        if pos < 0:
+            return None
+        if pos == last + 1:
+            score += 5
+        elif pos in starts:
+            score += 8
+        else:
+            score += 1 - min(pos - last, 10) // 5
+        last = pos
+    return score
+
+
+class FuzzyIndex(Sequence):
+    """Danh sách lựa chọn đã xếp hạng, kèm chỉ mục để tìm mờ.
+
+    Dùng được như list (len, [i], in) nên IOHandler nào cũng nhận được; GuiIO/ConsoleIO dùng
+    thêm search() để lọc. Thứ tự mặc định: dùng gần đây trước (recent), rồi ngày commit mới
+    nhất (dates), rồi thứ tự ban đầu.
+
+        index = FuzzyIndex(branches, dates={'main': 1700000000}, recent=['feature/x'])
+        index.search('fx')   # ['feature/x', ...]
+
+    key(item) -> khóa tra recent/dates (VD nhãn "x (đã có worktree)" -> tên nhánh "x").
+    """
+
+    def __init__(self, items, dates=None, recent=(), key=None):
+        dates = dates or {}
+        recent_rank = {name: i for i, name in enumerate(recent)}
+        keyed = [(item, key(item) if key else item) for item in items]
+        order = sorted(range(len(keyed)), key=lambda i: (
+            recent_rank.get(keyed[i][1], len(recent_rank)), -dates.get(keyed[i][1], 0), i))
+        self.items = [keyed[i][0] for i in order]
+        self._lower = [str(item).lower() for item in self.items]
+        self._masks = [_char_mask(text) for text in self._lower]
+        self._starts = [frozenset(i for i, ch in enumerate(text) if i == 0 or text[i - 1] in SEPARATORS)
+                        for text in self._lower]
+        self._members = set(self.items)
+        self._last_query = ''
+        self._last_hits = range(len(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __contains__(self, item):
+        return item in self._members
+
+    def search(self, query):
+        """Các lựa chọn khớp query, điểm cao trước (cùng điểm giữ thứ tự mặc định)"""
+        query = ' '.join(query.lower().split())
+        if not query:
+            self._last_query, self._last_hits = '', range(len(self.items))
+            return list(self.items)
+        # Query dài thêm từ query trước -> kết quả chỉ có thể nằm trong kết quả trước
+        candidates = self._last_hits if query.startswith(self._last_query) else range(len(self.items))
+        terms = query.split(' ')
+        need = _char_mask(query.replace(' ', ''))
+        scored = []
+        for i in candidates:
+            if need & ~self._masks[i]:
+                continue
+            total = 0
+            for term in terms:
+                score = _score(term, self._lower[i], self._starts[i])
+                if score is None:
+                    break
+                total += score
+            else:
+                scored.append((-total, i))
+        scored.sort()
+        self._last_query = query
+        self._last_hits = sorted(i for _, i in scored)
+        return [self.items[i] for _, i in scored]
@@ -1,121 +1,394 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, scrolledtext
 import threading
+from collections import deque
+from concurrent.futures import Future
 from .io_handler import IOHandler
+from .utils import Colors
 from .scenarios import GitScenarios
+from .core import GitCore, STATUS_MAX_AGE
+from .watcher import RepoWatcher, GIT, WORKTREE
+from .fuzzy import FuzzyIndex
+from .cache import common_dir
+from .tasks import TaskScheduler, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+
+# Chu kỳ đẩy log ra widget (ms) và số dòng tối đa giữ lại trong khung log
+LOG_FRAME_MS = 50
+LOG_MAX_LINES = 5000
+
+# Màu cho tham số color của log(): tên màu, mã ANSI trong utils.Colors, hoặc loại thông báo
+LOG_COLORS = {
+    'red': '#c62828', 'green': '#2e7d32', 'yellow': '#b26a00', 'blue': '#1565c0',
+    'cyan': '#00838f', 'gray': '#757575', 'header': '#6a1b9a',
+}
+_ANSI_COLORS = {
+    Colors.FAIL: 'red', Colors.GREEN: 'green', Colors.WARNING: 'yellow',
+    Colors.BLUE: 'blue', Colors.CYAN: 'cyan', Colors.HEADER: 'header',
+}
+_LEVEL_COLORS = {'error': 'red', 'success': 'green', 'warning': 'yellow'}
+
+
+class LogView:
+    """Ghi log vào ScrolledText theo từng đợt.
+
+    Luồng nào cũng gọi append() được (chỉ thêm vào hàng đợi có khóa). Mỗi LOG_FRAME_MS, luồng Tk
+    lấy hết dòng đang chờ và chèn bằng một lệnh insert duy nhất, rồi cắt bớt dòng cũ để khung log
+    không vượt quá max_lines.
+    """
+
+    def __init__(self, widget, root, max_lines=LOG_MAX_LINES, frame_ms=LOG_FRAME_MS):
+        self.widget = widget
+        self.root = root
+        self.max_lines = max_lines
+        self.frame_ms = frame_ms
+        # Hàng đợi cũng giới hạn: nếu luồng Tk bị chậm, dòng cũ nhất bị bỏ trước khi kịp hiển thị
+        self._pending = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        for name, value in LOG_COLORS.items():
+            widget.tag_configure(name, foreground=value)
+        self.root.after(self.frame_ms, self._drain)
+
+    def append(self, message, color=None):
+        tag = _ANSI_COLORS.get(color, color) if color else None
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append((f"{message}\n", tag))
+
+    def _drain(self):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        if batch:
+            try:
+                self._render(batch, dropped)
+            except tk.TclError:
+                return   # cửa sổ đã đóng
+        try:
+            self.root.after(self.frame_ms, self._drain)
+        except tk.TclError:
+            pass
+
+    def _render(self, batch, dropped):
+        widget = self.widget
+        # Chỉ tự cuộn xuống nếu người dùng đang ở cuối (không giật khi đang đọc log cũ)
+        at_bottom = widget.yview()[1] >= 0.999
+        args = []
+        if dropped:
+            args.extend((f"... (bỏ qua {dropped} dòng log)\n", 'gray'))
+        # Gộp các dòng liền nhau cùng màu thành một đoạn
+        text, tag = [], None
+        for line, line_tag in batch:
+            if text and line_tag != tag:
+                args.extend((''.join(text), tag or ()))
+                text = []
+            text.append(line)
+            tag = line_tag
+        args.extend((''.join(text), tag or ()))
+
+        widget.configure(state='normal')
+        widget.insert(tk.END, *args)
+        lines = int(widget.index('end-1c').split('.')[0])
+        if lines > self.max_lines:
+            widget.delete('1.0', f"{lines - self.max_lines + 1}.0")
+        widget.configure(state='disabled')
+        if at_bottom:
+            widget.see(tk.END)
+
+
+# Thời gian hiện thông báo nhỏ (toast) trước khi tự tắt (ms), số toast tối đa cùng lúc
+TOAST_MS = {'success': 4000, 'warning': 6000, 'error': 8000}
+TOAST_MAX = 4
+_TOAST_STYLES = {
+    'success': ('#e8f5e9', LOG_COLORS['green'], "✔"),
+    'warning': ('#fff8e1', LOG_COLORS['yellow'], "⚠"),
+    'error': ('#ffebee', LOG_COLORS['red'], "✘"),
+}
+
+
+class Toasts:
+    """Thông báo nhỏ ở góc dưới phải cửa sổ, tự tắt, không chặn luồng gọi.
+
+    show() gọi được từ luồng bất kỳ; bấm vào toast để tắt sớm.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._shown = []
+
+    def show(self, message, level):
+        self.root.after(0, self._show, message, level)
+
+    def _show(self, message, level):
+        background, foreground, icon = _TOAST_STYLES[level]
+        while len(self._shown) >= TOAST_MAX:
+            self._close(self._shown[0])
+        top = tk.Toplevel(self.root)
+        top.overrideredirect(True)
+        top.attributes('-topmost', True)
+        label = tk.Label(top, text=f"{icon} {message}", bg=background, fg=foreground, justify=tk.LEFT,
+                         wraplength=320, padx=12, pady=8, relief=tk.SOLID, borderwidth=1)
+        label.pack()
+        label.bind('<Button-1>', lambda _e: self._close(top))
+        self._shown.append(top)
+        self._layout()
+        self.root.after(TOAST_MS[level], self._close, top)
+
+    def _close(self, top):
+        if top in self._shown:
+            self._shown.remove(top)
+            top.destroy()
+            self._layout()
+
+    def _layout(self):
+        # Xếp chồng từ góc dưới phải lên, toast mới nhất ở dưới cùng
+        self.root.update_idletasks()
+        x = self.root.winfo_rootx() + self.root.winfo_width() - 12
+        y = self.root.winfo_rooty() + self.root.winfo_height() - 12
+        for top in reversed(self._shown):
+            y -= top.winfo_reqheight()
+            top.geometry(f"+{x - top.winfo_reqwidth()}+{y}")
+            y -= 6
+
+
+# Số dòng hiển thị của ô chọn: chỉ chừng này dòng được đưa vào Listbox, dù danh sách dài bao nhiêu
+SELECT_ROWS = 15
+
+
+class SelectDialog:
+    """Hộp chọn có ô tìm (tìm mờ qua FuzzyIndex) và danh sách ảo.
+
+    Listbox chỉ chứa SELECT_ROWS dòng đang nhìn thấy; thanh cuộn được điều khiển bằng tay theo
+    vị trí trong danh sách kết quả, nên mở hộp chọn hay gõ tìm với hàng nghìn nhánh vẫn nhanh.
+    Đặt kết quả (lựa chọn hoặc None nếu hủy) vào future.
+    """
+
+    def __init__(self, root, prompt, options, future):
+        self.index = options if isinstance(options, FuzzyIndex) else FuzzyIndex(options)
+        self.future = future
+        self.matches = list(self.index)
+        self.offset = 0         # vị trí dòng đầu đang hiển thị trong matches
+        self.cursor = 0         # vị trí dòng đang chọn trong matches
+
+        top = self.top = tk.Toplevel(root)
+        top.title("Lựa chọn")
+        top.geometry("420x400")
+        # Make modal
+        top.transient(root)
+        top.grab_set()
+
+        ttk.Label(top, text=prompt, padding=10).pack()
+        self.query = tk.StringVar()
+        entry = ttk.Entry(top, textvariable=self.query)
+        entry.pack(fill=tk.X, padx=10)
+        self.count = ttk.Label(top, padding=(10, 2))
+        self.count.pack(anchor=tk.W)
+
+        list_frame = ttk.Frame(top)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.listbox = tk.Listbox(list_frame, height=SELECT_ROWS, selectmode=tk.SINGLE,
+                                  exportselection=False, activestyle='none')
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        btn_frame = ttk.Frame(top, padding=10)
+        btn_frame.pack(fill=tk.X)
+        ttk.Button(btn_frame, text="Chọn", command=self.choose).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Hủy", command=self.cancel).pack(side=tk.RIGHT, padx=5)
+
+        self.query.trace_add('write', lambda *_: self._filter())
+        for widget in (entry, self.listbox):
+            widget.bind('<Up>', lambda _e: self._move(-1))
+            widget.bind('<Down>', lambda _e: self._move(1))
+            widget.bind('<Prior>', lambda _e: self._move(-SELECT_ROWS))
+            widget.bind('<Next>', lambda _e: self._move(SELECT_ROWS))
+            widget.bind('<Return>', lambda _e: self.choose())
+            widget.bind('<Escape>', lambda _e: self.cancel())
+        self.listbox.bind('<<ListboxSelect>>', self._on_click)
+        self.listbox.bind('<Double-1>', lambda _e: self.choose())
+        self.listbox.bind('<MouseWheel>', lambda e: self._scroll(-1 if e.delta > 0 else 1))
+        self.listbox.bind('<Button-4>', lambda _e: self._scroll(-1))
+        self.listbox.bind('<Button-5>', lambda _e: self._scroll(1))
+        # Handle close window X button
+        top.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        entry.focus_set()
+        self._render()
+
+    def _filter(self):
+        self.matches = self.index.search(self.query.get())
+        self.offset = self.cursor = 0
+        self._render()
+
+    def _render(self):
+        total = len(self.matches)
+        rows = self.matches[self.offset:self.offset + SELECT_ROWS]
+        self.listbox.delete(0, tk.END)
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        if self.offset <= self.cursor < self.offset + len(rows):
+            self.listbox.selection_set(self.cursor - self.offset)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + SELECT_ROWS) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count.configure(text=f"{total}/{len(self.index)} mục")
+
+    def _move(self, delta):
+        if not self.matches:
+            return 'break'
+        self.cursor = max(0, min(len(self.matches) - 1, self.cursor + delta))
+        # Giữ dòng đang chọn trong vùng nhìn thấy
+        if self.cursor < self.offset:
+            self.offset = self.cursor
+        elif self.cursor >= self.offset + SELECT_ROWS:
+            self.offset = self.cursor - SELECT_ROWS + 1
+        self._render()
+        return 'break'
+
+    def _scroll(self, rows):
+        self.offset = max(0, min(max(0, len(self.matches) - SELECT_ROWS), self.offset + rows))
+        self._render()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = 0
+            self._scroll(int(float(amount) * len(self.matches)))
+        elif action == 'scroll':
+            self._scroll(int(amount) * (SELECT_ROWS if unit == 'pages' else 1))
+
+    def _on_click(self, _event):
+        sel = self.listbox.curselection()
+        if sel:
+            self.cursor = self.offset + sel[0]
+
+    def choose(self):
+        if not self.matches:
+            messagebox.showwarning("Chưa chọn", "Không có mục nào khớp!", parent=self.top)
+            return
+        self._close(self.matches[self.cursor])
+
+    def cancel(self):
+        self._close(None)
+
+    def _close(self, result):
+        self.top.destroy()
+        if not self.future.done():
+            self.future.set_result(result)
+
 
 class GuiIO(IOHandler):
+    """IOHandler cho Tkinter: câu hỏi hiện trên luồng Tk và trả về Future, thông báo là toast.
+
+    Các hàm ask_* trả về ngay; luồng workflow có thể làm tiếp (VD lấy danh sách nhánh) rồi mới
+    chờ .result(). input/confirm/select là bản chặn của chúng.
+    """
+
     def __init__(self, log_widget, root):
         self.log_widget = log_widget
         self.root = root
+        self.view = LogView(log_widget, root)
+        self.toasts = Toasts(root)
+        self._pending = set()
+        self._prompts = deque()     # (future, show) chờ hiện lần lượt
+        self._showing = None        # future của hộp thoại đang hiện
+        self._lock = threading.Lock()
 
     def log(self, message, color=None):
-        def _update():
-            self.log_widget.configure(state='normal')
-            self.log_widget.insert(tk.END, f"{message}\n")
-            if color:
-                # Apply tag if needed (not implemented simple here)
-                pass
-            self.log_widget.see(tk.END)
-            self.log_widget.configure(state='disabled')
-        self.root.after(0, _update)
+        self.view.append(message, color)
 
     def error(self, message):
-        self.log(f"ERROR: {message}")
-        event = threading.Event()
-        def _show():
-            messagebox.showerror("Lỗi", message, parent=self.root)
-            event.set()
-        self.root.after(0, _show)
-        event.wait()
+        self.log(f"ERROR: {message}", _LEVEL_COLORS['error'])
+        self.toasts.show(message, 'error')
 
     def success(self, message):
-        self.log(f"SUCCESS: {message}")
-        event = threading.Event()
-        def _show():
-            messagebox.showinfo("Thành công", message, parent=self.root)
-            event.set()
-        self.root.after(0, _show)
-        event.wait()
+        self.log(f"SUCCESS: {message}", _LEVEL_COLORS['success'])
+        self.toasts.show(message, 'success')
 
     def warning(self, message):
-        self.log(f"WARNING: {message}")
-        event = threading.Event()
-        def _show():
-            messagebox.showwarning("Cảnh báo", message, parent=self.root)
-            event.set()
-        self.root.after(0, _show)
-        event.wait()
+        self.log(f"WARNING: {message}", _LEVEL_COLORS['warning'])
+        self.toasts.show(message, 'warning')
 
     def input(self, prompt):
-        # Use a threading event/queue to get result from main thread
-        result = [None]
-        event = threading.Event()
-        
-        def _ask():
-            result[0] = simpledialog.askstring("Nhập thông tin", prompt, parent=self.root)
-            event.set()
-            
-        self.root.after(0, _ask)
-        event.wait() # Block thread until user inputs
-        return result[0]
+        return self.ask_input(prompt).result()
 
     def confirm(self, prompt):
-        result = [False]
-        event = threading.Event()
-        
-        def _ask():
-            result[0] = messagebox.askyesno("Xác nhận", prompt, parent=self.root)
-            event.set()
-            
-        self.root.after(0, _ask)
-        event.wait()
-        return result[0]
+        return self.ask_confirm(prompt).result()
 
     def select(self, prompt, options):
-        result = [None]
-        event = threading.Event()
-
-        def _ask():
-            top = tk.Toplevel(self.root)
-            top.title("Lựa chọn")
-            top.geometry("400x300")
-            
-            # Make modal
-            top.transient(self.root)
-            top.grab_set()
-            
-            ttk.Label(top, text=prompt, padding=10).pack()
-            
-            listbox = tk.Listbox(top, selectmode=tk.SINGLE)
-            for opt in options:
-                listbox.insert(tk.END, opt)
-            listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-            
-            def on_select():
-                sel = listbox.curselection()
-                if sel:
-                    result[0] = options[sel[0]]
-                    top.destroy()
-                    event.set()
-                else:
-                    messagebox.showwarning("Chưa chọn", "Vui lòng chọn một mục!", parent=top)
+        return self.ask_select(prompt, options).result()
+
+    def ask_input(self, prompt):
+        return self._on_tk(lambda future: future.set_result(
+            simpledialog.askstring("Nhập thông tin", prompt, parent=self.root)))
+
+    def ask_confirm(self, prompt):
+        return self._on_tk(lambda future: future.set_result(
+            messagebox.askyesno("Xác nhận", prompt, parent=self.root)))
+
+    def ask_select(self, prompt, options):
+        return self._on_tk(lambda future: self._select_dialog(future, prompt, options))
+
+    def close(self):
+        """Hủy các câu hỏi chưa được trả lời (đóng cửa sổ) để luồng workflow không chờ mãi"""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._prompts.clear()
+        for future in pending:
+            future.cancel()
+
+    def _on_tk(self, show):
+        """Xếp show(future) vào hàng câu hỏi; show tự đặt kết quả khi người dùng trả lời.
+
+        Nhiều thao tác chạy song song có thể cùng hỏi: mỗi lúc chỉ hiện một hộp thoại,
+        câu hỏi sau chờ câu trước được trả lời.
+        """
+        future = Future()
+        with self._lock:
+            self._pending.add(future)
+            self._prompts.append((future, show))
+        future.add_done_callback(self._forget)
+        self.root.after(0, self._show_next)
+        return future
 
-            def on_cancel():
-                top.destroy()
-                event.set() # result is None
+    def _forget(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future is not self._showing:
+                return
+            self._showing = None
+        try:
+            self.root.after(0, self._show_next)
+        except (tk.TclError, RuntimeError):
+            pass   # cửa sổ đã đóng
 
-            btn_frame = ttk.Frame(top, padding=10)
-            btn_frame.pack(fill=tk.X)
-            ttk.Button(btn_frame, text="Chọn", command=on_select).pack(side=tk.LEFT, padx=5)
-            ttk.Button(btn_frame, text="Hủy", command=on_cancel).pack(side=tk.RIGHT, padx=5)
-            
-            # Handle close window X button
-            top.protocol("WM_DELETE_WINDOW", on_cancel)
+    def _show_next(self):
+        with self._lock:
+            if self._showing is not None:
+                return
+            while self._prompts:
+                future, show = self._prompts.popleft()
+                if not future.done():
+                    self._showing = future
+                    break
+            else:
+                return
+        try:
+            show(future)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
 
-        self.root.after(0, _ask)
-        event.wait()
-        return result[0]
+    def _select_dialog(self, future, prompt, options):
+        SelectDialog(self.root, prompt, options, future)
+
+# Chu kỳ vẽ lại khung hàng đợi (ms)
+TASK_REFRESH_MS = 200
+TASK_STATES = {QUEUED: "Đang chờ", RUNNING: "Đang chạy", DONE: "Xong", FAILED: "Lỗi", CANCELLED: "Đã hủy"}
 
 class GitGuiApp:
     def __init__(self, root):
@@ -133,6 +406,10 @@ class GitGuiApp:
         header_frame.pack(fill=tk.X)
         ttk.Label(header_frame, text="Git Assistant Tools", style="Header.TLabel").pack(side=tk.LEFT)
 
+        # Trạng thái repo, tự cập nhật khi file trong repo thay đổi (RepoWatcher)
+        self.status_var = tk.StringVar(value="Đang đọc trạng thái...")
+        ttk.Label(root, textvariable=self.status_var, padding=(10, 0)).pack(fill=tk.X)
+
         # Main Content
         main_frame = ttk.Frame(root, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -141,26 +418,51 @@ class GitGuiApp:
         btn_frame = ttk.LabelFrame(main_frame, text="Chức năng", padding=10)
         btn_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
 
+        # (nhãn, hàm, chỉ đọc): thao tác chỉ đọc được chạy song song với thao tác ghi
         buttons = [
-            ("Đẩy code (Push)", self.run_push),
-            ("Kéo code (Pull)", self.run_pull),
-            ("Đồng bộ an toàn (Sync Main)", self.run_sync),
-            ("Chuyển nhánh (Switch Branch)", self.run_switch),
-            ("Tạo tính năng mới (Feature)", self.run_feature),
-            ("Xem trạng thái (Status)", self.run_status),
-            ("Quản lý Stash (Fix Lost Code)", self.run_stash),
+            ("Đẩy code (Push)", self.run_push, False),
+            ("Kéo code (Pull)", self.run_pull, False),
+            ("Đồng bộ an toàn (Sync Main)", self.run_sync, False),
+            ("Kiểm tra xung đột với Main", self.run_preview_conflicts, True),
+            ("Chuyển nhánh (Switch Branch)", self.run_switch, False),
+            ("Tạo tính năng mới (Feature)", self.run_feature, False),
+            ("Xem trạng thái (Status)", self.run_status, True),
+            ("Quản lý Stash (Fix Lost Code)", self.run_stash, False),
+            ("Quản lý Worktree", self.run_worktrees, False),
         ]
 
-        for text, command in buttons:
-            btn = ttk.Button(btn_frame, text=text, command=lambda c=command: self.run_thread(c), width=30)
+        for text, command, read_only in buttons:
+            btn = ttk.Button(btn_frame, text=text, width=30,
+                             command=lambda t=text, c=command, r=read_only: self.submit(t, c, r))
             btn.pack(pady=5, fill=tk.X)
         
+        # Chuyển nhánh bằng worktree (mỗi nhánh một thư mục) thay vì stash + checkout
+        self.worktree_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="Chuyển nhánh bằng worktree", variable=self.worktree_mode,
+                        command=self.toggle_worktree_mode).pack(anchor=tk.W, pady=5)
+
         ttk.Separator(btn_frame, orient='horizontal').pack(fill='x', pady=10)
-        ttk.Button(btn_frame, text="Thoát", command=root.quit).pack(side=tk.BOTTOM, fill=tk.X)
+        ttk.Button(btn_frame, text="Dừng thao tác (Stop)", command=self.stop_current).pack(fill=tk.X)
+        ttk.Button(btn_frame, text="Thoát", command=self.quit).pack(side=tk.BOTTOM, fill=tk.X)
+
+        right_frame = ttk.Frame(main_frame)
+        right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+        # Hàng đợi thao tác (đang chạy / đang chờ / vừa xong)
+        queue_frame = ttk.LabelFrame(right_frame, text="Hàng đợi thao tác", padding=10)
+        queue_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+        self.task_view = ttk.Treeview(queue_frame, columns=('state', 'time'), height=5)
+        self.task_view.heading('#0', text="Thao tác")
+        self.task_view.heading('state', text="Trạng thái")
+        self.task_view.heading('time', text="Thời gian")
+        self.task_view.column('state', width=110, stretch=False)
+        self.task_view.column('time', width=80, stretch=False, anchor=tk.E)
+        self.task_view.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(queue_frame, text="Hủy", command=self.cancel_selected).pack(side=tk.RIGHT, padx=(10, 0))
 
         # Right Area (Log)
-        log_frame = ttk.LabelFrame(main_frame, text="Nhật ký hoạt động (Logs)", padding=10)
-        log_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        log_frame = ttk.LabelFrame(right_frame, text="Nhật ký hoạt động (Logs)", padding=10)
+        log_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
         self.log_text = scrolledtext.ScrolledText(log_frame, state='disabled', height=20)
         self.log_text.pack(fill=tk.BOTH, expand=True)
@@ -168,36 +470,149 @@ class GitGuiApp:
         # Initialize Logic
         self.io = GuiIO(self.log_text, self.root)
         self.scenarios = GitScenarios(io_handler=self.io)
+        self.tasks = TaskScheduler(on_change=self._task_changed)
+        self._tasks_dirty = False
+        self.root.after(TASK_REFRESH_MS, self._refresh_tasks)
+        self.watcher = None
+        self._status_git = None
+        self._status_text = None
+        self._start_watcher()
         
         # Initial info
         self.io.log(f"Thư mục làm việc: {self.scenarios.git.working_dir}")
         self.io.log("Sẵn sàng.")
 
-    def run_thread(self, target_func):
-        """Run tasks in a separate thread to keep UI responsive"""
-        thread = threading.Thread(target=target_func)
-        thread.daemon = True
-        thread.start()
+    def submit(self, name, target_func, read_only=False):
+        """Đưa thao tác vào hàng đợi (thay vì mỗi lần bấm một thread riêng)"""
+        git = self.scenarios.git
+        git_dir = git.git_dir()
+        # Các worktree của cùng một repo dùng chung refs -> khóa theo thư mục .git chung
+        repo = common_dir(git_dir) if git_dir else git.working_dir
+
+        def run(task):
+            # Mỗi thao tác có GitScenarios/GitCore riêng mang CancelToken của nó: Stop (hay _interrupted
+            # bỏ token) chỉ ảnh hưởng thao tác đó, không đụng thao tác chỉ đọc đang chạy song song
+            scenarios = self.scenarios.fork(cancel_token=task.cancel_token)
+            start_dir = scenarios.git.working_dir
+            result = target_func(scenarios)
+            if not read_only and scenarios.git.working_dir != start_dir:
+                # Chuyển nhánh bằng worktree: các thao tác sau chạy ở thư mục mới
+                self.scenarios.set_working_dir(scenarios.git.working_dir)
+            return result
+
+        task = self.tasks.submit(name, run, repo=repo, read_only=read_only)
+        if task.merged:
+            self.io.log(f"'{name}' đang {'chạy' if task.state == RUNNING else 'chờ'}, bỏ qua yêu cầu trùng.")
+        elif task.state == QUEUED and not read_only:
+            self.io.log(f"'{name}' sẽ chạy sau khi thao tác hiện tại xong.")
+
+    def stop_current(self):
+        if self.tasks.cancel_running():
+            self.io.log("Đang dừng lệnh git hiện tại...")
+
+    def cancel_selected(self):
+        selected = set(self.task_view.selection())
+        for task in list(self.tasks.history):
+            if str(task.id) in selected and task.active:
+                self.tasks.cancel(task)
 
-    def run_push(self):
-        self.scenarios.workflow_push_code()
+    def _task_changed(self, task):
+        # Gọi từ thread làm việc: chỉ đánh dấu, khung hàng đợi được vẽ lại trong luồng Tk
+        self._tasks_dirty = True
+        if task.state == FAILED:
+            self.io.error(f"'{task.name}' gặp lỗi: {task.error}")
+        if not task.active and self.watcher and self.watcher.working_dir != self.scenarios.git.working_dir:
+            # Đã chuyển sang worktree khác -> theo dõi thư mục mới
+            self._start_watcher()
 
-    def run_pull(self):
-        self.scenarios.workflow_pull_code()
+    def _start_watcher(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        git = self.scenarios.git
+        git_dir = git.git_dir()
+        if not git_dir:
+            self.root.after(0, self.status_var.set, "Thư mục hiện tại không phải Git repo.")
+            return
+        # GitCore riêng (dùng chung runner/cache) để đọc status từ thread của watcher
+        self._status_git = GitCore(working_dir=git.working_dir, runner=git.runner)
+        self.watcher = RepoWatcher(git.working_dir, git_dir, on_change=self._refresh_status,
+                                   runner=git.runner).start()
 
-    def run_sync(self):
-        self.scenarios.workflow_sync_main()
+    def _refresh_status(self, kinds):
+        # Chạy trên thread của watcher, chỉ khi repo có thể đã đổi; chỉ vẽ lại khi nội dung khác
+        git = self._status_git
+        if GIT in kinds:
+            cache = git.state_cache()
+            if cache:
+                # Hệ thống file có mtime thô có thể chưa làm đổi chữ ký của cache
+                cache.invalidate()
+        # Sửa file trong working tree không đổi chữ ký .git: đọc lại status, các mục khác giữ cache
+        status = git.repo_status(max_age=0 if WORKTREE in kinds else STATUS_MAX_AGE)
+        text = status.summary() if status else "Không đọc được trạng thái repo."
+        if text != self._status_text:
+            self._status_text = text
+            self.root.after(0, self.status_var.set, text)
 
-    def run_switch(self):
-        self.scenarios.workflow_switch_branch()
+    def _refresh_tasks(self):
+        running = any(t.state == RUNNING for t in self.tasks.history)
+        if self._tasks_dirty or running:
+            self._tasks_dirty = False
+            view = self.task_view
+            history = list(self.tasks.history)
+            keep = {str(t.id) for t in history}
+            stale = [iid for iid in view.get_children() if iid not in keep]
+            if stale:
+                view.delete(*stale)
+            # Sửa tại chỗ (không xóa hết rồi vẽ lại) để không mất dòng người dùng đang chọn
+            for task in history:
+                iid = str(task.id)
+                name = task.name + (f" (x{task.merged + 1})" if task.merged else "")
+                values = (TASK_STATES[task.state], f"{task.duration:.1f}s" if task.started else "-")
+                if view.exists(iid):
+                    view.item(iid, text=name, values=values)
+                else:
+                    view.insert('', 0, iid=iid, text=name, values=values)
+        try:
+            self.root.after(TASK_REFRESH_MS, self._refresh_tasks)
+        except tk.TclError:
+            pass
+
+    def run_push(self, scenarios):
+        scenarios.workflow_push_code()
+
+    def run_pull(self, scenarios):
+        scenarios.workflow_pull_code()
+
+    def run_sync(self, scenarios):
+        scenarios.workflow_sync_main()
+
+    def run_preview_conflicts(self, scenarios):
+        scenarios.workflow_preview_conflicts()
 
-    def run_feature(self):
-        self.scenarios.workflow_new_feature()
+    def run_switch(self, scenarios):
+        scenarios.workflow_switch_branch()
 
-    def run_status(self):
+    def run_feature(self, scenarios):
+        scenarios.workflow_new_feature()
+
+    def run_status(self, scenarios):
         self.io.log("=== STATUS ===")
-        ok, out = self.scenarios.git.status()
+        ok, out = scenarios.git.status()
         self.io.log(out)
 
-    def run_stash(self):
-        self.scenarios.workflow_fix_conflict_stash()
+    def run_stash(self, scenarios):
+        scenarios.workflow_fix_conflict_stash()
+
+    def run_worktrees(self, scenarios):
+        scenarios.workflow_manage_worktrees()
+
+    def quit(self):
+        if self.watcher:
+            self.watcher.stop()
+        self.tasks.shutdown()
+        self.io.close()
+        self.root.quit()
+
+    def toggle_worktree_mode(self):
+        self.scenarios.use_worktrees = self.worktree_mode.get()
@@ -1,5 +1,12 @@
 import sys
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
+
+from .fuzzy import FuzzyIndex
+
+# Danh sách dài hơn mức này thì ConsoleIO.select cho gõ để lọc thay vì in hết
+CONSOLE_SELECT_ROWS = 10
 
 # Fix encoding cho Windows console
 if sys.platform == 'win32':
@@ -31,21 +38,242 @@ class IOHandler(ABC):
     def confirm(self, prompt):
         pass
 
+    @abstractmethod
+    def select(self, prompt, options):
+        pass
+
+    # Câu hỏi dạng Future: workflow hỏi xong làm tiếp việc khác (VD lấy danh sách nhánh)
+    # trong lúc câu hỏi đang hiển thị, rồi mới .result() để lấy câu trả lời.
+    # Mặc định trả lời ngay bằng hàm chặn tương ứng (ScriptedIO, PolicyIO giữ nguyên thứ tự).
+
+    def ask_input(self, prompt):
+        return resolved(self.input, prompt)
+
+    def ask_confirm(self, prompt):
+        return resolved(self.confirm, prompt)
+
+    def ask_select(self, prompt, options):
+        return resolved(self.select, prompt, options)
+
+
+def resolved(func, *args):
+    """Future đã có sẵn kết quả (hoặc lỗi) của func(*args)"""
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
+
+def in_background(func, *args):
+    """Chạy func(*args) trên thread daemon, trả về Future.
+
+    Thread daemon để câu hỏi bị bỏ dở (người dùng không trả lời) không giữ process khi thoát.
+    """
+    future = Future()
+
+    def _run():
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, name='io-ask', daemon=True).start()
+    return future
+
+
+def then(future, func):
+    """Future mới có kết quả func(kết quả của future)"""
+    chained = Future()
+
+    def _done(f):
+        try:
+            chained.set_result(func(f.result()))
+        except BaseException as e:
+            chained.set_exception(e)
+
+    future.add_done_callback(_done)
+    return chained
+
+
 class ConsoleIO(IOHandler):
+    def __init__(self):
+        # Chỉ một thread đọc bàn phím tại một thời điểm. Câu hỏi bị bỏ dở (Ctrl+C) vẫn còn
+        # thread đang chờ dòng tiếp theo -> câu hỏi sau dùng lại thread đó, không mất dòng nhập.
+        self._lock = threading.Lock()
+        self._reader = None
+        # Thông báo từ thread khác trong lúc người dùng đang gõ: in sau khi có câu trả lời
+        self._held = []
+
+    def log(self, message, color=None):
+        self._print(message)
+
+    def error(self, message):
+        self._print(f"\033[91m✘ {message}\033[0m")
+
+    def success(self, message):
+        self._print(f"\033[92m✔ {message}\033[0m")
+
+    def warning(self, message):
+        self._print(f"\033[93m⚠ {message}\033[0m")
+
+    def _print(self, text):
+        with self._lock:
+            if self._held or (self._reader is not None and not self._reader.done()):
+                # In bây giờ sẽ chen vào giữa dòng đang gõ (VD "Đang lấy origin/main..." của bước fetch chạy song song)
+                self._held.append(text)
+                return
+        print(text)
+
+    def _flush(self, _reader=None):
+        while True:
+            with self._lock:
+                held, self._held = self._held, []
+            if not held:
+                return
+            for text in held:
+                print(text)
+
+    def input(self, prompt):
+        return self.ask_input(prompt).result()
+
+    def confirm(self, prompt):
+        return self.ask_confirm(prompt).result()
+
+    def select(self, prompt, options):
+        return self.ask_select(prompt, options).result()
+
+    def ask_input(self, prompt):
+        return self._ask(f"{prompt}: ", str.strip)
+
+    def ask_confirm(self, prompt):
+        return self._ask(f"{prompt} (y/n): ", lambda line: line.lower().strip() == 'y')
+
+    def ask_select(self, prompt, options):
+        """In danh sách đánh số; Enter hoặc số không hợp lệ -> None (hủy).
+        Danh sách dài (VD hàng nghìn nhánh) thì gõ một phần tên để lọc (tìm mờ) rồi chọn số."""
+        if len(options) > CONSOLE_SELECT_ROWS:
+            return in_background(self._type_ahead, prompt, options)
+        print(prompt)
+        for i, option in enumerate(options, 1):
+            print(f"  {i}. {option}")
+
+        def _pick(line):
+            choice = line.strip()
+            if choice.isdigit() and 1 <= int(choice) <= len(options):
+                return options[int(choice) - 1]
+            return None
+
+        return self._ask(f"Chọn (1-{len(options)}, Enter để hủy): ", _pick)
+
+    def _type_ahead(self, prompt, options):
+        index = options if isinstance(options, FuzzyIndex) else FuzzyIndex(options)
+        print(prompt)
+        matches = list(index)
+        while True:
+            shown = matches[:CONSOLE_SELECT_ROWS]
+            for i, option in enumerate(shown, 1):
+                print(f"  {i}. {option}")
+            if len(matches) > len(shown):
+                print(f"  ... và {len(matches) - len(shown)} mục khác")
+            line = self._ask("Gõ để lọc, số để chọn, Enter để hủy: ", str.strip).result()
+            if not line:
+                return None
+            if line.isdigit() and 1 <= int(line) <= len(shown):
+                return shown[int(line) - 1]
+            matches = index.search(line)
+            if not matches:
+                print(f"Không có mục nào khớp '{line}'.")
+                matches = list(index)
+
+    def _ask(self, prompt, parse):
+        with self._lock:
+            if self._reader is None or self._reader.done():
+                self._reader = in_background(input, prompt)
+                # Đăng ký trước then() bên dưới: thông báo để dành được in trước khi workflow chạy tiếp
+                self._reader.add_done_callback(self._flush)
+            else:
+                print(prompt, end='', flush=True)
+            line = self._reader
+        return then(line, parse)
+
+
+class ScriptError(RuntimeError):
+    """ScriptedIO được hỏi nhưng kịch bản đã hết câu trả lời hoặc câu trả lời sai loại"""
+
+
+class ScriptedIO(IOHandler):
+    """IOHandler trả lời confirm/input/select theo kịch bản có sẵn và ghi lại mọi thứ đã xảy ra.
+
+    answers là danh sách câu trả lời theo đúng thứ tự câu hỏi. Mỗi phần tử là giá trị trả lời
+    (bool cho confirm, chuỗi cho input, tên lựa chọn hoặc số thứ tự cho select), hoặc
+    (loại, giá trị) với loại là 'confirm'/'input'/'select' để kiểm tra đúng loại câu hỏi.
+
+        io = ScriptedIO([True, "Sửa lỗi đăng nhập", ('confirm', True)])
+        GitScenarios(io_handler=io).workflow_push_code()
+        io.transcript  # [('confirm', 'Bạn có muốn thêm...', True), ...]
+    """
+
+    def __init__(self, answers=(), strict=True):
+        self.answers = list(answers)
+        # strict: hết kịch bản thì báo lỗi; không strict: confirm -> False, input -> '', select -> None
+        self.strict = strict
+        self.transcript = []
+        self.lines = []
+        self.errors = []
+        self.warnings = []
+        self.successes = []
+
+    @property
+    def remaining(self):
+        return len(self.answers)
+
+    def _next(self, kind, prompt, default):
+        if not self.answers:
+            if self.strict:
+                raise ScriptError(f"Hết kịch bản khi được hỏi ({kind}): {prompt}")
+            return default
+        answer = self.answers.pop(0)
+        if isinstance(answer, tuple) and len(answer) == 2 and answer[0] in ('confirm', 'input', 'select'):
+            expected, answer = answer
+            if expected != kind:
+                raise ScriptError(f"Kịch bản chờ câu hỏi {expected} nhưng gặp {kind}: {prompt}")
+        return answer
+
     def log(self, message, color=None):
-        print(message)
+        self.lines.append(str(message))
 
     def error(self, message):
-        print(f"\033[91m✘ {message}\033[0m")
+        self.errors.append(message)
+        self.lines.append(f"✘ {message}")
 
     def success(self, message):
-        print(f"\033[92m✔ {message}\033[0m")
+        self.successes.append(message)
+        self.lines.append(f"✔ {message}")
 
     def warning(self, message):
-        print(f"\033[93m⚠ {message}\033[0m")
+        self.warnings.append(message)
+        self.lines.append(f"⚠ {message}")
 
     def input(self, prompt):
-        return input(f"{prompt}: ").strip()
+        answer = self._next('input', prompt, '')
+        answer = '' if answer is None else str(answer)
+        self.transcript.append(('input', prompt, answer))
+        return answer
 
     def confirm(self, prompt):
-        return input(f"{prompt} (y/n): ").lower().strip() == 'y'
+        answer = bool(self._next('confirm', prompt, False))
+        self.transcript.append(('confirm', prompt, answer))
+        return answer
+
+    def select(self, prompt, options):
+        answer = self._next('select', prompt, None)
+        if isinstance(answer, int) and not isinstance(answer, bool):
+            answer = options[answer] if 0 <= answer < len(options) else None
+        elif answer not in options:
+            if self.strict and answer is not None:
+                raise ScriptError(f"Lựa chọn {answer!r} không có trong danh sách: {prompt}")
+            answer = None
+        self.transcript.append(('select', prompt, answer))
+        return answer
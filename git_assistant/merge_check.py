@@ -0,0 +1,55 @@
+"""Dự đoán xung đột của một lần merge mà không đụng tới working tree/index.
+
+Dựa trên `git merge-tree --write-tree` (git >= 2.38): git merge hai commit hoàn toàn trong
+object database và chỉ in ra tree kết quả cùng danh sách file xung đột.
+"""
+import re
+
+MIN_GIT_VERSION = (2, 38)
+
+_OID_RE = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+
+
+class MergePrediction:
+    """Kết quả merge thử `theirs` vào `ours`"""
+    __slots__ = ('ours', 'theirs', 'tree', 'conflicts')
+
+    def __init__(self, ours, theirs, tree, conflicts=()):
+        self.ours = ours
+        self.theirs = theirs
+        self.tree = tree              # tree kết quả (có marker xung đột nếu không clean)
+        self.conflicts = list(conflicts)
+
+    @property
+    def clean(self):
+        return not self.conflicts
+
+    def format(self, limit=20):
+        if self.clean:
+            return f"Merge {self.theirs} vào {self.ours}: không có xung đột."
+        lines = [f"Merge {self.theirs} vào {self.ours}: xung đột ở {len(self.conflicts)} file:"]
+        lines.extend(f"  ✘ {path}" for path in self.conflicts[:limit])
+        if len(self.conflicts) > limit:
+            lines.append(f"  ... và {len(self.conflicts) - limit} file khác")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"MergePrediction({self.theirs!r} -> {self.ours!r}, conflicts={len(self.conflicts)})"
+
+
+def parse_merge_tree(output, ours, theirs):
+    """Đọc output của `merge-tree --write-tree --name-only --no-messages -z`.
+
+    Trả về MergePrediction, None nếu output không phải kết quả merge (VD revision không tồn tại).
+    """
+    fields = output.split('\0')
+    if not fields or not _OID_RE.match(fields[0].strip()):
+        return None
+    conflicts = []
+    for path in fields[1:]:
+        if not path:
+            # Một \0 trống đánh dấu hết danh sách file
+            break
+        if path not in conflicts:
+            conflicts.append(path)
+    return MergePrediction(ours, theirs, fields[0].strip(), conflicts)
@@ -0,0 +1,106 @@
+import re
+
+# VD: "remote: Counting objects: 100% (12/12), done."
+#     "Receiving objects:  45% (450/1000), 1.20 MiB | 2.50 MiB/s"
+#     "Resolving deltas: 100% (300/300), done."
+#     "Receiving objects: 100% (3/3), 254 bytes | 254.00 KiB/s, done."  (dưới 1 KiB git ghi "bytes")
+_UNIT = r'(?:[KMGT]?i?B|bytes?)'
+_PROGRESS_RE = re.compile(
+    r'^(?:remote:\s*)?(?P<phase>[A-Za-z][A-Za-z ]*?):\s+(?P<percent>\d+)%\s+'
+    r'\((?P<current>\d+)/(?P<total>\d+)\)'
+    r'(?:,\s+(?P<size>[\d.]+\s+' + _UNIT + r'))?'
+    r'(?:\s+\|\s+(?P<rate>[\d.]+\s+' + _UNIT + r'/s))?'
+    r'(?P<done>,\s+done\.?)?'
+)
+
+_UNITS = {'B': 1, 'byte': 1, 'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4,
+          'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4}
+
+
+def parse_size(text):
+    """'1.50 MiB' -> số byte (int), None nếu không đọc được"""
+    if not text:
+        return None
+    parts = text.replace('/s', '').split()
+    if len(parts) != 2 or parts[1] not in _UNITS:
+        return None
+    try:
+        return int(float(parts[0]) * _UNITS[parts[1]])
+    except ValueError:
+        return None
+
+
+class ProgressEvent:
+    """Một mốc tiến độ git in ra khi chạy với --progress"""
+    __slots__ = ('phase', 'percent', 'current', 'total', 'bytes', 'rate', 'done', 'remote', 'source')
+
+    def __init__(self, phase, percent, current, total, bytes=None, rate=None, done=False, remote=False):
+        self.phase = phase
+        self.percent = percent
+        self.current = current
+        self.total = total
+        self.bytes = bytes      # số byte đã nhận/gửi (chỉ có ở Receiving/Writing objects)
+        self.rate = rate        # tốc độ, byte/giây
+        self.done = done
+        self.remote = remote    # dòng do server in ra ("remote: ...")
+        self.source = None      # tên remote khi nhiều lệnh fetch chạy song song
+
+    def format(self):
+        text = f"{self.phase}: {self.percent}% ({self.current}/{self.total})"
+        if self.bytes is not None:
+            text += f", {format_bytes(self.bytes)}"
+        if self.rate is not None:
+            text += f" | {format_bytes(self.rate)}/s"
+        if self.done:
+            text += ", xong."
+        return text
+
+    def __repr__(self):
+        return f"ProgressEvent({self.format()!r})"
+
+
+def parse_progress(line):
+    """Đọc một dòng stderr của git, trả về ProgressEvent hoặc None nếu không phải dòng tiến độ"""
+    line = line.strip()
+    m = _PROGRESS_RE.match(line)
+    if not m:
+        return None
+    return ProgressEvent(
+        phase=m.group('phase').strip(),
+        percent=int(m.group('percent')),
+        current=int(m.group('current')),
+        total=int(m.group('total')),
+        bytes=parse_size(m.group('size')),
+        rate=parse_size(m.group('rate')),
+        done=bool(m.group('done')),
+        remote=line.startswith('remote:'),
+    )
+
+
+def format_bytes(n):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unit == 'GiB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.2f} {unit}"
+        n /= 1024.0
+
+
+class ProgressThrottle:
+    """Lọc bớt sự kiện tiến độ để log không bị tràn (git cập nhật nhiều lần mỗi giây).
+
+    Chỉ cho qua khi đổi giai đoạn, khi xong, hoặc khi phần trăm tăng ít nhất `step`.
+    """
+
+    def __init__(self, step=25):
+        self.step = step
+        self._phase = None
+        self._last = -1
+
+    def should_report(self, event):
+        if event.phase != self._phase:
+            self._phase = event.phase
+            self._last = event.percent
+            return True
+        if event.done or event.percent >= self._last + self.step:
+            self._last = event.percent
+            return True
+        return False
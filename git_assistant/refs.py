@@ -0,0 +1,316 @@
+"""Đọc ref trực tiếp từ thư mục .git (HEAD, loose refs, packed-refs) không cần chạy git.
+
+Chỉ dùng cho các câu hỏi chỉ đọc ("đang ở nhánh nào", "có những nhánh local nào").
+Gặp định dạng không hiểu (reftable, file ref lạ...) thì ném UnsupportedRefStorage
+để GitCore quay về dùng git CLI.
+"""
+import os
+import threading
+
+from .cache import common_dir
+
+MAX_SYMREF_DEPTH = 5
+
+
+class UnsupportedRefStorage(Exception):
+    pass
+
+
+def find_git_dir(path):
+    """Tìm thư mục git cho path (đi ngược lên thư mục cha).
+
+    Hỗ trợ file `.git` dạng `gitdir: ...` (worktree, submodule). Trả về None nếu không
+    tìm thấy hoặc nếu môi trường đang ép GIT_DIR (để git CLI xử lý).
+    """
+    if os.environ.get('GIT_DIR'):
+        return None
+    path = os.path.abspath(path)
+    while True:
+        dotgit = os.path.join(path, '.git')
+        if os.path.isdir(dotgit):
+            return dotgit
+        if os.path.isfile(dotgit):
+            try:
+                with open(dotgit, encoding='utf-8') as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if not line.startswith('gitdir:'):
+                return None
+            target = line[len('gitdir:'):].strip()
+            return os.path.normpath(os.path.join(path, target))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _config_value(path, section, key):
+    """Giá trị cuối cùng của section.key trong file config của git, None nếu không có.
+
+    Chỉ đọc đúng file (không theo include), đủ cho các khóa core/extensions của repo.
+    Khóa không có giá trị (`key` đứng một mình) là boolean true.
+    """
+    section, key = section.lower(), key.lower()
+    value = None
+    current = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('['):
+                end = line.find(']')
+                if end < 0:
+                    continue
+                header = line[1:end].strip()
+                # [section "subsection"] khác với [section]; tên section không phân biệt hoa thường
+                current = header.lower() if '"' not in header and ' ' not in header else None
+                line = line[end + 1:].strip()
+            if not line or line[0] in '#;' or current != section:
+                continue
+            name, eq, raw = line.partition('=')
+            if name.strip().lower() != key:
+                continue
+            value = _parse_config_value(raw) if eq else 'true'
+    return value
+
+
+def _parse_config_value(raw):
+    # Bỏ comment (# ;) ngoài dấu nháy và bỏ dấu nháy
+    out = []
+    quoted = False
+    for ch in raw.strip():
+        if ch == '"':
+            quoted = not quoted
+        elif ch in '#;' and not quoted:
+            break
+        else:
+            out.append(ch)
+    return ''.join(out).strip()
+
+
+class PackedRefs:
+    """Index của file packed-refs, đọc vào bộ nhớ và tra cứu bằng tìm kiếm nhị phân.
+
+    File packed-refs có header `# pack-refs with: ... sorted` thì các dòng đã được
+    sắp xếp theo tên ref. Nếu không có trait `sorted`, đọc toàn bộ vào dict.
+    Không giữ file mở giữa các lần đọc: trên Windows file đang mở (hay đang được map)
+    sẽ chặn git rename packed-refs mới vào chỗ cũ. Đọc lại khi chữ ký stat thay đổi.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._sig = None
+        self._data = None
+        self._start = 0
+        self._unsorted = None
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._close()
+            self._sig = None
+            return False
+        sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if sig == self._sig:
+            return self._data is not None or self._unsorted is not None
+        self._close()
+        try:
+            with open(self.path, 'rb') as f:
+                # Chữ ký lấy từ chính file đã mở: git có thể vừa thay file sau lần stat ở trên
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            self._sig = None
+            return False
+        self._sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if not data:
+            return False
+
+        self._data = data
+        self._start = 0
+        sorted_refs = False
+        if self._data[:1] == b'#':
+            eol = self._data.find(b'\n')
+            header = self._data[:eol if eol >= 0 else len(self._data)]
+            sorted_refs = b' sorted' in header
+            self._start = eol + 1 if eol >= 0 else len(self._data)
+
+        if not sorted_refs:
+            self._unsorted = {}
+            for line in self._data[self._start:].split(b'\n'):
+                if line and line[:1] not in (b'^', b'#'):
+                    oid, _, name = line.partition(b' ')
+                    self._unsorted[name.decode('utf-8', 'surrogateescape')] = oid.decode('ascii')
+            self._data = None
+        return True
+
+    def _close(self):
+        self._data = None
+        self._unsorted = None
+
+    def _record_start(self, pos):
+        """Vị trí đầu dòng ref chứa pos (bỏ qua dòng peeled `^...`)"""
+        data = self._data
+        start = data.rfind(b'\n', self._start, pos) + 1
+        if start < self._start:
+            start = self._start
+        while data[start:start + 1] == b'^' and start > self._start:
+            start = data.rfind(b'\n', self._start, start - 1) + 1
+            if start < self._start:
+                start = self._start
+        return start
+
+    def _next_record(self, start):
+        data = self._data
+        end = data.find(b'\n', start)
+        end = len(data) if end < 0 else end + 1
+        while data[end:end + 1] == b'^':
+            nxt = data.find(b'\n', end)
+            end = len(data) if nxt < 0 else nxt + 1
+        return end
+
+    def _name_at(self, start):
+        data = self._data
+        end = data.find(b'\n', start)
+        line = data[start:end if end >= 0 else len(data)]
+        oid, _, name = line.partition(b' ')
+        return name, oid
+
+    def _lower_bound(self, target):
+        """Vị trí của ref đầu tiên có tên >= target"""
+        lo, hi = self._start, len(self._data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._record_start(mid)
+            name, _ = self._name_at(start)
+            if name < target:
+                lo = self._next_record(start)
+            else:
+                hi = start
+        return lo
+
+    def get(self, refname):
+        """SHA của ref trong packed-refs, None nếu không có"""
+        if not self._load():
+            return None
+        if self._unsorted is not None:
+            return self._unsorted.get(refname)
+        target = refname.encode('utf-8', 'surrogateescape')
+        pos = self._lower_bound(target)
+        if pos >= len(self._data):
+            return None
+        name, oid = self._name_at(pos)
+        return oid.decode('ascii') if name == target else None
+
+    def names(self, prefix):
+        """Tên các ref bắt đầu bằng prefix"""
+        if not self._load():
+            return []
+        if self._unsorted is not None:
+            return sorted(n for n in self._unsorted if n.startswith(prefix))
+        target = prefix.encode('utf-8', 'surrogateescape')
+        pos = self._lower_bound(target)
+        result = []
+        size = len(self._data)
+        while pos < size:
+            name, _ = self._name_at(pos)
+            if not name.startswith(target):
+                break
+            result.append(name.decode('utf-8', 'surrogateescape'))
+            pos = self._next_record(pos)
+        return result
+
+
+class RefReader:
+    """Đọc HEAD và các ref của một repo mà không chạy process git"""
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self.common_dir = common_dir(git_dir)
+        self._check_format()
+        self.packed = PackedRefs(os.path.join(self.common_dir, 'packed-refs'))
+        self._lock = threading.Lock()
+
+    def _check_format(self):
+        if os.path.isdir(os.path.join(self.common_dir, 'reftable')):
+            raise UnsupportedRefStorage("reftable")
+        try:
+            storage = _config_value(os.path.join(self.common_dir, 'config'), 'extensions', 'refStorage')
+        except OSError:
+            raise UnsupportedRefStorage("không đọc được config")
+        # refStorage = files là định dạng mặc định, vẫn đọc được
+        if storage is not None and storage.lower() != 'files':
+            raise UnsupportedRefStorage(f"extensions.refStorage = {storage}")
+
+    def _ref_dir(self, refname):
+        # Các ref riêng của từng worktree nằm trong git_dir, còn lại dùng chung trong common_dir
+        if refname == 'HEAD' or refname.startswith(('refs/bisect/', 'refs/worktree/', 'refs/rewritten/')):
+            return self.git_dir
+        return self.common_dir
+
+    def _read_loose(self, refname):
+        path = os.path.join(self._ref_dir(refname), *refname.split('/'))
+        try:
+            with open(path, 'rb') as f:
+                content = f.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+        text = content.decode('utf-8', 'surrogateescape')
+        if text.startswith('ref:'):
+            return ('ref', text[4:].strip())
+        if len(text) in (40, 64) and all(c in '0123456789abcdef' for c in text):
+            return ('oid', text)
+        raise UnsupportedRefStorage(f"không hiểu nội dung ref {refname}")
+
+    def head(self):
+        """('ref', 'refs/heads/main') hoặc ('oid', sha) khi detached"""
+        value = self._read_loose('HEAD')
+        if value is None:
+            raise UnsupportedRefStorage("không có HEAD")
+        return value
+
+    def current_branch(self):
+        """Tên nhánh hiện tại, 'HEAD' nếu detached (giống `rev-parse --abbrev-ref HEAD`)"""
+        kind, value = self.head()
+        if kind == 'oid':
+            return 'HEAD'
+        if value.startswith('refs/heads/'):
+            return value[len('refs/heads/'):]
+        return value
+
+    def resolve(self, refname):
+        """SHA mà ref trỏ tới (đi theo symbolic ref), None nếu ref không tồn tại"""
+        with self._lock:
+            for _ in range(MAX_SYMREF_DEPTH):
+                value = self._read_loose(refname)
+                if value is None:
+                    return self.packed.get(refname)
+                kind, target = value
+                if kind == 'oid':
+                    return target
+                refname = target
+        raise UnsupportedRefStorage("symbolic ref lồng nhau quá sâu")
+
+    def symbolic_target(self, refname):
+        """Ref mà symbolic ref trỏ tới (VD refs/remotes/origin/HEAD), None nếu không phải symref"""
+        value = self._read_loose(refname)
+        if value and value[0] == 'ref':
+            return value[1]
+        return None
+
+    def list_refs(self, prefix):
+        """Tên đầy đủ các ref dưới prefix (VD 'refs/heads/'), gộp loose và packed"""
+        with self._lock:
+            names = set(self.packed.names(prefix))
+        root = os.path.join(self.common_dir, *prefix.rstrip('/').split('/'))
+        for dirpath, _, filenames in os.walk(root):
+            rel = os.path.relpath(dirpath, self.common_dir).replace(os.sep, '/')
+            for fn in filenames:
+                if fn.endswith('.lock'):
+                    continue
+                names.add(f"{rel}/{fn}")
+        return sorted(names)
+
+    def local_branches(self):
+        return sorted(name[len('refs/heads/'):] for name in self.list_refs('refs/heads/'))
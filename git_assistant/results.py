@@ -0,0 +1,68 @@
+import threading
+
+
+class GitResult(tuple):
+    """Kết quả một lệnh git, vẫn unpack được như cũ: `ok, out = git.pull()`"""
+    timed_out = False
+    cancelled = False
+
+    def __new__(cls, success, output):
+        return tuple.__new__(cls, (bool(success), output))
+
+    @property
+    def success(self):
+        return self[0]
+
+    @property
+    def output(self):
+        return self[1]
+
+    def __repr__(self):
+        return f"{type(self).__name__}(success={self[0]!r}, output={self[1]!r})"
+
+
+class TimedOut(GitResult):
+    """Lệnh bị dừng vì chạy quá thời gian cho phép"""
+    timed_out = True
+
+    def __new__(cls, output, timeout=None):
+        self = GitResult.__new__(cls, False, output)
+        self.timeout = timeout
+        return self
+
+
+class Cancelled(GitResult):
+    """Lệnh bị người dùng hủy (nút Stop / CancelToken.cancel())"""
+    cancelled = True
+
+    def __new__(cls, output="Đã hủy thao tác."):
+        return GitResult.__new__(cls, False, output)
+
+
+class CommandTimeout(Exception):
+    def __init__(self, args, timeout):
+        Exception.__init__(self, f"Lệnh git {' '.join(args)} bị timeout (quá {timeout} giây)")
+        self.timeout = timeout
+
+
+class CommandCancelled(Exception):
+    def __init__(self, args):
+        Exception.__init__(self, f"Đã hủy lệnh git {' '.join(args)}")
+
+
+class CancelToken:
+    """Cờ hủy dùng chung giữa GUI (nút Stop) và luồng đang chạy lệnh git"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Chờ tới khi bị hủy hoặc hết timeout, trả về True nếu đã bị hủy"""
+        return self._event.wait(timeout)
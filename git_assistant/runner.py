@@ -0,0 +1,399 @@
+import atexit
+import contextlib
+import itertools
+import locale
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from .results import CommandCancelled, CommandTimeout
+
+# Git dùng \r để vẽ lại dòng tiến độ, coi nó như xuống dòng
+_LINE_SPLIT = re.compile(rb'[\r\n]')
+
+# Chu kỳ kiểm tra CancelToken khi đang chờ git (giây)
+POLL_INTERVAL = 0.1
+
+NETWORK_COMMANDS = {'fetch', 'pull', 'push', 'clone', 'ls-remote'}
+
+
+def git_subcommand(args):
+    """Tên lệnh con của git trong args (bỏ qua các option chung như `-c key=value`)"""
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        if arg in ('-c', '-C', '--git-dir', '--work-tree'):
+            skip = True
+            continue
+        if not arg.startswith('-'):
+            return arg
+    return None
+
+
+# Cho phép git/ssh hỏi mật khẩu, passphrase trên terminal (CLI). None = tự xác định theo việc
+# process có terminal điều khiển hay không; GUI và fleet tắt đi vì không có ai trả lời ở terminal.
+_terminal_prompts = None
+_has_tty = None
+
+
+def set_terminal_prompts(enabled):
+    """Bật/tắt việc để git hỏi trên terminal. Tắt thì git chạy với GIT_TERMINAL_PROMPT=0"""
+    global _terminal_prompts
+    _terminal_prompts = enabled
+
+
+def terminal_prompts():
+    global _has_tty
+    if _terminal_prompts is not None:
+        return _terminal_prompts
+    if _has_tty is None:
+        _has_tty = _controlling_tty()
+    return _has_tty
+
+
+def _controlling_tty():
+    if os.name != 'posix':
+        return sys.stdin is not None and sys.stdin.isatty()
+    try:
+        fd = os.open('/dev/tty', os.O_RDWR)
+    except OSError:
+        return False
+    os.close(fd)
+    return True
+
+
+class SubprocessRunner:
+    """Chạy mỗi lệnh git bằng một process mới (cách cũ, dùng làm fallback)"""
+
+    def run(self, args, cwd, read_only=False, timeout=None, cancel=None):
+        """Chạy `git <args>` trong cwd, trả về (returncode, stdout, stderr).
+
+        timeout: số giây tối đa; cancel: CancelToken. Quá giờ hoặc bị hủy thì cả process group
+        của git bị kill và ném CommandTimeout / CommandCancelled.
+        """
+        return self._run(args, cwd, self._env(cwd, read_only), timeout, cancel)
+
+    def _run(self, args, cwd, env, timeout=None, cancel=None):
+        # Luôn đọc output dạng bytes và giải mã sau, để mỗi lệnh git chỉ chạy đúng một lần
+        code, stdout, stderr = self._exec(['git'] + args, cwd, env, timeout, cancel)
+        return code, decode_output(stdout), decode_output(stderr)
+
+    def _exec(self, full_cmd, cwd, env, timeout, cancel):
+        if cancel is not None and cancel.cancelled:
+            raise CommandCancelled(full_cmd[1:])
+        proc = subprocess.Popen(
+            full_cmd,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            **_new_group_kwargs(full_cmd[1:])
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                wait = POLL_INTERVAL if cancel is not None else None
+                if deadline is not None:
+                    left = max(0.0, deadline - time.monotonic())
+                    wait = left if wait is None else min(wait, left)
+                try:
+                    stdout, stderr = proc.communicate(timeout=wait)
+                    return proc.returncode, stdout, stderr
+                except subprocess.TimeoutExpired:
+                    pass
+                if cancel is not None and cancel.cancelled:
+                    kill_process_tree(proc)
+                    raise CommandCancelled(full_cmd[1:])
+                if deadline is not None and time.monotonic() >= deadline:
+                    kill_process_tree(proc)
+                    raise CommandTimeout(full_cmd[1:], timeout)
+        finally:
+            if proc.poll() is None:
+                kill_process_tree(proc)
+
+    def stream(self, args, cwd, read_only=False, timeout=None, cancel=None, sep=None):
+        """Chạy `git <args>` và yield (tên stream, dòng) ngay khi git in ra.
+
+        Tên stream là 'stdout' hoặc 'stderr'. Dòng cuối cùng là ('exit', returncode).
+        timeout ở đây tính theo thời gian *không có output*: fetch chậm nhưng vẫn báo tiến độ
+        thì không bị ngắt, còn lệnh bị treo (chờ nhập mật khẩu, mạng đứng) thì bị kill.
+        sep: byte ngăn cách record thay cho CR/LF, VD b'\\0' cho output `-z`.
+        """
+        if cancel is not None and cancel.cancelled:
+            raise CommandCancelled(args)
+        proc = subprocess.Popen(
+            ['git'] + args,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self._env(cwd, read_only),
+            **_new_group_kwargs(args)
+        )
+        lines = queue.Queue()
+        split = _LINE_SPLIT if sep is None else re.compile(re.escape(sep))
+        pumps = [
+            threading.Thread(target=_pump, args=(proc.stdout, 'stdout', lines, split), daemon=True),
+            threading.Thread(target=_pump, args=(proc.stderr, 'stderr', lines), daemon=True),
+        ]
+        for t in pumps:
+            t.start()
+        try:
+            remaining = len(pumps)
+            last_output = time.monotonic()
+            while remaining:
+                try:
+                    name, line = lines.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if cancel is not None and cancel.cancelled:
+                        kill_process_tree(proc)
+                        raise CommandCancelled(args)
+                    if timeout is not None and time.monotonic() - last_output >= timeout:
+                        kill_process_tree(proc)
+                        raise CommandTimeout(args, timeout)
+                    continue
+                last_output = time.monotonic()
+                if line is None:
+                    remaining -= 1
+                    continue
+                yield name, line
+            yield 'exit', proc.wait()
+        finally:
+            # Người gọi dừng giữa chừng (break / close generator) -> không để process chạy tiếp
+            if proc.poll() is None:
+                kill_process_tree(proc)
+
+    def resolve(self, cwd, rev):
+        """Đổi tên revision (HEAD, main, origin/main...) sang SHA, None nếu không có"""
+        code, out, _ = self.run(['rev-parse', '--verify', '-q', rev + '^{commit}'], cwd, read_only=True)
+        return out.strip() if code == 0 else None
+
+    def close(self):
+        pass
+
+    def _env(self, cwd, read_only):
+        prompts = terminal_prompts()
+        if not read_only and prompts:
+            return None
+        env = os.environ.copy()
+        if read_only:
+            # Lệnh chỉ đọc không cần ghi lại index (tránh tranh chấp index.lock)
+            env['GIT_OPTIONAL_LOCKS'] = '0'
+        if not prompts:
+            # Không có ai trả lời ở terminal: git báo lỗi ngay thay vì chờ nhập mật khẩu
+            env['GIT_TERMINAL_PROMPT'] = '0'
+        return env
+
+
+def decode_output(data):
+    """Giải mã output của git: thử utf-8, rồi encoding của hệ thống (VD cp1252 trên Windows),
+    cuối cùng utf-8 thay ký tự lỗi bằng U+FFFD"""
+    if not data:
+        return ''
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+    fallback = locale.getpreferredencoding(False)
+    if fallback and fallback.lower().replace('-', '') != 'utf8':
+        try:
+            return data.decode(fallback)
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return data.decode('utf-8', 'replace')
+
+
+def _new_group_kwargs(args):
+    """Tham số Popen để git chạy trong process group riêng (kill được cả hook, ssh, credential helper).
+
+    Session mới không còn terminal điều khiển, nên với lệnh mạng khi được phép hỏi trên terminal
+    (CLI: HTTPS không có credential helper, khóa SSH có passphrase) git chạy chung session;
+    lúc đó hết giờ/hủy chỉ kill được chính process git.
+    """
+    if os.name == 'posix':
+        if git_subcommand(args) in NETWORK_COMMANDS and terminal_prompts():
+            return {}
+        return {'start_new_session': True}
+    return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+def kill_process_tree(proc):
+    """Kill git cùng toàn bộ process con của nó và chờ kết thúc hẳn"""
+    try:
+        if os.name == 'posix':
+            # Chỉ kill cả group khi git là trưởng group riêng (không phải group của chính mình)
+            if os.getpgid(proc.pid) == proc.pid:
+                os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+    if proc.poll() is None:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def _pump(pipe, name, lines, split=_LINE_SPLIT):
+    """Đọc pipe theo từng đoạn, tách dòng theo CR hoặc LF (hoặc theo split) và đẩy vào queue"""
+    buf = b''
+    try:
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            buf += chunk
+            parts = split.split(buf)
+            buf = parts.pop()
+            for part in parts:
+                if part:
+                    lines.put((name, decode_output(part)))
+        if buf:
+            lines.put((name, decode_output(buf)))
+    finally:
+        pipe.close()
+        lines.put((name, None))
+
+
+class _RepoInfo:
+    """Thông tin repo đã tìm được cho một thư mục làm việc"""
+
+    def __init__(self, git_dir, work_tree):
+        self.git_dir = git_dir
+        self.work_tree = work_tree
+
+
+class DiscoveryCachingRunner(SubprocessRunner):
+    """Runner nhớ kết quả repo discovery cho từng thư mục.
+
+    Repo discovery (tìm .git, đọc config) chỉ làm một lần cho mỗi thư mục, các lệnh chỉ đọc
+    sau đó được chạy với GIT_DIR/GIT_WORK_TREE có sẵn. Mỗi lệnh vẫn là một process git riêng:
+    những thông tin đọc được mà không cần git (nhánh hiện tại, danh sách nhánh, ref) thì
+    GitCore đọc thẳng từ .git qua RefReader.
+    """
+
+    def __init__(self):
+        self._repos = {}
+        self._lock = threading.Lock()
+        # Hàm được gọi sau mỗi lệnh git runner tự chạy (rev-parse của repo discovery) với
+        # (args, cwd, start, duration, code, out_bytes), để tracing ghi lại được
+        self.listeners = []
+
+    def repo_info(self, cwd):
+        """Trả về _RepoInfo của cwd, None nếu cwd không nằm trong repo git"""
+        key = os.path.abspath(cwd)
+        with self._lock:
+            if key in self._repos:
+                return self._repos[key]
+
+        args = ['rev-parse', '--absolute-git-dir', '--show-toplevel']
+        start = time.perf_counter()
+        code, out, err = self._run(args, key, SubprocessRunner._env(self, key, True))
+        for listener in self.listeners:
+            listener(args, key, start, time.perf_counter() - start, code, len(out) + len(err))
+        lines = out.splitlines() if code == 0 else []
+        info = None
+        if len(lines) == 2:
+            info = _RepoInfo(lines[0], lines[1])
+
+        with self._lock:
+            # Chỉ cache khi tìm thấy repo, để `git init` sau đó vẫn được nhận ra
+            if info:
+                self._repos.setdefault(key, info)
+                info = self._repos[key]
+        return info
+
+    def _env(self, cwd, read_only):
+        env = SubprocessRunner._env(self, cwd, read_only)
+        if not read_only:
+            return env
+        # Lệnh ghi (commit, checkout, worktree...) vẫn để git tự tìm repo
+        # vì GIT_DIR sẽ bị kế thừa xuống hook và các process con.
+        info = self.repo_info(cwd)
+        if info:
+            env['GIT_DIR'] = info.git_dir
+            env['GIT_WORK_TREE'] = info.work_tree
+        return env
+
+    def close(self):
+        """Quên thông tin repo đã nhớ"""
+        with self._lock:
+            self._repos.clear()
+
+
+# Nhóm lệnh chạy song song mà thread hiện tại thuộc về (VD fetch từng remote của FetchEngine),
+# để runner ghi transcript biết những lệnh nào có thể đổi thứ tự giữa các lần chạy
+_parallel = threading.local()
+_parallel_ids = itertools.count(1)
+
+
+def new_parallel_group():
+    """Mã mới cho một nhóm lệnh song song"""
+    return next(_parallel_ids)
+
+
+@contextlib.contextmanager
+def parallel_group(group):
+    """Các lệnh chạy trên thread hiện tại trong khối này thuộc nhóm song song group (None = không)"""
+    previous = getattr(_parallel, 'group', None)
+    _parallel.group = group
+    try:
+        yield
+    finally:
+        _parallel.group = previous
+
+
+def current_parallel_group():
+    return getattr(_parallel, 'group', None)
+
+
+_git_version = None
+
+
+def git_version():
+    """Phiên bản git đang cài, dạng tuple (2, 39, 5); (0,) nếu không xác định được"""
+    global _git_version
+    if _git_version is None:
+        try:
+            out = subprocess.run(['git', 'version'], capture_output=True).stdout.decode('ascii', 'replace')
+            # "git version 2.39.5" hoặc "git version 2.39.5.windows.1"
+            parts = out.split()[2].split('.')
+            _git_version = tuple(int(p) for p in parts[:3] if p.isdigit())
+        except (OSError, IndexError, ValueError):
+            _git_version = (0,)
+    return _git_version
+
+
+_default_runner = None
+_default_lock = threading.Lock()
+
+
+def set_default_runner(runner):
+    """Thay runner mặc định cho các GitCore tạo sau đó (VD bọc thêm tracing)"""
+    global _default_runner
+    with _default_lock:
+        _default_runner = runner
+
+
+def default_runner():
+    """Runner dùng chung cho mọi GitCore (DiscoveryCachingRunner)"""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = DiscoveryCachingRunner()
+            atexit.register(_default_runner.close)
+        return _default_runner
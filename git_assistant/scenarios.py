@@ -1,20 +1,88 @@
+import os
+
 from .core import GitCore
+from .cache import common_dir
 from .io_handler import IOHandler, ConsoleIO
+from .utils import format_age
+from .progress import ProgressThrottle
+from .tracing import traced_step
+from .fuzzy import FuzzyIndex
+
+# Lựa chọn đầu tiên của hộp chọn nhánh khi dữ liệu remote đã cũ (GitCore.fetch_ttl)
+REFRESH_REMOTE = "⟳ Fetch lại dữ liệu remote"
+
+# Số commit/file tối đa hiển thị khi xem trước thay đổi sắp pull về
+PREVIEW_COMMITS = 20
+PREVIEW_FILES = 30
+
+
+def _reason(output):
+    """Dòng mô tả lỗi rõ nhất trong output của git (`! [rejected]`, `fatal:`, `error:`)"""
+    return next((l.strip() for l in output.splitlines()
+                 if l.strip().startswith(('!', 'fatal:', 'error:'))), output)
+
+
+def _non_fast_forward(output):
+    """git từ chối cập nhật ref vì không fast-forward được (nhánh local có commit chưa đẩy lên)"""
+    return '[rejected]' in output or 'non-fast-forward' in output
+
 
 class GitScenarios:
-    def __init__(self, io_handler: IOHandler = None):
+    def __init__(self, io_handler: IOHandler = None, working_dir=None):
         self.io = io_handler if io_handler else ConsoleIO()
-        self.git = GitCore(io_handler=self.io)
+        self.git = GitCore(working_dir=working_dir, io_handler=self.io)
+        self._throttles = {}
+        # Cách đưa code main vào nhánh hiện tại khi Sync: 'merge' hoặc 'rebase'
+        self.sync_strategy = 'merge'
+        # True: chuyển nhánh bằng worktree (mỗi nhánh một thư mục) thay vì stash + checkout
+        self.use_worktrees = False
+
+    def set_working_dir(self, path):
+        """Chuyển các thao tác sau sang thư mục khác (VD worktree của nhánh khác), giữ runner cũ"""
+        self.git = self.git.copy(working_dir=path)
+
+    def fork(self, cancel_token=None):
+        """Bản sao cho một thao tác chạy song song với thao tác khác (GUI): cùng IO, runner và
+        cấu hình, nhưng GitCore riêng nên cancel token và thư mục làm việc không lẫn nhau"""
+        other = GitScenarios.__new__(GitScenarios)
+        other.io = self.io
+        other.git = self.git.copy()
+        other.git.cancel_token = cancel_token
+        other._throttles = {}
+        other.sync_strategy = self.sync_strategy
+        other.use_worktrees = self.use_worktrees
+        return other
 
+    def _interrupted(self, result):
+        """True nếu lệnh bị dừng (Stop/timeout). Bỏ cancel token để các bước khôi phục
+        phía sau (checkout lại nhánh cũ, pop stash) vẫn chạy được."""
+        if getattr(result, 'cancelled', False) or getattr(result, 'timed_out', False):
+            self.git.cancel_token = None
+            return True
+        return False
+
+    def _on_progress(self, event):
+        """Chuyển tiến độ của fetch/pull/push sang log (GUI hiển thị ngay khi có)"""
+        # Fetch song song nhiều remote: mỗi remote một bộ lọc riêng, log kèm tên remote
+        source = getattr(event, 'source', None)
+        throttle = self._throttles.setdefault(source, ProgressThrottle())
+        if throttle.should_report(event):
+            prefix = f"[{source}] " if source else ""
+            self.io.log(f"  {prefix}{event.format()}")
+
+    @traced_step
     def workflow_push_code(self):
         """Luồng đẩy code cơ bản: Add -> Commit -> Push"""
         self.io.log("=== QUY TRÌNH ĐẨY CODE (PUSH) ===")
         
         # 1. Check Status
-        s_ok, s_out = self.git.status()
-        self.io.log(s_out)
+        st = self.git.repo_status()
+        if st is None:
+            self.io.error(f"Không đọc được trạng thái repo: {self.git.repo_error()}")
+            return
+        self.io.log(st.format())
         
-        if "nothing to commit, working tree clean" in s_out:
+        if st.is_clean:
             self.io.warning("Không có thay đổi nào để đẩy lên.")
             return
 
@@ -41,7 +109,7 @@ class GitScenarios:
         # 4. Push
         current_branch = self.git.current_branch()
         if self.io.confirm(f"Bạn có muốn đẩy lên nhánh '{current_branch}' không?"):
-            p_ok, p_out = self.git.push(current_branch)
+            p_ok, p_out = self.git.push(current_branch, on_progress=self._on_progress)
             if p_ok:
                 self.io.success("Đã đẩy code lên thành công!")
                 self.io.log(p_out)
@@ -49,24 +117,72 @@ class GitScenarios:
                 self.io.error(f"Lỗi push: {p_out}")
                 self.io.log("Gợi ý: Nếu bị từ chối, có thể bạn cần pull code mới về trước.")
 
+    @traced_step
     def workflow_pull_code(self):
-        """Luồng kéo code: Fetch -> Pull"""
+        """Luồng kéo code: Fetch (một lần) -> Xem trước thay đổi -> Merge/Rebase upstream"""
         self.io.log("=== QUY TRÌNH KÉO CODE (PULL) ===")
         
-        # 1. Fetch
-        self.git.fetch()
+        # 1. Fetch - lần duy nhất cần mạng, bước merge phía sau chạy local
+        result = self.git.fetch(on_progress=self._on_progress)
+        f_ok, f_out = result
+        if not f_ok:
+            if self._interrupted(result):
+                self.io.warning(f"Fetch đã bị dừng: {f_out}")
+                return
+            # Có thể chỉ một remote phụ bị lỗi, upstream vẫn có thể đã được cập nhật
+            self.io.warning(f"Fetch gặp lỗi: {f_out}")
+
+        # 2. Xem trước commit và file sắp nhận về
+        st = self.git.repo_status()
+        if st is None:
+            self.io.error("Không đọc được trạng thái repo.")
+            return
+        if not st.upstream:
+            branch = st.branch if st.branch else "(detached HEAD)"
+            self.io.error(f"Nhánh {branch} chưa có upstream, không biết kéo code từ đâu.")
+            self.io.log("Gợi ý: đẩy nhánh lên trước (git push -u origin <nhánh>).")
+            return
+        if st.behind == 0:
+            self.io.success(f"Code đã mới nhất, {st.upstream} không có commit nào mới.")
+            return
+        incoming = self._preview_incoming(st)
+        # Các trường hợp `git pull` sẽ từ chối được xử lý trước khi stash
+        rebase, ff = self.git.pull_config()
+        if rebase == 'interactive' and ff != 'only':
+            # Rebase interactive cần trình soạn thảo, công cụ không tự chạy được
+            self.io.warning("Nhánh này cấu hình pull.rebase=interactive, công cụ không thể mở trình soạn thảo để rebase.")
+            self.io.log(f"Gợi ý: chạy `git rebase -i {st.upstream}` trong terminal (commit đã được fetch sẵn).")
+            return
+        if st.ahead and ff == 'only':
+            self.io.error(f"pull.ff=only nhưng nhánh có {st.ahead} commit chưa có trên {st.upstream}: không fast-forward được.")
+            self.io.log("Gợi ý: rebase hoặc merge thủ công, hoặc đổi cấu hình pull.ff.")
+            return
+        if st.ahead and rebase is None and ff is None:
+            self.io.warning(f"Nhánh đã tách khỏi {st.upstream} (bạn có {st.ahead} commit, upstream có {st.behind} commit mới) "
+                            "và chưa cấu hình pull.rebase/pull.ff.")
+            if self.io.confirm("Rebase commit của bạn lên upstream? (Không = tạo merge commit)"):
+                rebase = 'true'
+            else:
+                rebase = False
         
-        # 2. Check changes local
+        # 3. Check changes local
         stashed = False
-        if self.git.has_changes():
+        if not st.is_clean:
             self.io.warning("Bạn đang có các thay đổi chưa commit!")
+            overlap = self._overlapping_files(st, incoming)
+            if overlap:
+                self.io.warning(f"{len(overlap)} file bạn đang sửa cũng thay đổi trên {st.upstream} "
+                                f"(nên stash): {', '.join(overlap[:10])}{' ...' if len(overlap) > 10 else ''}")
+            elif incoming is not None:
+                self.io.log("Các file bạn đang sửa không trùng với file sắp nhận về, có thể pull mà không cần stash.")
             if self.io.confirm("Bạn có muốn lưu tạm (stash) trước khi pull không?"):
                 self.git.stash(f"Auto stash before pull {self.git.current_branch()}")
                 self.io.success("Đã stash thay đổi.")
                 stashed = True
         
-        # 3. Pull
-        ok, out = self.git.pull()
+        # 4. Merge/Rebase commit đã fetch (không fetch lại)
+        result = self.git.merge_upstream((rebase, ff))
+        ok, out = result
         if ok:
             self.io.success("Cập nhật code thành công!")
             self.io.log(out)
@@ -78,9 +194,19 @@ class GitScenarios:
                         self.io.success("Đã khôi phục code cũ.")
                     else: 
                         self.io.warning("Có xung đột khi khôi phục stash. Hãy kiểm tra file.")
+        elif self._interrupted(result):
+            self.io.warning(f"Pull đã bị dừng: {out}")
+            if stashed:
+                self.io.warning("Code của bạn đang được lưu trong Stash.")
+                if self.io.confirm("Bạn có muốn khôi phục lại trạng thái cũ (Pop Stash) ngay bây giờ không?"):
+                    p_ok, p_out = self.git.stash_pop()
+                    if p_ok:
+                        self.io.success("Đã khôi phục trạng thái ban đầu.")
+                    else:
+                        self.io.error(f"Lỗi khi khôi phục: {p_out}")
         else:
             self.io.error(f"Lỗi pull: {out}")
-            self.io.log("Có thể xảy ra xung đột hoặc lỗi mạng.")
+            self.io.log("Có thể xảy ra xung đột giữa code local và code mới.")
             # Hỏi pop stash nếu pull thất bại
             if stashed:
                 self.io.warning("Quá trình Pull gặp lỗi. Code của bạn đang được lưu trong Stash.")
@@ -91,8 +217,52 @@ class GitScenarios:
                     else:
                         self.io.error(f"Lỗi khi khôi phục: {p_out}")
 
+    def _preview_incoming(self, st):
+        """In các commit mới trên upstream (ngay khi git in ra) và danh sách file thay đổi.
+        Trả về set đường dẫn file sắp nhận về, None nếu không đọc được."""
+        self.io.log(f"Có {st.behind} commit mới từ {st.upstream}:")
+
+        def on_line(stream, line):
+            if stream == 'stdout':
+                self.io.log(f"  {line}")
+        self.git.stream_command(['log', '--oneline', '--no-decorate', f'-n{PREVIEW_COMMITS}', 'HEAD..@{u}'],
+                                on_line=on_line, read_only=True)
+        if st.behind > PREVIEW_COMMITS:
+            self.io.log(f"  ... và {st.behind - PREVIEW_COMMITS} commit khác")
+
+        files = self.git.incoming_files()
+        if files is None:
+            return None
+        added = sum(a or 0 for a, _, _ in files)
+        deleted = sum(d or 0 for _, d, _ in files)
+        self.io.log(f"{len(files)} file thay đổi, +{added} -{deleted}:")
+        for a, d, path in files[:PREVIEW_FILES]:
+            change = "(nhị phân)" if a is None else f"+{a} -{d}"
+            self.io.log(f"  {path} | {change}")
+        if len(files) > PREVIEW_FILES:
+            self.io.log(f"  ... và {len(files) - PREVIEW_FILES} file khác")
+        return {path for _, _, path in files}
+
+    def _overlapping_files(self, st, incoming):
+        """File đang sửa/chưa commit cũng bị thay đổi trên upstream"""
+        if not incoming:
+            return []
+        overlap = []
+        for entry in st.entries:
+            if entry.kind == '!':
+                continue
+            for path in (entry.path, entry.orig_path):
+                if not path:
+                    continue
+                # Thư mục untracked được status gộp lại thành "thư_mục/"
+                hit = any(f.startswith(path) for f in incoming) if path.endswith('/') else path in incoming
+                if hit and path not in overlap:
+                    overlap.append(path)
+        return overlap
+
+    @traced_step
     def workflow_sync_main(self):
-        """Luồng đồng bộ: Stash -> Checkout Main -> Pull -> Checkout Back -> Merge Main -> Pop Stash"""
+        """Luồng đồng bộ: Fetch main:main (không checkout) -> Stash -> Merge/Rebase Main -> Pop Stash"""
         self.io.log("=== QUY TRÌNH ĐỒNG BỘ TỪ MAIN (SAFE SYNC) ===")
         
         current_branch = self.git.current_branch()
@@ -107,6 +277,91 @@ class GitScenarios:
             self.workflow_pull_code()
             return
 
+        # 1. Cập nhật ref của main trực tiếp, không đụng tới working tree.
+        # main đang mở ở worktree khác: git không cho ghi nhánh đó (fetch main:main hay checkout)
+        # từ đây -> cập nhật ngay trong worktree đó
+        other = self._worktree_of(main_branch)
+        if other is not None:
+            if not self._update_in_worktree(other, main_branch):
+                return
+        else:
+            result = self.git.fetch_branch(main_branch, on_progress=self._on_progress)
+            f_ok, f_out = result
+            if not f_ok:
+                if self._interrupted(result):
+                    self.io.warning(f"Cập nhật {main_branch} đã bị dừng: {f_out}")
+                    return
+                if not _non_fast_forward(f_out):
+                    # Lỗi mạng, remote sai...: cách cũ (checkout rồi pull) cũng sẽ lỗi y hệt
+                    self.io.error(f"Không cập nhật được {main_branch}: {_reason(f_out)}")
+                    self.io.log("Đã dừng đồng bộ, nhánh hiện tại chưa bị thay đổi.")
+                    return
+                # main local có commit chưa đẩy lên: chỉ pull trên main (checkout) mới gộp được
+                self.io.warning(f"Không cập nhật được {main_branch} mà không checkout: {_reason(f_out)}")
+                self.io.log(f"Chuyển sang cách cũ: checkout {main_branch} rồi pull.")
+                self._sync_main_checkout(current_branch, main_branch)
+                return
+
+        # 2. Kiểm tra trước (không đụng working tree): đã có đủ code main chưa, có xung đột không
+        if self.git.is_ancestor(main_branch):
+            self.io.success(f"Nhánh {current_branch} đã có đủ code từ {main_branch}, không cần merge.")
+            return
+        if not self._confirm_conflicts(current_branch, main_branch):
+            self.io.log("Đã dừng đồng bộ, nhánh hiện tại chưa bị thay đổi.")
+            return
+
+        # 3. Stash changes
+        has_changes = self.git.has_changes()
+        if has_changes:
+            self.io.log("Phát hiện thay đổi, đang lưu tạm (Stash)...")
+            self.git.stash(f"Sync main stash {current_branch}")
+
+        # 4. Merge/Rebase Main + Pop Stash
+        self._integrate_main(current_branch, main_branch, has_changes)
+
+    def _worktree_of(self, branch):
+        """Worktree khác đang checkout branch (nhánh hiện tại đã được loại trước), None nếu không có"""
+        git_dir = self.git.git_dir() if self.git.direct_reads else None
+        if git_dir and not os.path.isdir(os.path.join(common_dir(git_dir), 'worktrees')):
+            # Repo không có worktree phụ nào: khỏi chạy `worktree list`
+            return None
+        return self.git.worktrees().find(branch)
+
+    def _update_in_worktree(self, worktree, main_branch):
+        """Fast-forward main_branch ngay trong worktree đang mở nó. True nếu đã cập nhật xong"""
+        if worktree.prunable is not None:
+            self.io.warning(f"Nhánh {main_branch} vẫn được đăng ký ở worktree {worktree.path} nhưng thư mục "
+                            "không còn. Hãy dọn worktree (Quản lý Worktree) rồi đồng bộ lại.")
+            return False
+        self.io.log(f"Nhánh {main_branch} đang mở ở worktree {worktree.path}: cập nhật ngay trong thư mục đó "
+                    "(chỉ fast-forward, không đụng tới thay đổi đang làm ở đó).")
+        other = self.git.copy(working_dir=worktree.path)
+        other.cancel_token = self.git.cancel_token
+        result = other.pull(on_progress=self._on_progress, ff_only=True)
+        ok, out = result
+        if ok:
+            return True
+        if self._interrupted(result):
+            self.io.warning(f"Cập nhật {main_branch} đã bị dừng: {out}")
+            return False
+        self.io.warning(f"Không cập nhật được {main_branch} trong worktree {worktree.path}: {_reason(out)}")
+        self.io.log(f"Đã dừng đồng bộ. Hãy cập nhật {main_branch} trong thư mục đó rồi chạy lại.")
+        return False
+
+    def _confirm_conflicts(self, current_branch, main_branch):
+        """Merge thử main vào nhánh hiện tại; có xung đột thì liệt kê file và hỏi có làm tiếp không"""
+        prediction = self.git.predict_merge(main_branch)
+        if prediction is None:
+            # Git < 2.38 chưa có merge-tree --write-tree: không dự đoán được, cứ làm như cũ
+            return True
+        if prediction.clean:
+            self.io.log(f"Merge thử {main_branch} vào {current_branch}: không có xung đột.")
+            return True
+        self.io.warning(prediction.format())
+        return self.io.confirm("Vẫn tiếp tục đồng bộ? (bạn sẽ phải tự giải quyết các xung đột này)")
+
+    def _sync_main_checkout(self, current_branch, main_branch):
+        """Cách đồng bộ cũ: Stash -> Checkout Main -> Pull -> Checkout Back -> Merge -> Pop Stash"""
         # 1. Stash changes
         has_changes = self.git.has_changes()
         if has_changes:
@@ -118,9 +373,13 @@ class GitScenarios:
         self.git.checkout(main_branch)
         
         # Pull main
-        p_ok, p_out = self.git.pull()
+        result = self.git.pull(on_progress=self._on_progress)
+        p_ok, p_out = result
         if not p_ok:
-            self.io.error(f"Lỗi khi pull {main_branch}: {p_out}")
+            if self._interrupted(result):
+                self.io.warning(f"Pull {main_branch} đã bị dừng: {p_out}")
+            else:
+                self.io.error(f"Lỗi khi pull {main_branch}: {p_out}")
             self.io.warning("Đang quay lại nhánh cũ...")
             self.git.checkout(current_branch)
             if has_changes:
@@ -132,19 +391,36 @@ class GitScenarios:
         self.io.log(f"Quay lại nhánh {current_branch}...")
         self.git.checkout(current_branch)
 
-        # 4. Merge Main
-        self.io.log(f"Gộp code từ {main_branch} vào {current_branch}...")
-        m_ok, m_out = self.git.merge(main_branch)
+        # 4. Kiểm tra trước như luồng chính, rồi Merge Main + Pop Stash
+        if self.git.is_ancestor(main_branch):
+            self.io.success(f"Nhánh {current_branch} đã có đủ code từ {main_branch}, không cần merge.")
+        elif not self._confirm_conflicts(current_branch, main_branch):
+            self.io.log(f"Đã dừng đồng bộ: {main_branch} đã được cập nhật, nhánh hiện tại chưa bị merge.")
+        else:
+            self._integrate_main(current_branch, main_branch, has_changes)
+            return
+        if has_changes:
+            self.io.log("Đang khôi phục stash...")
+            self.git.stash_pop()
+
+    def _integrate_main(self, current_branch, main_branch, has_changes):
+        """Merge (hoặc rebase, theo self.sync_strategy) main vào nhánh hiện tại rồi pop stash"""
+        if self.sync_strategy == 'rebase':
+            self.io.log(f"Rebase {current_branch} lên {main_branch}...")
+            m_ok, m_out = self.git.rebase(main_branch)
+        else:
+            self.io.log(f"Gộp code từ {main_branch} vào {current_branch}...")
+            m_ok, m_out = self.git.merge(main_branch)
         if m_ok:
-            self.io.success("Merge thành công.")
+            self.io.success("Merge thành công." if self.sync_strategy != 'rebase' else "Rebase thành công.")
         else:
-            self.io.error(f"Merge thất bại (Conflict): {m_out}")
+            self.io.error(f"{'Rebase' if self.sync_strategy == 'rebase' else 'Merge'} thất bại (Conflict): {m_out}")
             self.io.warning("Vui lòng giải quyết xung đột thủ công trước khi tiếp tục.")
             # Lưu ý: Khi merge conflict, ta không pop stash ngay vì sẽ làm rối thêm.
             # User cần fix conflict xong mới pop stash thủ công.
             return 
 
-        # 5. Pop Stash
+        # Pop Stash
         if has_changes:
             self.io.log("Khôi phục thay đổi đã lưu (Pop Stash)...")
             p_ok, p_out = self.git.stash_pop()
@@ -153,62 +429,197 @@ class GitScenarios:
             else:
                 self.io.warning("Có xung đột khi khôi phục stash. Hãy kiểm tra file.")
 
-    def workflow_new_feature(self):
-        """Tạo nhánh mới: Pull Main -> Checkout -b New -> Làm việc"""
-        self.io.log("=== BẮT ĐẦU TÍNH NĂNG MỚI ===")
-        
-        # 1. Update Main first
-        self.io.log("Nên cập nhật nhánh chính trước khi tạo nhánh mới.")
+    @traced_step
+    def workflow_preview_conflicts(self):
+        """Xem trước các file sẽ xung đột nếu merge main vào nhánh hiện tại (không thay đổi gì)"""
+        self.io.log("=== KIỂM TRA XUNG ĐỘT VỚI MAIN ===")
+
+        current_branch = self.git.current_branch()
         main_branch = "main"
         user_main = self.io.input(f"Nhập tên nhánh chính (mặc định: {main_branch})")
         if user_main: main_branch = user_main
+
+        prediction = self.git.predict_merge(main_branch)
+        if prediction is None:
+            self.io.error(f"Không kiểm tra được: cần git 2.38 trở lên và nhánh '{main_branch}' phải tồn tại.")
+            return
+        if self.git.is_ancestor(main_branch):
+            self.io.success(f"Nhánh {current_branch} đã có đủ code từ {main_branch}.")
+        elif prediction.clean:
+            self.io.success(f"Merge {main_branch} vào {current_branch} sẽ không có xung đột.")
+        else:
+            self.io.log(prediction.format())
+            self.io.warning(f"Có {len(prediction.conflicts)} file sẽ xung đột khi merge {main_branch}.")
+
+    @traced_step
+    def workflow_new_feature(self):
+        """Tạo nhánh mới: Fetch Main -> Checkout -b New origin/Main (chỉ đổi working tree một lần)"""
+        self.io.log("=== BẮT ĐẦU TÍNH NĂNG MỚI ===")
         
-        self.git.checkout(main_branch)
-        self.git.pull()
+        # 1. Nhánh chính: lấy từ origin/HEAD, không có mới hỏi user
+        remote = 'origin'
+        main_branch = self.git.default_branch(remote)
+        if main_branch:
+            self.io.log(f"Nhánh chính: {main_branch} (theo {remote}/HEAD)")
+        else:
+            main_branch = "main"
+            user_main = self.io.input(f"Nhập tên nhánh chính (mặc định: {main_branch})")
+            if user_main: main_branch = user_main
         
-        # 2. Create Branch
-        new_branch = self.io.input("Nhập tên nhánh mới (VD: feature/login-page)")
+        # 2. Hỏi tên nhánh mới; trong lúc người dùng gõ thì fetch sẵn nhánh chính
+        # (không log tiến độ; ConsoleIO để dành các thông báo khác tới khi người dùng gõ xong)
+        answer = self.io.ask_input("Nhập tên nhánh mới (VD: feature/login-page)")
+        result = self.git.fetch_ref(remote, main_branch)
+        new_branch = answer.result()
         if not new_branch:
             self.io.error("Tên nhánh không được trống.")
             return
-            
-        self.git.checkout_new(new_branch)
-        self.io.success(f"Đã chuyển sang nhánh {new_branch}. Bạn có thể bắt đầu code!")
 
+        # 3. Tạo nhánh mới thẳng từ remote, không checkout main
+        f_ok, f_out = result
+        if f_ok:
+            start_point = f"{remote}/{main_branch}"
+        elif self._interrupted(result):
+            self.io.warning(f"Fetch {main_branch} đã bị dừng: {f_out}")
+            return
+        else:
+            self.io.warning(f"Không lấy được {remote}/{main_branch} mới nhất, tạo nhánh từ {main_branch} local.")
+            start_point = main_branch
+
+        ok, out = self.git.checkout_new(new_branch, start_point)
+        if ok:
+            self.io.success(f"Đã tạo nhánh {new_branch} từ {start_point}. Bạn có thể bắt đầu code!")
+        else:
+            self.io.error(f"Lỗi khi tạo nhánh {new_branch}: {out}")
+
+    @traced_step
     def workflow_switch_branch(self):
         """Chuyển đổi giữa các nhánh có sẵn"""
         self.io.log("=== CHUYỂN NHÁNH (SWITCH BRANCH) ===")
+        if self.use_worktrees:
+            self._switch_worktree()
+            return
         
         # 1. Check status (warn if changes exist)
+        stash_answer = None
         if self.git.has_changes():
             self.io.warning("CẢNH BÁO: Bạn đang có thay đổi chưa commit. Việc chuyển nhánh có thể bị chặn hoặc gây conflict.")
-            if self.io.confirm("Bạn có muốn Stash (lưu tạm) thay đổi trước khi chuyển không?"):
-                self.git.stash(f"Stash before switch {self.git.current_branch()}")
-                self.io.success("Đã stash thay đổi.")
+            stash_answer = self.io.ask_confirm("Bạn có muốn Stash (lưu tạm) thay đổi trước khi chuyển không?")
         
-        # 2. Get branches
-        branches = self.git.get_branches()
+        # 2. Get branches (trong lúc câu hỏi stash đang hiển thị)
+        # Bỏ nhánh hiện tại khỏi danh sách chọn; xếp nhánh vừa dùng / commit mới lên đầu
         current = self.git.current_branch()
-        
-        # Loại bỏ branch hiện tại khỏi danh sách chọn (để đỡ rối)
-        if current in branches:
-            branches.remove(current)
-            
-        if not branches:
+        # Dữ liệu remote cũ -> thêm lựa chọn fetch lại ở đầu danh sách (không tự fetch khi mở hộp chọn)
+        pinned = [REFRESH_REMOTE] if self.git.remote_stale() else []
+        branches = self.git.branch_index(exclude={current}, pinned=pinned, remote=True)
+        if stash_answer is not None and stash_answer.result():
+            self.git.stash(f"Stash before switch {current}")
+            self.io.success("Đã stash thay đổi.")
+
+        if len(branches) == len(pinned):
             self.io.warning("Không tìm thấy nhánh nào khác để chuyển.")
             return
 
         # 3. Select branch
         self.io.log(f"Nhánh hiện tại: {current}")
-        selected_branch = self.io.select("Chọn nhánh muốn chuyển sang:", branches)
-        
+        while True:
+            age = self.git.remote_data_age()
+            if age is None:
+                self.io.log("Dữ liệu remote: chưa fetch lần nào (nhánh remote có thể đã cũ).")
+            else:
+                self.io.log(f"Nhánh remote theo dữ liệu cập nhật cách đây {format_age(age)}.")
+            selected_branch = self.io.select("Chọn nhánh muốn chuyển sang:", branches)
+            if selected_branch != REFRESH_REMOTE:
+                break
+            result = self.git.refresh_remote(max_age=0, on_progress=self._on_progress)
+            if result is not None and not result.success:
+                if self._interrupted(result):
+                    self.io.warning(f"Fetch đã bị dừng: {result.output}")
+                    return
+                self.io.warning(f"Fetch gặp lỗi: {result.output}")
+            # Fetch có thể mang về nhánh remote mới
+            branches = self.git.branch_index(exclude={current}, remote=True)
+
         if selected_branch:
-            ok, out = self.git.checkout(selected_branch)
+            if selected_branch not in self.git.get_branches() and selected_branch in self.git.remote_branches():
+                ok, out = self.git.checkout_track(selected_branch)
+            else:
+                ok, out = self.git.checkout(selected_branch)
             if ok:
-                self.io.success(f"Đã chuyển sang nhánh: {selected_branch}")
+                self.io.success(f"Đã chuyển sang nhánh: {self.git.current_branch()}")
             else:
                 self.io.error(f"Lỗi khi chuyển nhánh: {out}")
 
+    def _switch_worktree(self):
+        """Chuyển nhánh bằng worktree: không stash, không ghi lại file, chỉ đổi thư mục làm việc"""
+        manager = self.git.worktrees()
+        current = self.git.current_branch()
+        opened = {wt.branch: wt.path for wt in manager.list() if wt.branch and wt.prunable is None}
+        branches = [b for b in self.git.get_branches() if b != current]
+        if not branches:
+            self.io.warning("Không tìm thấy nhánh nào khác để chuyển.")
+            return
+        # Nhánh đã có worktree được đánh dấu để người dùng biết sẽ không phải tạo mới
+        labels = {f"{b} (đã có worktree)" if b in opened else b: b for b in branches}
+        choices = FuzzyIndex(labels, dates=self.git.branch_dates(), recent=self.git.recent_branches(),
+                             key=labels.get)
+        self.io.log(f"Nhánh hiện tại: {current} ({self.git.working_dir})")
+        selected = self.io.select("Chọn nhánh muốn chuyển sang:", choices)
+        if not selected:
+            return
+        branch = labels[selected]
+
+        result, path = manager.ensure(branch)
+        ok, out = result
+        if not ok:
+            self.io.error(f"Lỗi khi tạo worktree cho {branch}: {out}")
+            return
+        self.set_working_dir(path)
+        verb = "Đã chuyển" if branch in opened else "Đã tạo worktree và chuyển"
+        self.io.success(f"{verb} sang nhánh {branch}: {path}")
+
+    @traced_step
+    def workflow_manage_worktrees(self):
+        """Xem danh sách worktree, dung lượng, dọn worktree hỏng và xóa worktree không dùng"""
+        self.io.log("=== QUẢN LÝ WORKTREE ===")
+        manager = self.git.worktrees()
+        worktrees = manager.list()
+        if not worktrees:
+            self.io.error("Không đọc được danh sách worktree.")
+            return
+        self.io.log(manager.format_usage())
+        self.io.log(f"Worktree mới được tạo trong: {manager.root}")
+
+        # 1. Prune các worktree mà thư mục đã bị xóa
+        stale = [wt for wt in worktrees if wt.prunable is not None]
+        if stale and self.io.confirm(f"Có {len(stale)} worktree đã mất thư mục. Dọn (prune) không?"):
+            ok, out = manager.prune()
+            if ok:
+                self.io.success("Đã dọn các worktree hỏng.")
+            else:
+                self.io.error(f"Lỗi prune: {out}")
+
+        # 2. Xóa một worktree do công cụ tạo (không đụng worktree đang dùng)
+        here = os.path.normcase(os.path.abspath(self.git.working_dir))
+        removable = [wt for wt in worktrees
+                     if wt.prunable is None and manager.is_managed(wt)
+                     and os.path.normcase(os.path.abspath(wt.path)) != here]
+        if not removable:
+            return
+        labels = [wt.format() for wt in removable]
+        selected = self.io.select("Chọn worktree muốn xóa (Hủy để bỏ qua):", labels)
+        if not selected:
+            return
+        wt = removable[labels.index(selected)]
+        if not self.io.confirm(f"Xóa thư mục {wt.path}? (nhánh {wt.branch} vẫn được giữ)"):
+            return
+        ok, out = manager.remove(wt)
+        if ok:
+            self.io.success(f"Đã xóa worktree {wt.path}.")
+        else:
+            self.io.error(f"Lỗi khi xóa worktree (có thay đổi chưa commit?): {out}")
+
+    @traced_step
     def workflow_fix_conflict_stash(self):
         """Hỗ trợ xử lý khi kéo code về bị mất code (do stash chưa pop)"""
         self.io.log("=== KHÔI PHỤC CODE TẠM LƯU (STASH LIST) ===")
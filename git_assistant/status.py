@@ -0,0 +1,190 @@
+"""Mô hình trạng thái repo dựng từ `git status --porcelain=v2 -z --branch`.
+
+Định dạng porcelain không phụ thuộc ngôn ngữ của git nên không cần so khớp
+chuỗi tiếng Anh như "nothing to commit, working tree clean".
+"""
+
+
+class StatusEntry:
+    """Một dòng trong status: file thay đổi, đổi tên, conflict, untracked hoặc ignored"""
+    __slots__ = ('kind', 'index', 'worktree', 'path', 'orig_path', 'submodule')
+
+    # kind: '1' thay đổi thường, '2' đổi tên/copy, 'u' conflict, '?' untracked, '!' ignored
+    def __init__(self, kind, index, worktree, path, orig_path=None, submodule='N...'):
+        self.kind = kind
+        self.index = index
+        self.worktree = worktree
+        self.path = path
+        self.orig_path = orig_path
+        self.submodule = submodule
+
+    @property
+    def staged(self):
+        return self.kind in ('1', '2') and self.index != '.'
+
+    @property
+    def unstaged(self):
+        return self.kind in ('1', '2') and self.worktree != '.'
+
+    @property
+    def conflicted(self):
+        return self.kind == 'u'
+
+    @property
+    def untracked(self):
+        return self.kind == '?'
+
+    def short(self):
+        """Dạng ngắn giống `git status -s`"""
+        if self.kind == '?':
+            code = '??'
+        elif self.kind == '!':
+            code = '!!'
+        else:
+            code = (self.index + self.worktree).replace('.', ' ')
+        if self.orig_path:
+            return f"{code} {self.orig_path} -> {self.path}"
+        return f"{code} {self.path}"
+
+    def __repr__(self):
+        return f"StatusEntry({self.short()!r})"
+
+
+class RepoStatus:
+    """Trạng thái repo: nhánh, upstream, ahead/behind, số stash và danh sách file"""
+    __slots__ = ('oid', 'branch', 'upstream', 'ahead', 'behind', 'stash_count', 'entries')
+
+    def __init__(self):
+        self.oid = None
+        self.branch = None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        self.stash_count = 0
+        self.entries = []
+
+    @property
+    def detached(self):
+        return self.branch is None
+
+    @property
+    def staged(self):
+        return [e for e in self.entries if e.staged]
+
+    @property
+    def unstaged(self):
+        return [e for e in self.entries if e.unstaged]
+
+    @property
+    def untracked(self):
+        return [e for e in self.entries if e.untracked]
+
+    @property
+    def conflicted(self):
+        return [e for e in self.entries if e.conflicted]
+
+    @property
+    def dirty_count(self):
+        return sum(1 for e in self.entries if e.kind != '!')
+
+    @property
+    def is_clean(self):
+        return self.dirty_count == 0
+
+    def format(self):
+        """Chuỗi mô tả trạng thái để hiển thị cho người dùng"""
+        lines = []
+        branch = self.branch if self.branch else "(detached HEAD)"
+        if self.upstream:
+            lines.append(f"Nhánh: {branch} -> {self.upstream} (ahead {self.ahead}, behind {self.behind})")
+        else:
+            lines.append(f"Nhánh: {branch} (chưa có upstream)")
+        if self.stash_count:
+            lines.append(f"Stash: {self.stash_count} bản lưu tạm")
+        if self.is_clean:
+            lines.append("Không có thay đổi nào.")
+        else:
+            lines.append(f"Có {self.dirty_count} file thay đổi:")
+            lines.extend(f"  {e.short()}" for e in self.entries if e.kind != '!')
+        return '\n'.join(lines)
+
+    def summary(self):
+        """Một dòng ngắn cho thanh trạng thái: nhánh, ahead/behind, số file thay đổi, số stash"""
+        parts = [f"Nhánh: {self.branch or '(detached HEAD)'}"]
+        if self.upstream:
+            parts[0] += f" → {self.upstream} ↑{self.ahead} ↓{self.behind}"
+        parts.append("sạch" if self.is_clean else f"{self.dirty_count} file thay đổi")
+        if self.stash_count:
+            parts.append(f"{self.stash_count} stash")
+        return "  |  ".join(parts)
+
+    def __repr__(self):
+        return (f"RepoStatus(branch={self.branch!r}, upstream={self.upstream!r}, "
+                f"ahead={self.ahead}, behind={self.behind}, dirty={self.dirty_count})")
+
+
+def iter_records(chunks):
+    """Tách output -z thành từng record (ngăn cách bởi NUL), đọc dần theo từng chunk"""
+    pending = ''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        parts = pending.split('\0')
+        pending = parts.pop()
+        for part in parts:
+            yield part
+    if pending:
+        yield pending
+
+
+def parse_porcelain_v2(chunks):
+    """Dựng RepoStatus từ output `git status --porcelain=v2 -z --branch`.
+
+    chunks có thể là cả output (str) hoặc iterable các đoạn str đọc dần từ process.
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+
+    status = RepoStatus()
+    records = iter_records(chunks)
+    for rec in records:
+        if not rec:
+            continue
+        kind = rec[0]
+        if kind == '#':
+            _parse_header(status, rec)
+        elif kind == '1':
+            # 1 XY sub mH mI mW hH hI path
+            fields = rec.split(' ', 8)
+            status.entries.append(StatusEntry('1', fields[1][0], fields[1][1], fields[8], submodule=fields[2]))
+        elif kind == '2':
+            # 2 XY sub mH mI mW hH hI Xscore path, sau đó là origPath ở record kế tiếp
+            fields = rec.split(' ', 9)
+            orig = next(records, None)
+            status.entries.append(StatusEntry('2', fields[1][0], fields[1][1], fields[9], orig, fields[2]))
+        elif kind == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            fields = rec.split(' ', 10)
+            status.entries.append(StatusEntry('u', fields[1][0], fields[1][1], fields[10], submodule=fields[2]))
+        elif kind in ('?', '!'):
+            status.entries.append(StatusEntry(kind, kind, kind, rec[2:]))
+    return status
+
+
+def _parse_header(status, rec):
+    parts = rec.split(' ')
+    if len(parts) < 3:
+        return
+    key, value = parts[1], ' '.join(parts[2:])
+    if key == 'branch.oid':
+        status.oid = None if value == '(initial)' else value
+    elif key == 'branch.head':
+        status.branch = None if value == '(detached)' else value
+    elif key == 'branch.upstream':
+        status.upstream = value
+    elif key == 'branch.ab' and len(parts) == 4:
+        status.ahead = int(parts[2].lstrip('+'))
+        status.behind = int(parts[3].lstrip('-'))
+    elif key == 'stash':
+        status.stash_count = int(value)
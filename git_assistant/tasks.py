@@ -0,0 +1,170 @@
+"""Hàng đợi thao tác cho GUI: thao tác ghi chạy lần lượt theo từng repo, thao tác chỉ đọc chạy
+song song, yêu cầu trùng (bấm Push hai lần) được gộp vào thao tác đang chờ/chạy.
+
+Nhiều lệnh git ghi cùng lúc trên một repo sẽ tranh nhau index.lock, nên mỗi repo chỉ có
+một thao tác ghi chạy tại một thời điểm; các thao tác ghi khác xếp hàng theo thứ tự bấm.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .results import CancelToken
+
+# Số thao tác giữ lại trong lịch sử (cho khung hàng đợi)
+HISTORY_SIZE = 50
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+_ids = itertools.count(1)
+
+
+class Task:
+    """Một thao tác đã gửi vào TaskScheduler"""
+
+    def __init__(self, name, func, repo, read_only, key):
+        self.id = next(_ids)
+        self.name = name
+        self.func = func
+        self.repo = repo
+        self.read_only = read_only
+        self.key = key
+        self.state = QUEUED
+        self.cancel_token = CancelToken()
+        self.merged = 0            # số yêu cầu trùng đã gộp vào thao tác này
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.future = None
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def __repr__(self):
+        return f"Task(#{self.id} {self.name!r}, {self.state})"
+
+
+class TaskScheduler:
+    """Chạy thao tác trên thread pool, tuần tự hóa thao tác ghi theo repo.
+
+    on_change(task): gọi (từ luồng bất kỳ) mỗi khi một thao tác đổi trạng thái.
+    """
+
+    def __init__(self, max_workers=4, on_change=None):
+        self.on_change = on_change
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='git-task')
+        self._lock = threading.Lock()
+        self._inflight = {}     # key -> Task đang chờ/chạy
+        self._waiting = {}      # repo -> deque Task ghi đang chờ
+        self._busy = set()      # repo đang có thao tác ghi chạy
+
+    def submit(self, name, func, repo=None, read_only=False, key=None):
+        """Gửi func(task) vào hàng đợi, trả về Task.
+
+        key: khóa để gộp yêu cầu trùng (mặc định (repo, name)); nếu đã có thao tác cùng khóa
+        đang chờ/chạy thì trả về thao tác đó thay vì tạo mới.
+        """
+        key = key if key is not None else (repo, name)
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                existing.merged += 1
+                return existing
+            task = Task(name, func, repo, read_only, key)
+            self._inflight[key] = task
+            self.history.append(task)
+            if read_only:
+                start = True
+            elif repo in self._busy:
+                self._waiting.setdefault(repo, deque()).append(task)
+                start = False
+            else:
+                self._busy.add(repo)
+                start = True
+        self._notify(task)
+        if start:
+            task.future = self._pool.submit(self._run, task)
+        return task
+
+    def _run(self, task):
+        if task.cancel_token.cancelled:
+            self._finish(task, CANCELLED)
+            return
+        task.state = RUNNING
+        task.started = time.time()
+        self._notify(task)
+        try:
+            task.result = task.func(task)
+            state = CANCELLED if task.cancel_token.cancelled else DONE
+        except Exception as e:
+            task.error = e
+            state = FAILED
+        self._finish(task, state)
+
+    def _finish(self, task, state):
+        task.state = state
+        task.finished = time.time()
+        following = None
+        with self._lock:
+            if self._inflight.get(task.key) is task:
+                del self._inflight[task.key]
+            if not task.read_only:
+                queue = self._waiting.get(task.repo)
+                if queue:
+                    following = queue.popleft()
+                else:
+                    self._waiting.pop(task.repo, None)
+                    self._busy.discard(task.repo)
+        self._notify(task)
+        if following is not None:
+            following.future = self._pool.submit(self._run, following)
+
+    def cancel(self, task):
+        """Hủy thao tác: đang chờ thì bỏ khỏi hàng đợi, đang chạy thì báo CancelToken"""
+        task.cancel_token.cancel()
+        with self._lock:
+            queue = self._waiting.get(task.repo)
+            waiting = queue is not None and task in queue
+            if waiting:
+                queue.remove(task)
+                if self._inflight.get(task.key) is task:
+                    del self._inflight[task.key]
+        if waiting:
+            task.state = CANCELLED
+            task.finished = time.time()
+            self._notify(task)
+
+    def cancel_running(self):
+        """Hủy các thao tác ghi đang chạy (nút Stop), trả về số thao tác bị hủy.
+        Thao tác chỉ đọc chạy song song không bị dừng theo (hủy riêng bằng cancel())."""
+        running = [t for t in self.active() if t.state == RUNNING and not t.read_only]
+        for task in running:
+            task.cancel_token.cancel()
+        return len(running)
+
+    def active(self):
+        with self._lock:
+            return list(self._inflight.values())
+
+    def shutdown(self):
+        for task in self.active():
+            self.cancel(task)
+        self._pool.shutdown(wait=False)
+
+    def _notify(self, task):
+        if self.on_change:
+            try:
+                self.on_change(task)
+            except Exception:
+                pass
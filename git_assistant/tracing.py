@@ -0,0 +1,262 @@
+"""Đo thời gian từng lệnh git: ghi lại argv, cwd, thời gian, exit code, dung lượng output
+và bước workflow đã gọi lệnh; thống kê p50/p95/p99 theo lệnh con; xuất Chrome trace.
+
+Bật bằng enable_tracing() (hoặc `python github_tool.py --trace trace.json`), sau đó mở
+file JSON trong chrome://tracing hoặc https://ui.perfetto.dev.
+"""
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import runner as runner_module
+from .core import git_subcommand
+
+# Số mẫu gần nhất giữ lại cho mỗi histogram
+HISTOGRAM_WINDOW = 1000
+# Số lệnh tối đa giữ lại để xuất trace
+MAX_RECORDS = 100000
+
+
+class CommandRecord:
+    __slots__ = ('argv', 'cwd', 'start', 'duration', 'exit_code', 'out_bytes', 'step', 'thread', 'subcommand')
+
+    def __init__(self, argv, cwd, start, duration, exit_code, out_bytes, step, thread):
+        self.argv = argv
+        self.cwd = cwd
+        self.start = start
+        self.duration = duration
+        self.exit_code = exit_code    # None nếu bị timeout/hủy/lỗi khi chạy
+        self.out_bytes = out_bytes
+        self.step = step
+        self.thread = thread
+        self.subcommand = git_subcommand(argv) or '?'
+
+    def __repr__(self):
+        return (f"CommandRecord(git {' '.join(self.argv)!s}, {self.duration * 1000:.1f}ms, "
+                f"exit={self.exit_code}, step={self.step!r})")
+
+
+class RollingHistogram:
+    """Giữ `window` mẫu gần nhất và tính phân vị"""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        # Nearest-rank
+        idx = min(len(ordered) - 1, max(0, math.ceil(p / 100.0 * len(ordered)) - 1))
+        return ordered[idx]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.records = deque(maxlen=MAX_RECORDS)
+        self.histograms = {}
+        self.steps = deque(maxlen=MAX_RECORDS)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def step(self, name):
+        """Đánh dấu một bước; các lệnh git chạy bên trong được gắn tên bước này"""
+        stack = self._stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stack.pop()
+            with self._lock:
+                self.steps.append((name, start, time.perf_counter() - start, threading.get_ident()))
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_step(self):
+        """Tên bước đang chạy: các bước đã đánh dấu + vị trí dòng trong scenarios.py đang gọi git"""
+        stack = self._stack()
+        where = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            if os.path.basename(frame.f_code.co_filename) == 'scenarios.py':
+                where = f"{frame.f_code.co_name}:{frame.f_lineno}"
+                break
+            frame = frame.f_back
+        parts = list(stack)
+        if where:
+            # Bước do @traced_step đánh dấu trùng tên hàm -> chỉ giữ dạng có số dòng
+            if parts and where.startswith(parts[-1] + ':'):
+                parts[-1] = where
+            else:
+                parts.append(where)
+        return ' > '.join(parts) if parts else None
+
+    def record(self, argv, cwd, start, duration, exit_code, out_bytes, step=None):
+        rec = CommandRecord(list(argv), cwd, start, duration, exit_code, out_bytes, step,
+                            threading.get_ident())
+        with self._lock:
+            self.records.append(rec)
+            hist = self.histograms.get(rec.subcommand)
+            if hist is None:
+                hist = self.histograms[rec.subcommand] = RollingHistogram()
+            hist.add(duration)
+        return rec
+
+    def stats(self):
+        """{lệnh con: {'count', 'total', 'p50', 'p95', 'p99'}} (đơn vị giây)"""
+        with self._lock:
+            return {name: h.snapshot() for name, h in self.histograms.items()}
+
+    def summary(self):
+        """Bảng thống kê theo lệnh con, lệnh tốn nhiều thời gian nhất lên đầu"""
+        stats = sorted(self.stats().items(), key=lambda kv: kv[1]['total'], reverse=True)
+        lines = [f"{'Lệnh':<16}{'Số lần':>8}{'Tổng (ms)':>12}{'p50':>10}{'p95':>10}{'p99':>10}"]
+        for name, s in stats:
+            lines.append(f"{name:<16}{s['count']:>8}{s['total'] * 1000:>12.1f}"
+                         f"{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}")
+        return '\n'.join(lines)
+
+    def chrome_trace(self):
+        """Dữ liệu theo định dạng Trace Event của Chrome (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        tids = {}
+        events = []
+
+        def tid(ident):
+            return tids.setdefault(ident, len(tids) + 1)
+
+        with self._lock:
+            records = list(self.records)
+            steps = list(self.steps)
+        for name, start, duration, thread in steps:
+            events.append({
+                'name': name, 'cat': 'workflow', 'ph': 'X', 'pid': pid, 'tid': tid(thread),
+                'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6,
+            })
+        for rec in records:
+            events.append({
+                'name': f"git {rec.subcommand}", 'cat': 'git', 'ph': 'X', 'pid': pid, 'tid': tid(rec.thread),
+                'ts': (rec.start - self._origin) * 1e6, 'dur': rec.duration * 1e6,
+                'args': {'argv': rec.argv, 'cwd': rec.cwd, 'exit_code': rec.exit_code,
+                         'out_bytes': rec.out_bytes, 'step': rec.step},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+
+def _size(text):
+    return len(text.encode('utf-8', 'replace')) if text else 0
+
+
+class TracingRunner:
+    """Bọc một runner khác, ghi lại mọi lệnh git chạy qua nó vào Tracer"""
+
+    def __init__(self, inner, tracer):
+        self.inner = inner
+        self.tracer = tracer
+        # Lệnh runner bên trong tự chạy (repo discovery) không đi qua run() ở đây
+        if hasattr(inner, 'listeners'):
+            inner.listeners.append(self._record_internal)
+
+    def _record_internal(self, args, cwd, start, duration, code, out_bytes):
+        self.tracer.record(args, cwd, start, duration, code, out_bytes, self.tracer.current_step())
+
+    def __getattr__(self, name):
+        # repo_info, close... chuyển thẳng cho runner bên trong
+        return getattr(self.inner, name)
+
+    def run(self, args, cwd, **kwargs):
+        step = self.tracer.current_step()
+        start = time.perf_counter()
+        code, out_bytes = None, 0
+        try:
+            code, stdout, stderr = self.inner.run(args, cwd, **kwargs)
+            out_bytes = _size(stdout) + _size(stderr)
+            return code, stdout, stderr
+        finally:
+            self.tracer.record(args, cwd, start, time.perf_counter() - start, code, out_bytes, step)
+
+    def stream(self, args, cwd, **kwargs):
+        step = self.tracer.current_step()
+        start = time.perf_counter()
+        code, out_bytes = None, 0
+        try:
+            for name, line in self.inner.stream(args, cwd, **kwargs):
+                if name == 'exit':
+                    code = line
+                else:
+                    out_bytes += _size(line) + 1
+                yield name, line
+        finally:
+            self.tracer.record(args, cwd, start, time.perf_counter() - start, code, out_bytes, step)
+
+    def resolve(self, cwd, rev):
+        step = self.tracer.current_step()
+        start = time.perf_counter()
+        sha = None
+        try:
+            sha = self.inner.resolve(cwd, rev)
+            return sha
+        finally:
+            # inner.resolve tự gọi run() của chính nó nên ghi lại ở đây như một lệnh rev-parse
+            self.tracer.record(['rev-parse', '--verify', '-q', rev + '^{commit}'], cwd, start,
+                               time.perf_counter() - start, 0 if sha else 1, len(sha or ''), step)
+
+
+_tracer = None
+
+
+def enable_tracing():
+    """Bật tracing cho các GitCore tạo sau lời gọi này (bọc runner mặc định), trả về Tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+        runner_module.set_default_runner(TracingRunner(runner_module.default_runner(), _tracer))
+    return _tracer
+
+
+def get_tracer():
+    """Tracer đang bật, None nếu chưa gọi enable_tracing()"""
+    return _tracer
+
+
+def traced_step(func):
+    """Decorator: khi tracing đang bật, coi cả hàm là một bước (hiện thành một khối trên trace)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _tracer is None:
+            return func(*args, **kwargs)
+        with _tracer.step(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
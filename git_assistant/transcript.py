@@ -0,0 +1,279 @@
+"""Ghi lại và phát lại (record/replay) các lệnh git của GitCore.
+
+RecordingRunner bọc một runner thật và lưu mọi lệnh (argv, stdout, stderr, exit code) vào
+transcript JSON. ReplayRunner trả lời từ transcript trong bộ nhớ, không chạy process nào,
+để kiểm tra/đo logic của GitScenarios hàng nghìn lần mỗi giây:
+
+    git = GitCore(working_dir=repo, runner=RecordingRunner(default_runner()))
+    ...                                   # chạy workflow với repo thật
+    git.runner.save('push.json')
+
+    replay = ReplayRunner.load('push.json')
+    scenarios = GitScenarios(io_handler=ScriptedIO([...]))
+    scenarios.git.runner = replay
+    scenarios.workflow_push_code()
+    replay.verify()                       # ném TranscriptMismatch kèm diff nếu lệnh khác đi
+
+Cả hai runner đặt direct_reads = False: GitCore không đọc thẳng .git (HEAD, refs, cache theo
+mtime) mà hỏi git qua runner, để mọi thông tin workflow dùng đều nằm trong transcript.
+
+FetchEngine fetch nhiều remote song song nên thứ tự các lệnh đó thay đổi giữa các lần chạy:
+lúc ghi, lệnh chạy trong runner.parallel_group() được gắn "parallel" (mã nhóm); transcript lưu
+mỗi nhóm theo thứ tự đã sắp xếp, và khi phát lại thì một lệnh được khớp với bất kỳ lệnh nào
+chưa dùng trong cùng nhóm. Các lệnh khác (kể cả fetch chạy tuần tự) phải đúng thứ tự.
+"""
+import difflib
+import json
+import threading
+
+from .results import CommandCancelled, CommandTimeout
+from . import runner as runner_module
+from .runner import current_parallel_group, git_version
+
+TRANSCRIPT_VERSION = 1
+
+
+class TranscriptMismatch(AssertionError):
+    """Workflow chạy lệnh git khác với transcript (thừa, thiếu hoặc khác tham số)"""
+
+
+def describe(entry):
+    """Một dòng mô tả lệnh trong transcript, dùng để so sánh và in diff"""
+    if entry['kind'] == 'resolve':
+        return f"resolve {entry['rev']}"
+    prefix = "git" if entry['kind'] == 'run' else "git (stream)"
+    return f"{prefix} {' '.join(entry['args'])}"
+
+
+def _segment_end(commands, start):
+    """Vị trí ngay sau nhóm lệnh song song bắt đầu tại start (start + 1 nếu không thuộc nhóm nào)"""
+    end = start + 1
+    group = commands[start].get('parallel')
+    if group is not None:
+        while end < len(commands) and commands[end].get('parallel') == group:
+            end += 1
+    return end
+
+
+def normalize(commands):
+    """Bản sao commands với mỗi nhóm lệnh song song được sắp xếp theo mô tả lệnh,
+    mã nhóm đánh lại 1, 2... theo thứ tự xuất hiện"""
+    result = []
+    groups = {}
+    i = 0
+    while i < len(commands):
+        end = _segment_end(commands, i)
+        for entry in sorted(commands[i:end], key=describe):
+            if entry.get('parallel') is not None:
+                entry = dict(entry, parallel=groups.setdefault(entry['parallel'], len(groups) + 1))
+            result.append(entry)
+        i = end
+    return result
+
+
+def _raise_recorded(entry):
+    # Lệnh đã bị timeout/hủy lúc ghi -> phát lại đúng lỗi đó
+    if entry.get('error') == 'timeout':
+        raise CommandTimeout(entry['args'], entry.get('timeout'))
+    if entry.get('error') == 'cancelled':
+        raise CommandCancelled(entry['args'])
+    if entry.get('error') == 'exception':
+        raise RuntimeError(entry.get('message', ''))
+
+
+class RecordingRunner:
+    """Bọc runner thật, ghi lại từng lệnh cùng kết quả"""
+
+    direct_reads = False
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def _add(self, entry):
+        with self._lock:
+            self.entries.append(entry)
+
+    def _entry(self, kind, args, read_only):
+        entry = {'kind': kind, 'args': list(args), 'read_only': read_only}
+        group = current_parallel_group()
+        if group is not None:
+            entry['parallel'] = group
+        return entry
+
+    def run(self, args, cwd, read_only=False, timeout=None, cancel=None):
+        entry = self._entry('run', args, read_only)
+        try:
+            code, stdout, stderr = self.inner.run(args, cwd, read_only=read_only, timeout=timeout, cancel=cancel)
+        except CommandTimeout as e:
+            entry.update(error='timeout', timeout=e.timeout)
+            raise
+        except CommandCancelled:
+            entry['error'] = 'cancelled'
+            raise
+        except Exception as e:
+            entry.update(error='exception', message=str(e))
+            raise
+        finally:
+            self._add(entry)
+        entry.update(code=code, stdout=stdout, stderr=stderr)
+        return code, stdout, stderr
+
+    def stream(self, args, cwd, read_only=False, timeout=None, cancel=None, sep=None):
+        entry = self._entry('stream', args, read_only)
+        entry['lines'] = []
+        try:
+            for name, line in self.inner.stream(args, cwd, read_only=read_only, timeout=timeout,
+                                                cancel=cancel, sep=sep):
+                if name == 'exit':
+                    entry['code'] = line
+                else:
+                    entry['lines'].append([name, line])
+                yield name, line
+        except CommandTimeout as e:
+            entry.update(error='timeout', timeout=e.timeout)
+            raise
+        except CommandCancelled:
+            entry['error'] = 'cancelled'
+            raise
+        except Exception as e:
+            entry.update(error='exception', message=str(e))
+            raise
+        finally:
+            if 'code' not in entry and 'error' not in entry:
+                # Người gọi dừng đọc giữa chừng (đóng generator), process đã bị kill: không có exit code
+                entry['code'] = None
+            self._add(entry)
+
+    def resolve(self, cwd, rev):
+        sha = self.inner.resolve(cwd, rev)
+        self._add({'kind': 'resolve', 'rev': rev, 'sha': sha})
+        return sha
+
+    def close(self):
+        self.inner.close()
+
+    def transcript(self):
+        with self._lock:
+            entries = list(self.entries)
+        return {
+            'version': TRANSCRIPT_VERSION,
+            'git': '.'.join(str(p) for p in git_version()),
+            'commands': normalize(entries),
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.transcript(), f, indent=1, ensure_ascii=False)
+
+
+def _same(entry, actual):
+    if entry['kind'] != actual['kind']:
+        return False
+    if actual['kind'] == 'resolve':
+        return entry.get('rev') == actual['rev']
+    return entry['args'] == actual['args']
+
+
+class ReplayRunner:
+    """Trả lời lệnh git từ transcript theo đúng thứ tự, không chạy process.
+
+    Lệnh đầu tiên khác transcript sẽ ném TranscriptMismatch (các lệnh trong một đoạn fetch
+    song song được khớp không theo thứ tự). GitCore đổi mọi exception của
+    runner thành GitResult lỗi, nên lỗi cũng được giữ lại trong self.error; gọi verify() sau
+    khi workflow chạy xong để chắc chắn không có lệnh sai, thừa hay thiếu.
+    """
+
+    direct_reads = False
+
+    def __init__(self, commands):
+        self.commands = list(commands)
+        self.position = 0
+        self.issued = []
+        self.error = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != TRANSCRIPT_VERSION:
+            raise ValueError(f"Transcript {path} có phiên bản không hỗ trợ: {data.get('version')}")
+        return cls(data['commands'])
+
+    def reset(self):
+        """Phát lại từ đầu (dùng lại cùng transcript cho nhiều lần chạy)"""
+        with self._lock:
+            self.position = 0
+            self.issued = []
+            self.error = None
+
+    def _diff(self, extra=0):
+        expected = [describe(e) for e in self.commands[:len(self.issued) + extra]]
+        return '\n'.join(difflib.unified_diff(expected, self.issued, 'transcript', 'workflow', lineterm=''))
+
+    def _next(self, actual):
+        with self._lock:
+            if self.error is not None:
+                raise self.error
+            self.issued.append(describe(actual))
+            if self.position >= len(self.commands):
+                self.error = TranscriptMismatch(
+                    f"Workflow chạy thêm lệnh ngoài transcript: {self.issued[-1]}\n{self._diff()}")
+                raise self.error
+            end = _segment_end(self.commands, self.position)
+            match = next((i for i in range(self.position, end) if _same(self.commands[i], actual)), None)
+            if match is None:
+                entry = self.commands[self.position]
+                self.error = TranscriptMismatch(
+                    f"Lệnh thứ {self.position + 1} khác transcript: chờ `{describe(entry)}`, "
+                    f"gặp `{self.issued[-1]}`\n{self._diff()}")
+                raise self.error
+            # Đưa lệnh vừa khớp lên vị trí hiện tại; phần còn lại của đoạn vẫn khớp được theo thứ tự bất kỳ
+            commands = self.commands
+            commands[self.position], commands[match] = commands[match], commands[self.position]
+            entry = commands[self.position]
+            self.position += 1
+            return entry
+
+    def run(self, args, cwd, read_only=False, timeout=None, cancel=None):
+        entry = self._next({'kind': 'run', 'args': list(args)})
+        _raise_recorded(entry)
+        return entry['code'], entry['stdout'], entry['stderr']
+
+    def stream(self, args, cwd, read_only=False, timeout=None, cancel=None, sep=None):
+        entry = self._next({'kind': 'stream', 'args': list(args)})
+        for name, line in entry['lines']:
+            yield name, line
+        _raise_recorded(entry)
+        yield 'exit', entry.get('code')
+
+    def resolve(self, cwd, rev):
+        return self._next({'kind': 'resolve', 'rev': rev})['sha']
+
+    def close(self):
+        pass
+
+    def verify(self):
+        """Ném TranscriptMismatch nếu có lệnh sai/thừa, hoặc workflow chưa chạy hết transcript"""
+        with self._lock:
+            if self.error is not None:
+                raise self.error
+            if self.position < len(self.commands):
+                missing = describe(self.commands[self.position])
+                raise TranscriptMismatch(
+                    f"Workflow dừng sớm, còn {len(self.commands) - self.position} lệnh chưa chạy "
+                    f"(lệnh kế tiếp: `{missing}`)\n{self._diff(extra=len(self.commands) - self.position)}")
+
+
+_recorder = None
+
+
+def enable_recording():
+    """Ghi transcript cho các GitCore tạo sau lời gọi này (bọc runner mặc định), trả về RecordingRunner"""
+    global _recorder
+    if _recorder is None:
+        _recorder = RecordingRunner(runner_module.default_runner())
+        runner_module.set_default_runner(_recorder)
+    return _recorder
@@ -1,11 +1,14 @@
 from .scenarios import GitScenarios
-from .core import GitCore
 from .utils import print_header, print_info, get_input, clear_screen, Colors
 
 class GitUI:
     def __init__(self):
         self.scenarios = GitScenarios()
-        self.core = GitCore()
+
+    @property
+    def core(self):
+        # Dùng chung GitCore với scenarios (thư mục làm việc có thể đổi khi chuyển worktree)
+        return self.scenarios.git
 
     def show_main_menu(self):
         clear_screen()
@@ -16,10 +19,12 @@ class GitUI:
         print("-" * 50)
         print("1. [Quy trình] Đẩy code lên Server (Add -> Commit -> Push)")
         print("2. [Quy trình] Kéo code mới về (Pull)")
-        print("3. [Quy trình] Đồng bộ an toàn từ Main (Stash -> Pull Main -> Pop)")
+        print("3. [Quy trình] Đồng bộ an toàn từ Main (Fetch Main -> Stash -> Merge -> Pop)")
         print("4. [Quy trình] Bắt đầu tính năng mới (Tạo nhánh chuẩn)")
         print("5. [Công cụ] Xem trạng thái (Status)")
         print("6. [Công cụ] Quản lý lưu tạm (Stash/Pop)")
+        print("7. [Công cụ] Kiểm tra xung đột với Main (không thay đổi gì)")
+        print("8. [Công cụ] Quản lý Worktree (danh sách, dung lượng, dọn dẹp)")
         print("0. Thoát")
         print("-" * 50)
 
@@ -41,6 +46,10 @@ class GitUI:
                 print(s_out)
             elif choice == '6':
                 self.scenarios.workflow_fix_conflict_stash()
+            elif choice == '7':
+                self.scenarios.workflow_preview_conflicts()
+            elif choice == '8':
+                self.scenarios.workflow_manage_worktrees()
             elif choice == '0':
                 print("Tạm biệt!")
                 break
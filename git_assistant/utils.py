@@ -32,3 +32,16 @@ def get_input(prompt):
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
+
+def format_age(seconds):
+    """Đổi số giây thành chuỗi dễ đọc: '45 giây', '3 phút', '2 giờ', '5 ngày'"""
+    if seconds is None:
+        return "chưa bao giờ"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} giây"
+    if seconds < 3600:
+        return f"{seconds // 60} phút"
+    if seconds < 86400:
+        return f"{seconds // 3600} giờ"
+    return f"{seconds // 86400} ngày"
@@ -0,0 +1,338 @@
+"""Theo dõi thay đổi của repo (HEAD, index, refs, stash, file trong working tree) trên thread nền.
+
+Trên Linux dùng inotify (qua ctypes, không cần thư viện ngoài): kernel báo ngay khi có file
+thay đổi, không phải quét lại. Thư mục bị .gitignore loại (node_modules/, build/...) không được
+theo dõi. Nơi khác (hoặc khi không tạo được inotify) thì so chữ ký stat của .git theo chu kỳ.
+Một loạt sự kiện liền nhau (checkout, `git add .`...) được gộp lại (debounce) thành một lần gọi
+on_change(); on_change() càng tốn thời gian (status trên repo lớn) thì các lần gọi càng giãn ra.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from .cache import cache_for, common_dir
+from .runner import default_runner
+
+# Chờ yên lặng bao lâu (giây) sau sự kiện cuối mới báo, và báo muộn nhất sau bao lâu
+# nếu sự kiện đến liên tục (VD đang build)
+DEBOUNCE = 0.3
+MAX_DELAY = 2.0
+# Chu kỳ so chữ ký .git khi không có inotify (giây)
+POLL_INTERVAL = 1.0
+# Khi không theo dõi được hết working tree (không có inotify, vượt giới hạn watch),
+# vẫn báo định kỳ để đọc lại status: mỗi FULL_REFRESH giây, hoặc FULL_REFRESH_FACTOR lần
+# thời gian của lần on_change() trước nếu lâu hơn
+FULL_REFRESH = 5.0
+FULL_REFRESH_FACTOR = 20
+# Khoảng nghỉ tối thiểu giữa hai lần on_change() = BUSY_FACTOR lần thời gian của lần trước
+BUSY_FACTOR = 4
+# Số thư mục working tree tối đa đăng ký với inotify (giới hạn max_user_watches của kernel)
+MAX_WATCHES = 4096
+# Số đường dẫn mỗi lần hỏi `git check-ignore`
+CHECK_IGNORE_BATCH = 256
+
+# Loại thay đổi báo cho on_change(kinds)
+GIT = 'git'             # trong .git (HEAD, index, refs, stash...)
+WORKTREE = 'worktree'   # file trong working tree
+
+# Cờ của inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ATTRIB
+         | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _Inotify:
+    """Một inotify fd với danh sách thư mục đang theo dõi"""
+
+    def __init__(self, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 thất bại")
+        self.dirs = {}          # wd -> (thư mục, loại: 'git' | 'refs' | 'worktree')
+        self.counts = {}        # loại -> số thư mục đang theo dõi
+
+    def add(self, path, kind):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), _MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {path}")
+        if wd not in self.dirs:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.dirs[wd] = (path, kind)
+        return wd
+
+    def read(self):
+        """list (thư mục, loại, tên file, mask) của các sự kiện đang chờ"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_IGNORED:
+                # Thư mục đã bị xóa, kernel tự bỏ watch
+                path, kind = self.dirs.pop(wd, (None, None))
+                if kind:
+                    self.counts[kind] -= 1
+                continue
+            path, kind = self.dirs.get(wd, (None, None))
+            events.append((path, kind, name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class RepoWatcher:
+    """Gọi on_change(kinds) (trên thread nền của watcher) mỗi khi repo có thể đã thay đổi.
+
+    kinds là tập các loại thay đổi trong đợt vừa gộp: GIT (trong .git) và/hoặc WORKTREE
+    (file trong working tree, hoặc lần đọc lại định kỳ khi không theo dõi được hết cây).
+
+        watcher = RepoWatcher(working_dir, git_dir, on_change=refresh_panel)
+        watcher.start()   # watcher.backend: 'inotify' hoặc 'polling'
+        ...
+        watcher.stop()
+    """
+
+    def __init__(self, working_dir, git_dir, on_change, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL,
+                 runner=None):
+        self.working_dir = working_dir
+        self.git_dir = git_dir
+        self.common_dir = common_dir(git_dir)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        # Runner để hỏi `git check-ignore` (mặc định: runner dùng chung)
+        self.runner = runner if runner else default_runner()
+        self.backend = None
+        # True nếu không theo dõi được toàn bộ working tree (vượt MAX_WATCHES, hết watch của kernel)
+        self.partial = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self._first = None      # thời điểm sự kiện đầu/cuối của đợt đang chờ báo
+        self._last = None
+        self._kinds = set()     # loại thay đổi của đợt đang chờ báo
+        self._cost = 0.0        # thời gian (giây) của lần on_change() gần nhất
+        self._done = None       # thời điểm lần on_change() gần nhất kết thúc
+
+    def start(self):
+        libc = _load_libc()
+        if libc is not None:
+            try:
+                self._inotify = _Inotify(libc)
+                self._watch_all()
+                self.backend = 'inotify'
+            except OSError:
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+        if self._inotify is None:
+            self.backend = 'polling'
+            self.partial = True
+        # Báo một lần ngay sau khi bắt đầu để bên dùng đọc trạng thái ban đầu
+        self._mark(GIT)
+        self._mark(WORKTREE)
+        self._thread = threading.Thread(target=self._loop, name='repo-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- inotify ---
+
+    def _watch_all(self):
+        self._inotify.add(self.git_dir, 'git')
+        if self.common_dir != self.git_dir:
+            # Worktree phụ: packed-refs nằm ở thư mục .git chung
+            self._inotify.add(self.common_dir, 'git')
+        stash_logs = os.path.join(self.common_dir, 'logs', 'refs')
+        if os.path.isdir(stash_logs):
+            # `stash drop` một bản cũ chỉ sửa reflog logs/refs/stash
+            self._inotify.add(stash_logs, 'git')
+        self._watch_tree(os.path.join(self.common_dir, 'refs'), 'refs')
+        self._watch_tree(self.working_dir, 'worktree')
+
+    def _watch_tree(self, root, kind):
+        # Duyệt theo từng tầng để hỏi check-ignore một lần cho cả tầng, không đi vào thư mục bị ignore
+        level = [root]
+        while level:
+            children = []
+            for path in level:
+                if kind == 'worktree' and self._inotify.counts.get(kind, 0) >= MAX_WATCHES:
+                    self.partial = True
+                    return
+                try:
+                    self._inotify.add(path, kind)
+                except OSError as e:
+                    if e.errno == errno.ENOSPC:
+                        # Hết max_user_watches: phần còn lại của cây dựa vào FULL_REFRESH
+                        self.partial = True
+                        return
+                    continue
+                try:
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            if entry.name == '.git':
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                children.append(entry.path)
+                except OSError:
+                    continue
+            if kind == 'worktree' and children:
+                ignored = self._ignored(children)
+                children = [path for path in children if path not in ignored]
+            level = children
+
+    def _ignored(self, paths):
+        """Tập con của paths bị .gitignore loại (`git check-ignore`); rỗng nếu không hỏi được git"""
+        ignored = set()
+        for i in range(0, len(paths), CHECK_IGNORE_BATCH):
+            chunk = {os.path.relpath(path, self.working_dir): path for path in paths[i:i + CHECK_IGNORE_BATCH]}
+            try:
+                code, out, _ = self.runner.run(['-c', 'core.quotepath=false', 'check-ignore', '--'] + list(chunk),
+                                               self.working_dir, read_only=True)
+            except Exception:
+                return ignored
+            # 0: có đường dẫn bị ignore, 1: không có cái nào
+            if code not in (0, 1):
+                return ignored
+            ignored.update(chunk[line] for line in out.splitlines() if line in chunk)
+        return ignored
+
+    def _relevant(self, path, kind, name, mask):
+        if mask & IN_Q_OVERFLOW:
+            return True
+        if name.endswith('.lock'):
+            # Git ghi file .lock rồi rename; chỉ lần rename (tên thật) mới là thay đổi
+            return False
+        if kind == 'git' and mask & IN_ISDIR:
+            return False
+        if kind in ('refs', 'worktree') and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            new_dir = os.path.join(path, name)
+            if kind == 'worktree' and self._ignored([new_dir]):
+                # build/, node_modules/... vừa được tạo: không theo dõi, không cần đọc lại status
+                return False
+            # Thư mục mới (nhánh feature/..., thư mục code mới) -> theo dõi luôn
+            self._watch_tree(new_dir, kind)
+        return True
+
+    # --- vòng lặp chung ---
+
+    def _loop(self):
+        signature = self._signature() if self._inotify is None else None
+        last_full = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self._inotify is not None:
+                self._wait_events(self._timeout(now))
+            else:
+                self._stop.wait(min(self.poll_interval, self._timeout(now)))
+                current = self._signature()
+                if current != signature:
+                    signature = current
+                    self._mark(GIT)
+            now = time.monotonic()
+            fire = self._last is not None and (now - self._last >= self.debounce or now - self._first >= MAX_DELAY)
+            if self.partial and now - last_full >= max(FULL_REFRESH, FULL_REFRESH_FACTOR * self._cost):
+                self._mark(WORKTREE)
+                fire = True
+            if fire and self._done is not None and now - self._done < BUSY_FACTOR * self._cost:
+                # Lần trước còn tốn nhiều thời gian: gộp tiếp, báo sau
+                fire = False
+            if fire:
+                kinds, self._kinds = self._kinds, set()
+                self._first = self._last = None
+                last_full = now
+                try:
+                    self.on_change(kinds)
+                except Exception:
+                    pass
+                self._done = time.monotonic()
+                self._cost = self._done - now
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _timeout(self, now):
+        if self._last is None:
+            return self.poll_interval
+        due = min(self._last + self.debounce, self._first + MAX_DELAY)
+        if self._done is not None:
+            due = max(due, self._done + BUSY_FACTOR * self._cost)
+        return max(0.01, due - now)
+
+    def _wait_events(self, timeout):
+        try:
+            ready, _, _ = select.select([self._inotify.fd], [], [], timeout)
+        except (OSError, ValueError):
+            return
+        if not ready:
+            return
+        # Xét hết mọi sự kiện (không dừng sớm) để thư mục mới nào cũng được đăng ký theo dõi
+        for path, kind, name, mask in self._inotify.read():
+            if not self._relevant(path, kind, name, mask):
+                continue
+            if mask & IN_Q_OVERFLOW:
+                # Kernel làm mất sự kiện: không biết đã đổi ở đâu
+                self._mark(GIT)
+                self._mark(WORKTREE)
+            else:
+                self._mark(WORKTREE if kind == 'worktree' else GIT)
+
+    def _mark(self, kind):
+        now = time.monotonic()
+        if self._last is None:
+            self._first = now
+        self._last = now
+        self._kinds.add(kind)
+
+    def _signature(self):
+        # Cùng chữ ký với cache trạng thái: HEAD, index, packed-refs, thư mục refs, reflog stash
+        return cache_for(self.git_dir).signature()
@@ -0,0 +1,160 @@
+"""Quản lý `git worktree`: mỗi nhánh đang làm một thư mục riêng, chuyển nhánh = đổi thư mục.
+
+Không cần stash + checkout (không ghi lại file trong working tree, không để lại stash bị quên).
+Worktree do công cụ tạo nằm trong thư mục `<tên repo>.worktrees/` cạnh repo chính.
+"""
+import os
+
+from .progress import format_bytes
+from .results import GitResult
+
+
+class Worktree:
+    """Một worktree trong `git worktree list --porcelain`"""
+    __slots__ = ('path', 'head', 'branch', 'bare', 'detached', 'locked', 'prunable')
+
+    def __init__(self, path):
+        self.path = path
+        self.head = None
+        self.branch = None        # tên nhánh ngắn (main, feature/x), None nếu detached/bare
+        self.bare = False
+        self.detached = False
+        self.locked = None        # lý do khóa ('' nếu khóa không ghi lý do)
+        self.prunable = None      # lý do có thể prune (thư mục đã bị xóa...)
+
+    def format(self):
+        label = self.branch or ("(bare)" if self.bare else f"(detached {self.head[:7] if self.head else '?'})")
+        flags = []
+        if self.locked is not None:
+            flags.append("khóa")
+        if self.prunable is not None:
+            flags.append("mất thư mục")
+        return f"{label:<30} {self.path}" + (f" [{', '.join(flags)}]" if flags else "")
+
+    def __repr__(self):
+        return f"Worktree({self.path!r}, branch={self.branch!r})"
+
+
+def parse_worktree_list(output):
+    """Đọc output của `git worktree list --porcelain`"""
+    worktrees = []
+    current = None
+    for line in output.splitlines():
+        if not line:
+            current = None
+            continue
+        key, _, value = line.partition(' ')
+        if key == 'worktree':
+            current = Worktree(value)
+            worktrees.append(current)
+        elif current is None:
+            continue
+        elif key == 'HEAD':
+            current.head = value
+        elif key == 'branch':
+            current.branch = value[len('refs/heads/'):] if value.startswith('refs/heads/') else value
+        elif key == 'bare':
+            current.bare = True
+        elif key == 'detached':
+            current.detached = True
+        elif key == 'locked':
+            current.locked = value
+        elif key == 'prunable':
+            current.prunable = value
+    return worktrees
+
+
+def disk_usage(path):
+    """Tổng dung lượng file (byte) trong path, bỏ qua thư mục .git, không đi theo symlink"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.name == '.git':
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class WorktreeManager:
+    """Tạo/liệt kê/dọn worktree của một repo, mỗi nhánh một worktree"""
+
+    def __init__(self, git, root=None):
+        self.git = git
+        self._root = root
+
+    def main_path(self):
+        """Thư mục worktree chính (worktree đầu tiên trong danh sách)"""
+        worktrees = self.list()
+        return worktrees[0].path if worktrees else self.git.working_dir
+
+    @property
+    def root(self):
+        """Thư mục chứa các worktree do công cụ tạo"""
+        if self._root is None:
+            main = os.path.normpath(self.main_path())
+            self._root = os.path.join(os.path.dirname(main), os.path.basename(main) + '.worktrees')
+        return self._root
+
+    def list(self):
+        ok, out = self.git.run_command(['worktree', 'list', '--porcelain'], show_output=False, read_only=True)
+        return parse_worktree_list(out) if ok else []
+
+    def find(self, branch):
+        """Worktree đang mở nhánh branch, None nếu chưa có"""
+        return next((wt for wt in self.list() if wt.branch == branch), None)
+
+    def path_for(self, branch):
+        # feature/login -> feature-login, tránh lồng thư mục
+        return os.path.join(self.root, branch.replace('/', '-').replace('\\', '-'))
+
+    def is_managed(self, worktree):
+        root = os.path.normcase(os.path.abspath(self.root)) + os.sep
+        return os.path.normcase(os.path.abspath(worktree.path)).startswith(root)
+
+    def ensure(self, branch):
+        """Trả về (GitResult, đường dẫn worktree của branch); chưa có thì tạo.
+
+        Nhánh chỉ có trên remote (origin/<branch>) được git tự tạo nhánh local theo dõi remote.
+        """
+        existing = self.find(branch)
+        if existing and existing.prunable is None:
+            return GitResult(True, existing.path), existing.path
+        if existing:
+            # Thư mục của worktree cũ đã bị xóa tay -> dọn đăng ký cũ rồi tạo lại
+            self.prune()
+        path = self.path_for(branch)
+        os.makedirs(self.root, exist_ok=True)
+        result = self.git.run_command(['worktree', 'add', path, branch])
+        return result, path
+
+    def remove(self, worktree, force=False):
+        cmd = ['worktree', 'remove']
+        if force:
+            cmd.append('--force')
+        cmd.append(worktree.path if isinstance(worktree, Worktree) else worktree)
+        return self.git.run_command(cmd)
+
+    def prune(self):
+        """Xóa đăng ký của các worktree mà thư mục không còn tồn tại"""
+        return self.git.run_command(['worktree', 'prune', '--verbose'])
+
+    def usage(self):
+        """list (Worktree, số byte) cho mọi worktree còn thư mục"""
+        return [(wt, disk_usage(wt.path)) for wt in self.list() if not wt.bare and wt.prunable is None]
+
+    def format_usage(self):
+        rows = self.usage()
+        lines = [f"{wt.format()}  {format_bytes(size)}" for wt, size in rows]
+        lines.append(f"Tổng: {len(rows)} worktree, {format_bytes(sum(size for _, size in rows))}")
+        return "\n".join(lines)
@@ -14,12 +14,73 @@ import tkinter as tk
 # Thêm thư mục hiện tại vào path để import package
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+def run_fleet(args):
+    from git_assistant.fleet import FleetRunner, discover_repos, load_manifest, load_policy, format_table
+
+    repos = load_manifest(args.manifest) if args.manifest else discover_repos(args.fleet)
+    if not repos:
+        print("Không tìm thấy repo git nào.")
+        return
+    print(f"Đang chạy '{args.op}' trên {len(repos)} repo ({args.jobs} luồng)...")
+    runner = FleetRunner(repos, policy=load_policy(args.policy), max_workers=args.jobs,
+                         on_result=lambda r: print(f"  {'✔' if r.ok else '✘'} {r.repo}"))
+    results = runner.run(args.op)
+    print()
+    print(format_table(results, root=args.fleet))
+
 def main():
     parser = argparse.ArgumentParser(description="Git Assistant Tool")
     parser.add_argument("--cli", action="store_true", help="Chạy chế độ dòng lệnh (CLI)")
+    parser.add_argument("--fleet", metavar="ROOT", help="Chạy trên tất cả repo git nằm dưới thư mục ROOT")
+    parser.add_argument("--manifest", metavar="FILE", help="Danh sách repo (JSON hoặc mỗi dòng một đường dẫn)")
+    parser.add_argument("--op", default="status", choices=["fetch", "pull", "status", "sync"],
+                        help="Thao tác chạy trên các repo (mặc định: status)")
+    parser.add_argument("--policy", metavar="FILE", help="File JSON trả lời tự động các câu hỏi của workflow")
+    parser.add_argument("--jobs", type=int, default=4, help="Số repo xử lý song song (mặc định: 4)")
+    parser.add_argument("--trace", metavar="FILE", help="Ghi thời gian từng lệnh git ra FILE (Chrome trace JSON)")
+    parser.add_argument("--profile", metavar="FILE", help="Ghi cProfile của cả phiên làm việc ra FILE")
+    parser.add_argument("--record", metavar="FILE", help="Ghi mọi lệnh git và output ra FILE (transcript để phát lại)")
     args = parser.parse_args()
 
-    if args.cli:
+    tracer = None
+    if args.trace:
+        from git_assistant.tracing import enable_tracing
+        tracer = enable_tracing()
+
+    recorder = None
+    if args.record:
+        from git_assistant.transcript import enable_recording
+        recorder = enable_recording()
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        run_app(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Đã ghi cProfile vào {args.profile} (xem bằng: python -m pstats {args.profile})")
+        if tracer:
+            tracer.export_chrome_trace(args.trace)
+            print(tracer.summary())
+            print(f"Đã ghi trace vào {args.trace} (mở bằng chrome://tracing hoặc ui.perfetto.dev)")
+        if recorder:
+            recorder.save(args.record)
+            print(f"Đã ghi {len(recorder.entries)} lệnh git vào {args.record}")
+
+def run_app(args):
+    if args.fleet or args.manifest or not args.cli:
+        # GUI và fleet không có ai trả lời câu hỏi mật khẩu trên terminal
+        from git_assistant.runner import set_terminal_prompts
+        set_terminal_prompts(False)
+    if args.fleet or args.manifest:
+        run_fleet(args)
+    elif args.cli:
         try:
             from git_assistant.ui import GitUI
             app = GitUI()
@@ -35,6 +96,8 @@ def main():
         except ImportError as e:
             print(f"Lỗi khởi động GUI: {e}")
             print("Đang thử chuyển sang chế độ CLI...")
+            from git_assistant.runner import set_terminal_prompts
+            set_terminal_prompts(None)
             from git_assistant.ui import GitUI
             app = GitUI()
             app.run()
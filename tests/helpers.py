@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Phần chung của các test: đưa thư mục gốc vào sys.path và tạo repo git tạm.
+
+Import module này trước git_assistant (cả pytest và `unittest discover tests` đều thêm tests/
+vào sys.path, nên `import helpers` chạy được với cả hai).
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Danh tính commit cố định, không phụ thuộc cấu hình git của máy chạy test
+IDENTITY = ('-c', 'user.name=Test', '-c', 'user.email=test@example.com')
+
+
+def git(repo, *args):
+    """Chạy `git -C repo <args>` (lỗi thì ném CalledProcessError), trả về stdout đã strip"""
+    return subprocess.run(['git', '-C', repo] + list(args), check=True, text=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.strip()
+
+
+def temp_dir(test, prefix):
+    """Thư mục tạm tự xóa khi test kết thúc"""
+    path = tempfile.mkdtemp(prefix=prefix)
+    test.addCleanup(shutil.rmtree, path, True)
+    return path
+
+
+def init_repo(path, branch='main'):
+    """git init (nhánh đầu tiên là branch) kèm user.name/user.email"""
+    os.makedirs(path, exist_ok=True)
+    git(path, 'init', '-q', '-b', branch)
+    git(path, 'config', 'user.name', 'Test')
+    git(path, 'config', 'user.email', 'test@example.com')
+    return path
+
+
+def commit(repo, name):
+    """Ghi file <name>.txt rồi commit với message name"""
+    with open(os.path.join(repo, name + '.txt'), 'w', encoding='utf-8') as f:
+        f.write(name + "\n")
+    git(repo, 'add', '.')
+    git(repo, *IDENTITY, 'commit', '-q', '-m', name)
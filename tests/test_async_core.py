@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""AsyncGitCore: các thao tác gọi đúng hàm của GitCore (cùng tham số, cùng log)."""
+import asyncio
+import unittest
+
+from helpers import IDENTITY, git, temp_dir
+
+from git_assistant.core import GitCore
+from git_assistant.io_handler import ScriptedIO
+from git_assistant.runner import SubprocessRunner
+
+
+class AsyncGitCoreTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = temp_dir(self, 'git_assistant_async_')
+        git(self.repo, 'init', '-q', '-b', 'main')
+        for name in ('first', 'second'):
+            git(self.repo, *IDENTITY, 'commit', '-q', '--allow-empty', '-m', name)
+        self.io = ScriptedIO(strict=False)
+        self.aio = GitCore(working_dir=self.repo, io_handler=self.io, runner=SubprocessRunner()).aio()
+
+    def test_checkout_new_from_start_point(self):
+        ok, out = asyncio.run(self.aio.checkout_new('feature/x', 'main~1'))
+        self.assertTrue(ok, out)
+        self.assertEqual(git(self.repo, 'rev-parse', 'HEAD'), git(self.repo, 'rev-parse', 'main~1'))
+        self.assertEqual(asyncio.run(self.aio.current_branch()), 'feature/x')
+        self.assertTrue(any('feature/x' in line for line in self.io.lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""ConsoleIO: thông báo từ thread khác không chen vào giữa câu hỏi đang chờ người dùng gõ."""
+import threading
+import unittest
+from unittest import mock
+
+import helpers  # noqa: F401
+
+from git_assistant import io_handler
+from git_assistant.io_handler import ConsoleIO
+
+
+class HeldMessagesTest(unittest.TestCase):
+    def setUp(self):
+        self.printed = []
+        self.typed = threading.Event()
+
+        def fake_input(prompt):
+            self.printed.append(prompt)
+            self.typed.wait(5)
+            return "feature/login"
+
+        for name, value in (('input', fake_input), ('print', lambda text='', **kw: self.printed.append(text))):
+            patcher = mock.patch.object(io_handler, name, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.typed.set)
+
+    def test_log_waits_for_answer(self):
+        io = ConsoleIO()
+        answer = io.ask_input("Nhập tên nhánh mới")
+        io.log("ℹ Đang lấy origin/main mới nhất...")
+        self.assertEqual(self.printed, ["Nhập tên nhánh mới: "])
+
+        self.typed.set()
+        self.assertEqual(answer.result(timeout=5), "feature/login")
+        self.assertEqual(self.printed, ["Nhập tên nhánh mới: ", "ℹ Đang lấy origin/main mới nhất..."])
+
+        io.warning("sau câu hỏi")
+        self.assertEqual(len(self.printed), 3)
+        self.assertIn("sau câu hỏi", self.printed[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""GitCore.is_dirty/has_changes: chỉ dựa vào exit code, file chỉ bị "touch" không tính là thay đổi, không dùng cache cũ."""
+import os
+import time
+import unittest
+
+from helpers import git, init_repo, temp_dir
+
+from git_assistant.core import GitCore
+from git_assistant.runner import SubprocessRunner
+
+
+class DirtyCheckTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = init_repo(temp_dir(self, 'git_assistant_dirty_'))
+        self.file = os.path.join(self.repo, 'a.txt')
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write("a\n")
+        git(self.repo, 'add', '.')
+        git(self.repo, 'commit', '-q', '-m', 'init')
+        self.git = GitCore(working_dir=self.repo, runner=SubprocessRunner(), use_cache=False)
+
+    def test_touched_file_is_clean(self):
+        stamp = time.time() + 5
+        os.utime(self.file, (stamp, stamp))
+        self.assertFalse(self.git.is_dirty())
+
+    def test_modified_file_is_dirty(self):
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write("b\n")
+        self.assertTrue(self.git.is_dirty())
+
+    def test_untracked_file(self):
+        with open(os.path.join(self.repo, 'new.txt'), 'w', encoding='utf-8') as f:
+            f.write("new\n")
+        self.assertTrue(self.git.is_dirty())
+        self.assertFalse(self.git.is_dirty(untracked=False))
+
+    def test_repo_without_commits(self):
+        empty = init_repo(temp_dir(self, 'git_assistant_dirty_'))
+        core = GitCore(working_dir=empty, runner=SubprocessRunner(), use_cache=False)
+        self.assertFalse(core.is_dirty())
+        with open(os.path.join(empty, 'new.txt'), 'w', encoding='utf-8') as f:
+            f.write("new\n")
+        self.assertTrue(core.is_dirty())
+        self.assertFalse(core.is_dirty(untracked=False))
+        git(empty, 'add', '.')
+        self.assertTrue(core.is_dirty(untracked=False))
+
+    def test_status_is_formatted_from_porcelain(self):
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write("b\n")
+        ok, out = self.git.status()
+        self.assertTrue(ok, out)
+        self.assertIn("M a.txt", out)
+
+    def test_has_changes_ignores_cached_result(self):
+        core = GitCore(working_dir=self.repo, runner=SubprocessRunner())
+        self.assertFalse(core.has_changes())
+        # Sửa file ngay sau đó: chữ ký .git không đổi nhưng has_changes vẫn phải thấy
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write("b\n")
+        self.assertTrue(core.has_changes())
+
+
+if __name__ == '__main__':
+    unittest.main()
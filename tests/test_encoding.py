@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Output không phải UTF-8 (tên file latin-1) phải được giải mã mà không chạy lại lệnh git."""
+import os
+import sys
+import unittest
+
+from helpers import git, init_repo, temp_dir
+
+from git_assistant.core import GitCore
+from git_assistant.runner import SubprocessRunner, decode_output
+
+
+class CountingRunner(SubprocessRunner):
+    """SubprocessRunner đếm số process git đã tạo"""
+
+    def __init__(self):
+        self.commands = []
+
+    def _exec(self, full_cmd, cwd, env, timeout, cancel):
+        self.commands.append(full_cmd[1:])
+        return SubprocessRunner._exec(self, full_cmd, cwd, env, timeout, cancel)
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), "cần hệ thống file nhận tên file dạng byte tùy ý")
+class Latin1CommitTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = init_repo(temp_dir(self, 'git_assistant_enc_'))
+        # In tên file nguyên byte thay vì "caf\351.txt" để output thật sự không phải UTF-8
+        git(self.repo, 'config', 'core.quotepath', 'false')
+        with open(os.path.join(os.fsencode(self.repo), b'caf\xe9.txt'), 'wb') as f:
+            f.write(b'latin-1\n')
+
+    def test_commit_runs_git_once(self):
+        runner = CountingRunner()
+        core = GitCore(working_dir=self.repo, runner=runner, use_cache=False)
+        self.assertTrue(core.add_all().success)
+
+        runner.commands.clear()
+        ok, out = core.commit("thêm file latin-1")
+
+        self.assertTrue(ok, out)
+        self.assertEqual([args[0] for args in runner.commands], ['commit'])
+        self.assertIsInstance(out, str)
+        self.assertIn("caf", out)
+        self.assertIn("thêm file latin-1", out)
+
+
+class DecodeOutputTest(unittest.TestCase):
+    def test_utf8(self):
+        self.assertEqual(decode_output("nhánh chính".encode('utf-8')), "nhánh chính")
+
+    def test_latin1_does_not_raise(self):
+        text = decode_output(b"create mode 100644 caf\xe9.txt")
+        self.assertTrue(text.startswith("create mode 100644 caf"))
+
+    def test_empty(self):
+        self.assertEqual(decode_output(b''), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""parse_progress: đọc dòng tiến độ của git, kể cả lần truyền nhỏ git ghi đơn vị "bytes"."""
+import unittest
+
+import helpers  # noqa: F401
+
+from git_assistant.progress import parse_progress
+
+
+class ParseProgressTest(unittest.TestCase):
+    def test_small_transfer_in_bytes(self):
+        event = parse_progress("Receiving objects: 100% (3/3), 254 bytes | 254.00 KiB/s, done.")
+        self.assertEqual((event.current, event.total), (3, 3))
+        self.assertEqual(event.bytes, 254)
+        self.assertEqual(event.rate, 254 * 1024)
+        self.assertTrue(event.done)
+
+    def test_rate_in_bytes(self):
+        event = parse_progress("Writing objects: 100% (1/1), 1 byte | 1 byte/s, done.")
+        self.assertEqual((event.bytes, event.rate), (1, 1))
+        self.assertTrue(event.done)
+
+    def test_binary_units(self):
+        event = parse_progress("Receiving objects:  45% (450/1000), 1.50 MiB | 2.00 MiB/s")
+        self.assertEqual(event.percent, 45)
+        self.assertEqual(event.bytes, int(1.5 * 1024 ** 2))
+        self.assertEqual(event.rate, 2 * 1024 ** 2)
+        self.assertFalse(event.done)
+
+    def test_remote_line(self):
+        event = parse_progress("remote: Counting objects: 100% (12/12), done.")
+        self.assertTrue(event.remote)
+        self.assertEqual(event.phase, "Counting objects")
+        self.assertIsNone(event.bytes)
+
+    def test_not_progress(self):
+        self.assertIsNone(parse_progress("From github.com:org/repo"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""GitCore.pull_config/merge_upstream: làm giống `git pull` (pull.rebase, pull.ff, từ chối khi nhánh đã tách)."""
+import os
+import unittest
+
+from helpers import IDENTITY, commit, git, temp_dir
+
+from git_assistant.core import GitCore
+from git_assistant.io_handler import ScriptedIO
+from git_assistant.runner import SubprocessRunner
+from git_assistant.scenarios import GitScenarios
+
+
+class PullRebaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_dir(self, 'git_assistant_rebase_')
+        self.upstream = os.path.join(self.tmp, 'upstream')
+        self.repo = os.path.join(self.tmp, 'repo')
+        os.makedirs(self.upstream)
+        git(self.upstream, 'init', '-q', '-b', 'main')
+        commit(self.upstream, 'base')
+        git(self.tmp, 'clone', '-q', self.upstream, self.repo)
+        # Nhánh local có một merge commit chưa đẩy lên
+        git(self.repo, 'checkout', '-q', '-b', 'side')
+        commit(self.repo, 'side')
+        git(self.repo, 'checkout', '-q', 'main')
+        commit(self.repo, 'local')
+        git(self.repo, *IDENTITY, 'merge', '-q', '--no-ff', '-m', 'merge side', 'side')
+        commit(self.upstream, 'remote')
+        git(self.repo, 'fetch', '-q')
+        self.git = GitCore(working_dir=self.repo, runner=SubprocessRunner(), use_cache=False)
+
+    def test_branch_setting_wins(self):
+        git(self.repo, 'config', 'pull.rebase', 'false')
+        git(self.repo, 'config', 'branch.main.rebase', 'm')
+        self.assertEqual(self.git.pull_config(), ('merges', None))
+
+    def test_merges_keeps_merge_commit(self):
+        git(self.repo, 'config', 'pull.rebase', 'merges')
+        ok, out = self.git.merge_upstream()
+        self.assertTrue(ok, out)
+        self.assertEqual(git(self.repo, 'rev-list', '--count', '--merges', '@{u}..HEAD'), '1')
+        self.assertEqual(git(self.repo, 'merge-base', 'HEAD', '@{u}'), git(self.repo, 'rev-parse', '@{u}'))
+
+    def test_interactive_is_not_run(self):
+        git(self.repo, 'config', 'pull.rebase', 'interactive')
+        head = git(self.repo, 'rev-parse', 'HEAD')
+        ok, out = self.git.merge_upstream()
+        self.assertFalse(ok)
+        self.assertIn('rebase -i', out)
+        self.assertEqual(git(self.repo, 'rev-parse', 'HEAD'), head)
+
+    def test_ff_only_refuses_diverged_branch(self):
+        git(self.repo, 'config', 'pull.ff', 'only')
+        head = git(self.repo, 'rev-parse', 'HEAD')
+        ok, out = self.git.merge_upstream()
+        self.assertFalse(ok)
+        self.assertEqual(git(self.repo, 'rev-parse', 'HEAD'), head)
+
+    def test_unconfigured_diverged_branch_is_refused(self):
+        self.assertEqual(self.git.pull_config(), (None, None))
+        head = git(self.repo, 'rev-parse', 'HEAD')
+        ok, out = self.git.merge_upstream()
+        self.assertFalse(ok)
+        self.assertIn('pull.rebase', out)
+        self.assertEqual(git(self.repo, 'rev-parse', 'HEAD'), head)
+
+    def test_workflow_pull_respects_ff_only(self):
+        git(self.repo, 'config', 'pull.ff', 'only')
+        head = git(self.repo, 'rev-parse', 'HEAD')
+        io = ScriptedIO([], strict=False)
+        GitScenarios(io_handler=io, working_dir=self.repo).workflow_pull_code()
+        self.assertEqual(git(self.repo, 'rev-parse', 'HEAD'), head)
+        self.assertTrue(any('pull.ff=only' in line for line in io.lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
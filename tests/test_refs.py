@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""RefReader/PackedRefs: đọc ref thẳng từ .git, không giữ file mở, nhận đúng extensions.refStorage."""
+import os
+import unittest
+
+from helpers import temp_dir
+
+from git_assistant.refs import PackedRefs, RefReader, UnsupportedRefStorage
+
+SHA_A = 'a' * 40
+SHA_B = 'b' * 40
+
+
+class RefReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.git_dir = temp_dir(self, 'git_assistant_refs_')
+        os.makedirs(os.path.join(self.git_dir, 'refs', 'heads'))
+        with open(os.path.join(self.git_dir, 'HEAD'), 'w') as f:
+            f.write("ref: refs/heads/main\n")
+        self.write_config("[core]\n\trepositoryformatversion = 1\n")
+        self.write_packed(SHA_A)
+
+    def write_config(self, text):
+        with open(os.path.join(self.git_dir, 'config'), 'w') as f:
+            f.write(text)
+
+    def write_packed(self, main_sha):
+        # Giống git: ghi file tạm rồi rename đè lên packed-refs
+        tmp = os.path.join(self.git_dir, 'packed-refs.lock')
+        with open(tmp, 'w') as f:
+            f.write("# pack-refs with: peeled fully-peeled sorted \n")
+            f.write(f"{SHA_B} refs/heads/feature/x\n")
+            f.write(f"{main_sha} refs/heads/main\n")
+            f.write(f"{SHA_B} refs/tags/v1\n^{SHA_A}\n")
+        os.replace(tmp, os.path.join(self.git_dir, 'packed-refs'))
+
+    def test_reads_packed_refs(self):
+        reader = RefReader(self.git_dir)
+        self.assertEqual(reader.current_branch(), 'main')
+        self.assertEqual(reader.local_branches(), ['feature/x', 'main'])
+        self.assertEqual(reader.resolve('refs/tags/v1'), SHA_B)
+
+    def test_picks_up_rewritten_packed_refs(self):
+        packed = PackedRefs(os.path.join(self.git_dir, 'packed-refs'))
+        self.assertEqual(packed.get('refs/heads/main'), SHA_A)
+        self.write_packed(SHA_B)
+        self.assertEqual(packed.get('refs/heads/main'), SHA_B)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), "cần /proc để liệt kê file đang mở")
+    def test_does_not_keep_file_open(self):
+        packed = PackedRefs(os.path.join(self.git_dir, 'packed-refs'))
+        packed.get('refs/heads/main')
+        path = os.path.realpath(os.path.join(self.git_dir, 'packed-refs'))
+        open_files = set()
+        for fd in os.listdir('/proc/self/fd'):
+            try:
+                open_files.add(os.readlink(os.path.join('/proc/self/fd', fd)))
+            except OSError:
+                pass
+        self.assertNotIn(path, open_files)
+
+    def test_ref_storage_files_is_supported(self):
+        self.write_config("[core]\n\trepositoryformatversion = 1\n[extensions]\n\trefStorage = files\n")
+        self.assertEqual(RefReader(self.git_dir).current_branch(), 'main')
+
+    def test_ref_storage_reftable_is_rejected(self):
+        self.write_config('[Extensions]\n\trefstorage = "reftable" ; comment\n')
+        with self.assertRaises(UnsupportedRefStorage):
+            RefReader(self.git_dir)
+
+    def test_ref_storage_outside_extensions_is_ignored(self):
+        self.write_config('# refStorage = reftable\n[alias]\n\trefStorage = !echo reftable\n'
+                          '[remote "refstorage"]\n\turl = /tmp/x\n')
+        self.assertEqual(RefReader(self.git_dir).current_branch(), 'main')
+
+
+if __name__ == '__main__':
+    unittest.main()
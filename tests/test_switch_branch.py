@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""workflow_switch_branch: danh sách có cả nhánh chỉ có trên remote, "fetch lại" mang về nhánh mới."""
+import os
+import unittest
+
+from helpers import IDENTITY, git, temp_dir
+
+from git_assistant.io_handler import ScriptedIO
+from git_assistant.scenarios import REFRESH_REMOTE, GitScenarios
+
+
+class SwitchRemoteBranchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_dir(self, 'git_assistant_switch_')
+        self.upstream = os.path.join(self.tmp, 'upstream')
+        self.repo = os.path.join(self.tmp, 'repo')
+        os.makedirs(self.upstream)
+        git(self.upstream, 'init', '-q', '-b', 'main')
+        git(self.upstream, *IDENTITY, 'commit', '-q', '--allow-empty', '-m', 'base')
+        git(self.upstream, 'branch', 'feature/old')
+        git(self.tmp, 'clone', '-q', self.upstream, self.repo)
+        # Nhánh mới được đẩy lên sau khi clone: chỉ thấy sau khi fetch lại
+        git(self.upstream, 'branch', 'feature/new')
+
+    def test_remote_only_branches_are_listed(self):
+        scenarios = GitScenarios(io_handler=ScriptedIO(strict=False), working_dir=self.repo)
+        index = scenarios.git.branch_index(remote=True)
+        self.assertIn('origin/feature/old', index)
+        self.assertNotIn('origin/main', index)
+        self.assertNotIn('origin/feature/new', index)
+
+    def test_refresh_then_checkout_remote_branch(self):
+        io = ScriptedIO([REFRESH_REMOTE, 'origin/feature/new'])
+        GitScenarios(io_handler=io, working_dir=self.repo).workflow_switch_branch()
+        self.assertEqual(git(self.repo, 'branch', '--show-current'), 'feature/new')
+        self.assertEqual(git(self.repo, 'rev-parse', '--abbrev-ref', '@{u}'), 'origin/feature/new')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""workflow_sync_main: chỉ quay về cách cũ (checkout main rồi pull) khi main không fast-forward được."""
+import os
+import unittest
+
+from helpers import commit, git, temp_dir
+
+from git_assistant.io_handler import ScriptedIO
+from git_assistant.scenarios import GitScenarios
+
+
+class SyncMainTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_dir(self, 'git_assistant_sync_')
+        self.upstream = os.path.join(self.tmp, 'upstream')
+        self.repo = os.path.join(self.tmp, 'repo')
+        os.makedirs(self.upstream)
+        git(self.upstream, 'init', '-q', '-b', 'main')
+        commit(self.upstream, 'base')
+        git(self.tmp, 'clone', '-q', self.upstream, self.repo)
+        git(self.repo, 'checkout', '-q', '-b', 'topic')
+        commit(self.repo, 'topic')
+
+    def sync(self, *answers):
+        # Thay đổi chưa commit: cách cũ sẽ phải stash
+        with open(os.path.join(self.repo, 'topic.txt'), 'a', encoding='utf-8') as f:
+            f.write("wip\n")
+        io = ScriptedIO(('main',) + answers, strict=False)
+        GitScenarios(io_handler=io, working_dir=self.repo).workflow_sync_main()
+        return io
+
+    def test_unreachable_remote_stops_without_checkout(self):
+        git(self.repo, 'remote', 'set-url', 'origin', os.path.join(self.tmp, 'missing'))
+        io = self.sync()
+        self.assertTrue(io.errors)
+        self.assertFalse(any('cách cũ' in line for line in io.lines))
+        self.assertEqual(git(self.repo, 'stash', 'list'), '')
+        self.assertEqual(git(self.repo, 'branch', '--show-current'), 'topic')
+
+    def test_diverged_main_falls_back_and_merges(self):
+        git(self.repo, 'checkout', '-q', 'main')
+        commit(self.repo, 'local')
+        git(self.repo, 'checkout', '-q', 'topic')
+        commit(self.upstream, 'remote')
+        git(self.repo, 'config', 'user.name', 'Test')
+        git(self.repo, 'config', 'user.email', 'test@example.com')
+        git(self.repo, 'config', 'pull.rebase', 'false')
+        io = self.sync()
+        self.assertTrue(any('cách cũ' in line for line in io.lines))
+        self.assertTrue(any('không có xung đột' in line for line in io.lines))
+        self.assertEqual(git(self.repo, 'branch', '--show-current'), 'topic')
+        self.assertEqual(git(self.repo, 'merge-base', '--is-ancestor', 'origin/main', 'HEAD'), '')
+        self.assertEqual(git(self.repo, 'stash', 'list'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""TracingRunner: ghi lại cả lệnh rev-parse mà runner bên trong tự chạy để tìm repo."""
+import unittest
+
+from helpers import ROOT
+
+from git_assistant.runner import DiscoveryCachingRunner
+from git_assistant.tracing import Tracer, TracingRunner
+
+
+class TracingRunnerTest(unittest.TestCase):
+    def test_records_repo_discovery(self):
+        tracer = Tracer()
+        runner = TracingRunner(DiscoveryCachingRunner(), tracer)
+        runner.run(['log', '-1', '--format=%H'], ROOT, read_only=True)
+        runner.run(['log', '-1', '--format=%H'], ROOT, read_only=True)
+        subcommands = [rec.subcommand for rec in tracer.records]
+        # Discovery chỉ chạy một lần cho mỗi thư mục
+        self.assertEqual(subcommands, ['rev-parse', 'log', 'log'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Ghi transcript một workflow trên repo thật, lưu ra file rồi phát lại với code hiện tại."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from helpers import ROOT, git, init_repo
+
+from git_assistant.io_handler import ScriptedIO
+from git_assistant.runner import SubprocessRunner
+from git_assistant.scenarios import GitScenarios
+from git_assistant.transcript import (
+    RecordingRunner, ReplayRunner, TranscriptMismatch, describe)
+
+
+class PullReplayTest(unittest.TestCase):
+    """workflow_pull_code với hai remote: FetchEngine fetch song song nên thứ tự không cố định"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp(prefix='git_assistant_replay_')
+        seed = init_repo(os.path.join(cls.root, 'seed'))
+        with open(os.path.join(seed, 'README.md'), 'w', encoding='utf-8') as f:
+            f.write("seed\n")
+        git(seed, 'add', '.')
+        git(seed, 'commit', '-q', '-m', 'seed')
+        origin = os.path.join(cls.root, 'origin.git')
+        backup = os.path.join(cls.root, 'backup.git')
+        git(cls.root, 'clone', '-q', '--bare', seed, origin)
+        git(cls.root, 'clone', '-q', '--bare', seed, backup)
+        work = os.path.join(cls.root, 'work')
+        git(cls.root, 'clone', '-q', origin, work)
+        git(work, 'remote', 'add', 'backup', backup)
+        git(work, 'config', 'pull.rebase', 'false')
+
+        # origin có commit mới để workflow đi hết bước fetch -> xem trước -> merge
+        with open(os.path.join(seed, 'upstream.txt'), 'w', encoding='utf-8') as f:
+            f.write("upstream\n")
+        git(seed, 'add', '.')
+        git(seed, 'commit', '-q', '-m', 'upstream')
+        git(seed, 'push', '-q', origin, 'main')
+
+        io = ScriptedIO(strict=False)
+        scenarios = GitScenarios(io_handler=io, working_dir=work)
+        recorder = RecordingRunner(SubprocessRunner())
+        scenarios.git.runner = recorder
+        scenarios.workflow_pull_code()
+        cls.answers = [(kind, answer) for kind, _, answer in io.transcript]
+        cls.path = os.path.join(cls.root, 'pull.json')
+        recorder.save(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+
+    def replay(self, runner):
+        scenarios = GitScenarios(io_handler=ScriptedIO(self.answers), working_dir=ROOT)
+        scenarios.git.runner = runner
+        scenarios.workflow_pull_code()
+        runner.verify()
+
+    def test_records_parallel_fetch(self):
+        fetches = [e['args'] for e in ReplayRunner.load(self.path).commands
+                   if e['kind'] == 'stream' and e['args'][0] == 'fetch']
+        self.assertEqual(sorted(args[-1] for args in fetches), ['backup', 'origin'])
+        groups = {e.get('parallel') for e in ReplayRunner.load(self.path).commands
+                  if e['kind'] == 'stream' and e['args'][0] == 'fetch'}
+        self.assertEqual(groups, {1})
+
+    def test_replay_matches(self):
+        replay = ReplayRunner.load(self.path)
+        # Thread pool xếp lịch mỗi lần một khác: phát lại nhiều lần để gặp nhiều thứ tự
+        for _ in range(20):
+            replay.reset()
+            self.replay(replay)
+
+    def test_replay_accepts_any_fetch_order(self):
+        replay = ReplayRunner.load(self.path)
+        fetches = [i for i, e in enumerate(replay.commands) if describe(e).startswith("git (stream) fetch ")]
+        a, b = fetches
+        replay.commands[a], replay.commands[b] = replay.commands[b], replay.commands[a]
+        self.replay(replay)
+
+    def test_changed_command_fails_with_diff(self):
+        replay = ReplayRunner.load(self.path)
+        last = replay.commands[-1]
+        last['args'] = last['args'] + ['--changed']
+        with self.assertRaises(TranscriptMismatch) as ctx:
+            self.replay(replay)
+        message = str(ctx.exception)
+        self.assertIn("--- transcript", message)
+        self.assertIn("+++ workflow", message)
+        self.assertIn("-" + describe(last), message)
+
+
+class ParallelGroupTest(unittest.TestCase):
+    """Chỉ lệnh được đánh dấu cùng nhóm song song mới được đổi thứ tự khi phát lại"""
+
+    def commands(self, group):
+        commands = []
+        for remote in ('backup', 'origin'):
+            entry = {'kind': 'stream', 'args': ['fetch', remote], 'lines': [], 'code': 0}
+            if group is not None:
+                entry['parallel'] = group
+            commands.append(entry)
+        return commands
+
+    def fetch(self, replay, remote):
+        list(replay.stream(['fetch', remote], ROOT))
+
+    def test_parallel_group_any_order(self):
+        replay = ReplayRunner(self.commands(group=1))
+        self.fetch(replay, 'origin')
+        self.fetch(replay, 'backup')
+        replay.verify()
+
+    def test_sequential_fetches_keep_order(self):
+        replay = ReplayRunner(self.commands(group=None))
+        with self.assertRaises(TranscriptMismatch):
+            self.fetch(replay, 'origin')
+
+
+class ClosedStreamTest(unittest.TestCase):
+    def test_stream_closed_early_replays(self):
+        recorder = RecordingRunner(SubprocessRunner())
+        lines = recorder.stream(['log', '--format=%H'], ROOT, read_only=True)
+        self.assertEqual(next(lines)[0], 'stdout')
+        lines.close()
+        entry, = recorder.transcript()['commands']
+        self.assertIsNone(entry['code'])
+
+        replay = ReplayRunner(recorder.transcript()['commands'])
+        items = list(replay.stream(['log', '--format=%H'], ROOT, read_only=True))
+        self.assertEqual(items[-1], ('exit', None))
+        replay.verify()
+
+
+if __name__ == '__main__':
+    unittest.main()
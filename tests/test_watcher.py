@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""RepoWatcher: bỏ qua thư mục bị .gitignore loại, báo đúng loại thay đổi (.git hay working tree)."""
+import os
+import queue
+import sys
+import unittest
+
+from helpers import git, init_repo, temp_dir
+
+from git_assistant.runner import SubprocessRunner
+from git_assistant.watcher import GIT, WORKTREE, RepoWatcher
+
+
+class RepoWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = init_repo(temp_dir(self, 'git_assistant_watch_'))
+        with open(os.path.join(self.repo, '.gitignore'), 'w', encoding='utf-8') as f:
+            f.write("build/\nnode_modules\n")
+        for path in ('src/app', 'build/out', 'node_modules/pkg'):
+            os.makedirs(os.path.join(self.repo, path))
+        self.write('src/app/main.py', "print(1)\n")
+        git(self.repo, 'add', '.')
+        git(self.repo, 'commit', '-q', '-m', 'init')
+
+        self.events = queue.Queue()
+        self.watcher = RepoWatcher(self.repo, os.path.join(self.repo, '.git'), on_change=self.events.put,
+                                   debounce=0.05, runner=SubprocessRunner()).start()
+        self.assertEqual(self.next_event(), {GIT, WORKTREE})
+
+    def tearDown(self):
+        self.watcher.stop()
+
+    def write(self, name, text):
+        with open(os.path.join(self.repo, name), 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def next_event(self, timeout=3):
+        return self.events.get(timeout=timeout)
+
+    def assertNoEvent(self, timeout=0.5):
+        with self.assertRaises(queue.Empty):
+            self.events.get(timeout=timeout)
+
+    def test_polling_backend_reports_git_changes(self):
+        if self.watcher.backend != 'polling':
+            self.skipTest("đang dùng inotify")
+        git(self.repo, 'commit', '-q', '--allow-empty', '-m', 'x')
+        self.assertIn(GIT, self.next_event())
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "cần inotify")
+    def test_ignored_directories_are_not_watched(self):
+        self.assertEqual(self.watcher.backend, 'inotify')
+        watched = {path for path, _ in self.watcher._inotify.dirs.values()}
+        self.assertIn(os.path.join(self.repo, 'src', 'app'), watched)
+        self.assertNotIn(os.path.join(self.repo, 'build'), watched)
+        self.assertNotIn(os.path.join(self.repo, 'node_modules', 'pkg'), watched)
+
+        self.write('build/out/a.o', "x")
+        os.makedirs(os.path.join(self.repo, 'node_modules', 'other'))
+        self.assertNoEvent()
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "cần inotify")
+    def test_reports_kind_of_change(self):
+        self.write('src/app/main.py', "print(2)\n")
+        self.assertEqual(self.next_event(), {WORKTREE})
+        git(self.repo, 'commit', '-q', '-a', '-m', 'change')
+        self.assertIn(GIT, self.next_event())
+
+
+if __name__ == '__main__':
+    unittest.main()